@@ -1,9 +1,106 @@
 """
 Базовый класс для анализаторов функций
 """
+import threading
+from collections import OrderedDict
+
 import numpy as np
 import sympy as sp
-import re
+from parsers.expression_cache import get_compiled
+
+
+def fused_kernel(expressions, arguments):
+    """
+    Одна lambdify со сквозным исключением общих подвыражений (CSE)
+    для нескольких sympy-выражений.
+
+    Args:
+        expressions: список sympy-выражений (например, f, f', f'')
+        arguments: символы-аргументы; первый - переменная, по которой идёт массив точек
+
+    Returns:
+        kernel(values, *остальные аргументы) -> список массивов формы values;
+        невещественные и неопределённые значения - nan
+    """
+    kernel = sp.lambdify(arguments, list(expressions), modules='numpy', cse=True)
+
+    def evaluate(values, *args):
+        values = np.asarray(values, dtype=float)
+        with np.errstate(all='ignore'):
+            results = kernel(values, *args)
+
+        arrays = []
+        for result in results:
+            result = np.asarray(result)
+            if np.iscomplexobj(result):
+                result = np.where(result.imag == 0, result.real, np.nan)
+            arrays.append(np.broadcast_to(result.astype(float), values.shape))
+        return arrays
+
+    return evaluate
+
+
+# Ядра производных, построенные для выражений из кэша выражений
+_KERNEL_CACHE_SIZE = 64
+_kernels = OrderedDict()
+_kernels_lock = threading.Lock()
+
+
+def derivative_kernel(compiled_exprs, order=2):
+    """
+    Общее ядро для одного или нескольких CompiledExpression с общей переменной:
+    на массиве точек возвращает [f, f', ..., f^(order), g, g', ...].
+    Параметры (a, b, ...) передаются после массива точек в алфавитном порядке.
+    Строится один раз на набор выражений.
+
+    Если sympy не строит выражение или производную, при order <= 2
+    производные вычисляются прямым автоматическим дифференцированием
+    по дереву выражения (см. parsers.dual_numbers).
+    """
+    key = (order,) + tuple((c.var_name, c.source) for c in compiled_exprs)
+
+    with _kernels_lock:
+        if key in _kernels:
+            _kernels.move_to_end(key)
+            return _kernels[key]
+
+    variable = compiled_exprs[0].symbol
+    parameters = sorted(set().union(*(c.parameters for c in compiled_exprs)))
+
+    try:
+        expressions = []
+        for compiled in compiled_exprs:
+            expressions.append(compiled.sympy_expr)
+            expressions.extend(compiled.derivative(n) for n in range(1, order + 1))
+        kernel = fused_kernel(expressions, [variable] + [sp.Symbol(p) for p in parameters])
+    except Exception as e:
+        if order > 2:
+            raise
+        print(f"⚠️ Sympy не построил производные ({e}), используется автоматическое дифференцирование")
+        kernel = dual_kernel(compiled_exprs, parameters, order)
+    kernel.parameters = tuple(parameters)
+
+    with _kernels_lock:
+        _kernels[key] = kernel
+        if len(_kernels) > _KERNEL_CACHE_SIZE:
+            _kernels.popitem(last=False)
+    return kernel
+
+
+def dual_kernel(compiled_exprs, parameters, order=2):
+    """
+    Ядро с тем же интерфейсом, что у derivative_kernel, но без sympy:
+    f, f', f'' каждого выражения вычисляются по его дереву (kernel.derivatives).
+    """
+    def evaluate(values, *args):
+        values_by_name = dict(zip(parameters, args))
+        arrays = []
+        for compiled in compiled_exprs:
+            own_args = [values_by_name[p] for p in compiled.parameters]
+            arrays.extend(compiled.kernel.derivatives(values, *own_args)[:order + 1])
+        return arrays
+
+    return evaluate
 
 
 class BaseAnalyzer:
@@ -25,8 +122,10 @@ class BaseAnalyzer:
         self.x_max = x_max
         self.func_type = func_type
         self.x_sym = sp.symbols('x')
+        self.compiled = None
         self.expr_sym = None
         self.derivative_sym = None
+        self.param_values = {}
 
     def analyze(self):
         """
@@ -42,51 +141,34 @@ class BaseAnalyzer:
         """
         raise NotImplementedError("Метод to_text должен быть реализован в подклассе")
 
+    def _derivative_values(self, values, compiled_exprs=None, order=2):
+        """
+        Значения выражения и его производных до order на массиве точек за один вызов.
+        По умолчанию - для self.compiled; nan там, где значение не вещественно.
+        """
+        kernel = derivative_kernel(compiled_exprs or [self.compiled], order)
+        args = [float(self.param_values[p]) for p in kernel.parameters]
+        return kernel(values, *args)
+
     def _parse_sympy_expression(self):
         """
         Конвертирует пользовательское выражение в sympy формат.
+        Выражение и производная берутся из общего кэша выражений.
         """
-        expr = self.user_expr.lower().strip()
-
-        # Заменяем степени
-        expr = expr.replace('^', '**')
-        expr = expr.replace('²', '**2')
-        expr = expr.replace('³', '**3')
-
-        # Убираем math. префиксы для sympy
-        expr = re.sub(r'math\.', '', expr)
-
-        # Замена функций на sympy версии
-        expr = re.sub(r'\b(?:arcsin|asin)\(', 'asin(', expr)
-        expr = re.sub(r'\b(?:arccos|acos)\(', 'acos(', expr)
-        expr = re.sub(r'\b(?:arctan|atan)\(', 'atan(', expr)
-        expr = re.sub(r'\bln\(', 'log(', expr)
-
-        # Неявное умножение
-        expr = re.sub(r'(\d)(?![.\d])([a-zA-Z])', r'\1*\2', expr)
-        expr = re.sub(r'(?<!\*)\b([a-zA-Z\)])\(', r'\1*(', expr)
-        expr = re.sub(r'(\))([a-zA-Z\d])', r'\1*\2', expr)
-        expr = re.sub(r'([a-zA-Z])(\d)', r'\1*\2', expr)
-
-        # Финальная очистка
-        expr = re.sub(r'abs\*\(', r'abs(', expr)
-        expr = re.sub(r'(\w+)\*\(', r'\1(', expr)
-
-        print(f"🔍 Выражение для sympy: '{expr}'")
-
         try:
-            self.expr_sym = sp.sympify(expr, evaluate=True)
+            self.compiled = get_compiled(self.user_expr, 'x')
+            self.expr_sym = self.compiled.sympy_expr
             print(f"✅ Sympy выражение: {self.expr_sym}")
 
             # Вычисляем производную
             try:
-                self.derivative_sym = sp.diff(self.expr_sym, self.x_sym)
+                self.derivative_sym = self.compiled.derivative(1)
                 print(f"✅ Производная: {self.derivative_sym}")
             except Exception as e:
                 print(f"⚠️ Не удалось вычислить производную: {e}")
                 self.derivative_sym = None
 
         except Exception as e:
-            print(f"❌ Ошибка sympify: {e}")
+            print(f"❌ Ошибка построения sympy выражения: {e}")
             self.expr_sym = None
             self.derivative_sym = None
@@ -1,8 +1,8 @@
 """
 Модуль для анализа области определения и области значений функции
 """
-import numpy as np
 import re
+from utils.sample_table import get_sample_table
 from sympy.calculus.util import continuous_domain
 from sympy import S, symbols, sympify, N, diff
 
@@ -79,21 +79,12 @@ def _numerical_range(func, x_min, x_max):
     Численное определение множества значений.
     """
     try:
-        xs = np.linspace(x_min, x_max, 2000)
-        ys = []
-
-        for x in xs:
-            try:
-                y = func(x)
-                if np.isfinite(y):
-                    ys.append(y)
-            except:
-                continue
-
-        if not ys:
+        value_range = get_sample_table(func, x_min, x_max).value_range()
+
+        if value_range is None:
             return "E(f) = Ø"
 
-        y_min, y_max = min(ys), max(ys)
+        y_min, y_max = value_range
 
         if abs(y_min) > 1e6 or abs(y_max) > 1e6:
             return "E(f) = (−∞; +∞)"
@@ -2,9 +2,12 @@
 Анализатор для параметрических функций x = x(t), y = y(t)
 """
 from .base_analyzer import BaseAnalyzer
-from sympy import symbols, sympify, solve, S, simplify, diff
+from sympy import symbols, solve, S, simplify
+from parsers.expression_cache import get_compiled
+from utils.math_utils import evaluate_array
+from utils.root_finding import refine_roots
+from utils.time_budget import BudgetExceeded, run_with_budget
 import numpy as np
-import re
 
 class ParametricAnalyzer(BaseAnalyzer):
     """
@@ -26,10 +29,14 @@ class ParametricAnalyzer(BaseAnalyzer):
         self.x_expr = x_expr
         self.y_expr = y_expr
         self.t_sym = symbols('t')
+        self.x_compiled = None
+        self.y_compiled = None
         self.x_expr_sym = None
         self.y_expr_sym = None
         self.dx_dt_sym = None
         self.dy_dt_sym = None
+        # Разделы, посчитанные численно из-за превышения бюджета времени sympy
+        self.approximate = set()
         self._parse_parametric_expressions()
 
     def _parse_parametric_expressions(self):
@@ -40,53 +47,22 @@ class ParametricAnalyzer(BaseAnalyzer):
         print(f"   x(t) = {self.x_expr}")
         print(f"   y(t) = {self.y_expr}")
 
-        def parse_param_expr(expr_str):
-            """
-            Парсинг одного параметрического выражения.
-            """
-            expr = expr_str.lower().strip()
-
-            # Заменяем степени
-            expr = expr.replace('^', '**')
-            expr = expr.replace('²', '**2')
-            expr = expr.replace('³', '**3')
-
-            # Убираем math. префиксы
-            expr = re.sub(r'math\.', '', expr)
-
-            # Замена функций
-            expr = re.sub(r'\b(?:arcsin|asin)\(', 'asin(', expr)
-            expr = re.sub(r'\b(?:arccos|acos)\(', 'acos(', expr)
-            expr = re.sub(r'\b(?:arctan|atan)\(', 'atan(', expr)
-            expr = re.sub(r'\bln\(', 'log(', expr)
-
-            # Неявное умножение (заменяем x на t)
-            expr = re.sub(r'(\d)(?![.\d])([a-zA-Z])', r'\1*\2', expr)
-            expr = re.sub(r'(?<!\*)\b([a-zA-Z\)])\(', r'\1*(', expr)
-            expr = re.sub(r'(\))([a-zA-Z\d])', r'\1*\2', expr)
-            expr = re.sub(r'([a-zA-Z])(\d)', r'\1*\2', expr)
-
-            # Финальная очистка
-            expr = re.sub(r'abs\*\(', r'abs(', expr)
-            expr = re.sub(r'(\w+)\*\(', r'\1(', expr)
-
-            return expr
-
         try:
-            # Парсим x(t)
-            x_parsed = parse_param_expr(self.x_expr)
-            self.x_expr_sym = sympify(x_parsed, evaluate=True)
+            # Разбор обоих выражений; sympy строится после, чтобы численные
+            # производные (dual_numbers) были доступны и без него
+            self.x_compiled = get_compiled(self.x_expr, 't')
+            self.y_compiled = get_compiled(self.y_expr, 't')
+
+            self.x_expr_sym = self.x_compiled.sympy_expr
             print(f"✅ x(t) = {self.x_expr_sym}")
 
-            # Парсим y(t)
-            y_parsed = parse_param_expr(self.y_expr)
-            self.y_expr_sym = sympify(y_parsed, evaluate=True)
+            self.y_expr_sym = self.y_compiled.sympy_expr
             print(f"✅ y(t) = {self.y_expr_sym}")
 
             # Вычисляем производные dx/dt и dy/dt
             try:
-                self.dx_dt_sym = diff(self.x_expr_sym, self.t_sym)
-                self.dy_dt_sym = diff(self.y_expr_sym, self.t_sym)
+                self.dx_dt_sym = self.x_compiled.derivative(1)
+                self.dy_dt_sym = self.y_compiled.derivative(1)
                 print(f"✅ dx/dt = {self.dx_dt_sym}")
                 print(f"✅ dy/dt = {self.dy_dt_sym}")
             except Exception as e:
@@ -125,7 +101,8 @@ class ParametricAnalyzer(BaseAnalyzer):
         result += f"• Диапазон x: {a['x_range']}\n"
         result += f"• Диапазон y: {a['y_range']}\n"
         result += f"• Длина кривой: {a['curve_length']}\n"
-        result += f"• Особые точки:\n   {a['special_points']}\n"
+        note = " (≈ численно)" if 'special_points' in self.approximate else ""
+        result += f"• Особые точки{note}:\n   {a['special_points']}\n"
         result += f"• Самопересечения: {a['self_intersections']}\n"
         result += f"• Экстремумы кривизны:\n   {a['curvature_extrema']}"
         return result
@@ -137,20 +114,13 @@ class ParametricAnalyzer(BaseAnalyzer):
         try:
             func = self.x_func if coord == 'x' else self.y_func
             ts = np.linspace(self.x_min, self.x_max, 1000)
-            vals = []
+            vals = evaluate_array(func, ts)
+            vals = vals[np.isfinite(vals)]
 
-            for t in ts:
-                try:
-                    val = func(t)
-                    if np.isfinite(val):
-                        vals.append(val)
-                except:
-                    continue
-
-            if not vals:
+            if vals.size == 0:
                 return "не определён"
 
-            v_min, v_max = min(vals), max(vals)
+            v_min, v_max = vals.min(), vals.max()
             return f"[{v_min:.2f}; {v_max:.2f}]"
 
         except Exception as e:
@@ -163,21 +133,13 @@ class ParametricAnalyzer(BaseAnalyzer):
         """
         try:
             ts = np.linspace(self.x_min, self.x_max, 2000)
-            length = 0
-
-            for i in range(len(ts) - 1):
-                t1, t2 = ts[i], ts[i + 1]
+            xs = evaluate_array(self.x_func, ts)
+            ys = evaluate_array(self.y_func, ts)
 
-                try:
-                    x1, y1 = self.x_func(t1), self.y_func(t1)
-                    x2, y2 = self.x_func(t2), self.y_func(t2)
-
-                    if all(np.isfinite([x1, y1, x2, y2])):
-                        dx = x2 - x1
-                        dy = y2 - y1
-                        length += np.sqrt(dx**2 + dy**2)
-                except:
-                    continue
+            dx = np.diff(xs)
+            dy = np.diff(ys)
+            segments = np.sqrt(dx**2 + dy**2)
+            length = segments[np.isfinite(segments)].sum()
 
             return f"L ≈ {length:.2f}"
 
@@ -195,7 +157,7 @@ class ParametricAnalyzer(BaseAnalyzer):
             # Точки где dx/dt = 0 (вертикальная касательная)
             if self.dx_dt_sym is not None:
                 try:
-                    t_vertical = solve(self.dx_dt_sym, self.t_sym)
+                    t_vertical = run_with_budget(solve, self.dx_dt_sym, self.t_sym)
                     for t in t_vertical:
                         if t.is_real or t.is_real is None:
                             t_val = float(t.evalf())
@@ -203,13 +165,15 @@ class ParametricAnalyzer(BaseAnalyzer):
                                 x_val = self.x_func(t_val)
                                 y_val = self.y_func(t_val)
                                 special.append(f"Вертикальная касательная при t={t_val:.2f}, ({x_val:.2f}, {y_val:.2f})")
+                except BudgetExceeded:
+                    self.approximate.add('special_points')
                 except:
                     pass
 
             # Точки где dy/dt = 0 (горизонтальная касательная)
             if self.dy_dt_sym is not None:
                 try:
-                    t_horizontal = solve(self.dy_dt_sym, self.t_sym)
+                    t_horizontal = run_with_budget(solve, self.dy_dt_sym, self.t_sym)
                     for t in t_horizontal:
                         if t.is_real or t.is_real is None:
                             t_val = float(t.evalf())
@@ -217,13 +181,15 @@ class ParametricAnalyzer(BaseAnalyzer):
                                 x_val = self.x_func(t_val)
                                 y_val = self.y_func(t_val)
                                 special.append(f"Горизонтальная касательная при t={t_val:.2f}, ({x_val:.2f}, {y_val:.2f})")
+                except BudgetExceeded:
+                    self.approximate.add('special_points')
                 except:
                     pass
 
             # Точки где dx/dt = dy/dt = 0 (особая точка)
             if self.dx_dt_sym is not None and self.dy_dt_sym is not None:
                 try:
-                    singular = solve([self.dx_dt_sym, self.dy_dt_sym], self.t_sym)
+                    singular = run_with_budget(solve, [self.dx_dt_sym, self.dy_dt_sym], self.t_sym)
                     for sol in singular:
                         if isinstance(sol, dict):
                             t_val = float(sol[self.t_sym].evalf())
@@ -234,9 +200,15 @@ class ParametricAnalyzer(BaseAnalyzer):
                             x_val = self.x_func(t_val)
                             y_val = self.y_func(t_val)
                             special.append(f"Особая точка при t={t_val:.2f}, ({x_val:.2f}, {y_val:.2f})")
+                except BudgetExceeded:
+                    self.approximate.add('special_points')
                 except:
                     pass
 
+            # Без символьных производных касательные ищутся численно
+            if 'special_points' in self.approximate or self.dx_dt_sym is None or self.dy_dt_sym is None:
+                special = self._numerical_special_points()
+
             if special:
                 return "\n    ".join(special[:5])  # Топ-5
             else:
@@ -246,35 +218,52 @@ class ParametricAnalyzer(BaseAnalyzer):
             print(f"⚠️ Ошибка поиска особых точек: {e}")
             return "Не определены"
 
+    def _numerical_special_points(self):
+        """
+        Численный поиск касательных: смена знака dx/dt или dy/dt на сетке по t.
+        Используется, когда solve не уложился в бюджет времени или sympy
+        не построил производные.
+        """
+        special = []
+        ts = np.linspace(self.x_min, self.x_max, 1000)
+        _, dx, _, _, dy, _ = self._derivative_values(ts, [self.x_compiled, self.y_compiled])
+
+        for compiled, values, label in ((self.x_compiled, dx, "Вертикальная"),
+                                        (self.y_compiled, dy, "Горизонтальная")):
+            v1, v2 = values[:-1], values[1:]
+            brackets = np.flatnonzero(np.isfinite(v1) & np.isfinite(v2) & (v1 * v2 < 0))
+            # Нули производной уточняются сразу на всех отрезках со сменой знака
+            roots = refine_roots(lambda t, c=compiled: self._derivative_values(t, [c], order=1)[1],
+                                 ts[brackets], ts[brackets + 1], v1[brackets], v2[brackets])
+            for t_val in roots[np.isfinite(roots)].tolist():
+                x_val = self.x_func(t_val)
+                y_val = self.y_func(t_val)
+                special.append(f"{label} касательная при t={t_val:.2f}, ({x_val:.2f}, {y_val:.2f})")
+
+        return special
+
     def _find_self_intersections(self):
         """
         Поиск самопересечений параметрической кривой.
         """
         try:
             ts = np.linspace(self.x_min, self.x_max, 500)
+            xs = evaluate_array(self.x_func, ts)
+            ys = evaluate_array(self.y_func, ts)
+            finite = np.isfinite(xs) & np.isfinite(ys)
             points = {}
             intersections = []
 
-            for t in ts:
-                try:
-                    x = self.x_func(t)
-                    y = self.y_func(t)
-
-                    if not (np.isfinite(x) and np.isfinite(y)):
-                        continue
+            for t, x, y in zip(ts[finite].tolist(), xs[finite].tolist(), ys[finite].tolist()):
+                # Округляем для сравнения
+                key = (round(x, 2), round(y, 2))
 
-                    # Округляем для сравнения
-                    key = (round(x, 2), round(y, 2))
-
-                    if key in points:
-                        # Проверяем что это не та же точка параметра
-                        if abs(t - points[key]) > 0.1:
-                            intersections.append((key[0], key[1], points[key], t))
-                    else:
-                        points[key] = t
-
-                except:
-                    continue
+                if key in points:
+                    # Проверяем что это не та же точка параметра
+                    if abs(t - points[key]) > 0.1:
+                        intersections.append((key[0], key[1], points[key], t))
+                else:
+                    points[key] = t
 
             if intersections:
                 result = []
@@ -294,47 +283,46 @@ class ParametricAnalyzer(BaseAnalyzer):
         """
         try:
             # κ = |x'y'' - y'x''| / (x'² + y'²)^(3/2)
-            if self.dx_dt_sym is None or self.dy_dt_sym is None:
+            if self.x_compiled is None or self.y_compiled is None:
                 return "Не определены"
 
-            # Вторые производные
-            d2x_dt2 = diff(self.dx_dt_sym, self.t_sym)
-            d2y_dt2 = diff(self.dy_dt_sym, self.t_sym)
-
-            # Численный поиск экстремумов кривизны
+            # Численный поиск экстремумов кривизны: x', x'', y', y'' на всех точках за один вызов
             ts = np.linspace(self.x_min, self.x_max, 500)
-            curvatures = []
-
-            for t in ts:
-                try:
-                    dx = float(self.dx_dt_sym.subs(self.t_sym, t))
-                    dy = float(self.dy_dt_sym.subs(self.t_sym, t))
-                    d2x = float(d2x_dt2.subs(self.t_sym, t))
-                    d2y = float(d2y_dt2.subs(self.t_sym, t))
+            _, dx, d2x, _, dy, d2y = self._derivative_values(ts, [self.x_compiled, self.y_compiled])
 
-                    numerator = abs(dx * d2y - dy * d2x)
-                    denominator = (dx**2 + dy**2)**(3/2)
+            with np.errstate(all='ignore'):
+                numerator = np.abs(dx * d2y - dy * d2x)
+                denominator = (dx**2 + dy**2)**(3/2)
+                k = numerator / denominator
 
-                    if denominator > 1e-9:
-                        k = numerator / denominator
-                        curvatures.append((t, k))
-                except:
-                    continue
+            valid = (denominator > 1e-9) & np.isfinite(k)
+            ts, k = ts[valid], k[valid]
 
-            if not curvatures:
+            if ts.size == 0:
                 return "Не найдены"
 
-            # Находим максимум и минимум кривизны
-            curvatures.sort(key=lambda x: x[1])
+            # Находим максимум и минимум кривизны (при равенстве - первый минимум и последний максимум)
+            i_min = int(np.argmin(k))
+            i_max = ts.size - 1 - int(np.argmax(k[::-1]))
+
+            # Внутренние экстремумы уточняются по нулю dκ/dt между соседними узлами
+            # (нужны третьи производные, поэтому только при символьных производных)
+            inner = [i for i in (i_min, i_max) if 0 < i < ts.size - 1]
+            if inner and self.dx_dt_sym is not None and self.dy_dt_sym is not None:
+                inner = np.array(inner)
+                refined = refine_roots(self._curvature_slope, ts[inner - 1], ts[inner + 1])
+                ok = np.isfinite(refined)
+                ts, k = ts.copy(), k.copy()
+                ts[inner[ok]] = refined[ok]
+                k[inner[ok]] = self._curvature(refined[ok])
 
             result = []
-            if len(curvatures) > 0:
-                t_min, k_min = curvatures[0]
-                x_min, y_min = self.x_func(t_min), self.y_func(t_min)
-                result.append(f"Минимум κ={k_min:.3f} при t={t_min:.2f}, ({x_min:.2f}, {y_min:.2f})")
+            t_min, k_min = ts[i_min], k[i_min]
+            x_min, y_min = self.x_func(t_min), self.y_func(t_min)
+            result.append(f"Минимум κ={k_min:.3f} при t={t_min:.2f}, ({x_min:.2f}, {y_min:.2f})")
 
-            if len(curvatures) > 1:
-                t_max, k_max = curvatures[-1]
+            if ts.size > 1:
+                t_max, k_max = ts[i_max], k[i_max]
                 x_max, y_max = self.x_func(t_max), self.y_func(t_max)
                 result.append(f"Максимум κ={k_max:.3f} при t={t_max:.2f}, ({x_max:.2f}, {y_max:.2f})")
 
@@ -344,6 +332,27 @@ class ParametricAnalyzer(BaseAnalyzer):
             print(f"⚠️ Ошибка анализа кривизны: {e}")
             return "Не определены"
 
+    def _curvature(self, ts):
+        """
+        Кривизна κ(t) на массиве значений параметра.
+        """
+        _, dx, d2x, _, dy, d2y = self._derivative_values(ts, [self.x_compiled, self.y_compiled])
+        with np.errstate(all='ignore'):
+            return np.abs(dx * d2y - dy * d2x) / (dx**2 + dy**2)**(3/2)
+
+    def _curvature_slope(self, ts):
+        """
+        Числитель dκ/dt: N'·D - 3/2·N·D', где N = x'y'' - y'x'', D = x'² + y'².
+        Его нули - точки экстремума кривизны.
+        """
+        _, dx, d2x, d3x, _, dy, d2y, d3y = self._derivative_values(
+            ts, [self.x_compiled, self.y_compiled], order=3)
+        with np.errstate(all='ignore'):
+            numerator = dx * d2y - dy * d2x
+            speed = dx**2 + dy**2
+            return ((dx * d3y - dy * d3x) * speed
+                    - 3 * numerator * (dx * d2x + dy * d2y))
+
     def _identify_curve_type(self):
         """
         Определение типа параметрической кривой.
@@ -352,19 +361,15 @@ class ParametricAnalyzer(BaseAnalyzer):
             # Проверяем на окружность: x² + y² = r²
             if self.x_expr_sym is not None and self.y_expr_sym is not None:
                 # Подставляем несколько значений t
-                test_t = [0, np.pi/4, np.pi/2, np.pi, 3*np.pi/2]
-                radii = []
-
-                for t_val in test_t:
-                    try:
-                        x = float(self.x_expr_sym.subs(self.t_sym, t_val))
-                        y = float(self.y_expr_sym.subs(self.t_sym, t_val))
-                        r = np.sqrt(x**2 + y**2)
-                        radii.append(r)
-                    except:
-                        continue
-
-                if radii and max(radii) - min(radii) < 0.1:
+                test_t = np.array([0, np.pi/4, np.pi/2, np.pi, 3*np.pi/2])
+                try:
+                    xs, _, _, ys, _, _ = self._derivative_values(test_t, [self.x_compiled, self.y_compiled])
+                    radii = np.sqrt(xs**2 + ys**2)
+                    radii = radii[np.isfinite(radii)]
+                except Exception:
+                    radii = np.array([])
+
+                if radii.size and max(radii) - min(radii) < 0.1:
                     return f"Окружность (r ≈ {np.mean(radii):.2f})"
 
             # Проверяем на эллипс: (x/a)² + (y/b)² = 1
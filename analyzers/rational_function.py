@@ -0,0 +1,259 @@
+"""
+Быстрый путь для многочленов и дробно-рациональных функций.
+
+Большинство вводимых выражений (x^2-2x, x^3-3x+1, (x^2-1)/(x-2)) -
+отношение двух многочленов. Для них нули, критические точки, полюсы и
+точное множество значений получаются из корней многочленов
+(numpy.roots, собственные числа сопровождающей матрицы) без вызова solve.
+
+Коэффициенты извлекаются из sympy.Poly один раз; параметры (a, b, ...)
+остаются в них символами и только подставляются числами.
+"""
+from fractions import Fraction
+
+import numpy as np
+import sympy as sp
+
+
+# Относительная погрешность, с которой корень numpy.roots считается вещественным
+_IMAG_TOL = 1e-9
+
+# Кратные корни numpy.roots возвращает с погрешностью порядка eps^(1/k);
+# корни ближе этого расстояния (относительно) считаются одним
+_MERGE_TOL = 1e-5
+
+# Наибольший знаменатель, с которым коэффициент распознаётся как дробь
+_MAX_DENOMINATOR = 10 ** 6
+
+
+def rational_form(expr, x_sym, param_symbols=()):
+    """
+    Числитель и знаменатель expr как многочлены от x_sym.
+
+    Сокращение общих множителей не выполняется: выколотые точки
+    (x^2-1)/(x-1) остаются общими корнями числителя и знаменателя.
+
+    Returns:
+        (numerator, denominator) - функции параметров, возвращающие списки
+        коэффициентов от старшего; None, если expr не рациональна по x_sym
+    """
+    if not expr.is_rational_function(x_sym):
+        return None
+
+    numerator, denominator = sp.fraction(sp.together(expr))
+    try:
+        polys = (sp.Poly(numerator, x_sym), sp.Poly(denominator, x_sym))
+    except sp.PolynomialError:
+        return None
+
+    allowed = set(param_symbols)
+    coefficients = [poly.all_coeffs() for poly in polys]
+    for coeffs in coefficients:
+        if any(c.free_symbols - allowed for c in coeffs):
+            return None
+
+    return tuple(sp.lambdify(param_symbols, coeffs, 'numpy') for coeffs in coefficients)
+
+
+def _exact_rational(value):
+    value = float(value)
+    fraction = Fraction(value).limit_denominator(_MAX_DENOMINATOR)
+    if abs(float(fraction) - value) <= 4 * np.finfo(float).eps * abs(value):
+        return sp.Rational(fraction.numerator, fraction.denominator)
+    return sp.Rational(value)
+
+
+def square_free_part(coeffs):
+    """
+    Коэффициенты многочлена без кратных множителей (p / НОД(p, p'))
+    с теми же вещественными корнями, но каждым один раз.
+
+    НОД ищется точно, в рациональных числах. Коэффициент заменяется
+    дробью с небольшим знаменателем, если она совпадает с ним до ошибки
+    округления (0.1 -> 1/10), иначе - точным значением float. Если
+    коэффициенты не удалось распознать, НОД обычно равен 1 и многочлен
+    возвращается как есть.
+    """
+    x = sp.Symbol('x')
+    poly = sp.Poly([_exact_rational(c) for c in coeffs], x, domain='QQ')
+    part = poly.sqf_part()
+    if part.degree() == poly.degree():
+        return coeffs
+    return np.array([float(c) for c in part.all_coeffs()])
+
+
+def real_polynomial_roots(coeffs):
+    """
+    Вещественные корни многочлена по возрастанию, без повторов.
+    Коэффициенты - от старшего, как для numpy.roots.
+    """
+    coeffs = np.trim_zeros(np.asarray(coeffs, dtype=float), 'f')
+    if coeffs.size <= 1:
+        return np.array([])
+
+    # Кратный корень numpy.roots возвращает облаком радиуса eps^(1/k),
+    # которое уже при k = 4 шире _MERGE_TOL: сначала убираем кратность
+    coeffs = square_free_part(coeffs)
+    roots = np.roots(coeffs)
+    re = roots.real
+    with np.errstate(all='ignore'):
+        # Кратный вещественный корень может получить малую мнимую часть:
+        # принимаем его, если невязка в вещественной части мала
+        residual = np.abs(np.polyval(coeffs, re))
+        scale = np.polyval(np.abs(coeffs), np.abs(re))
+    real = (np.abs(roots.imag) <= _IMAG_TOL * (1 + np.abs(re))) | (residual <= _IMAG_TOL * scale)
+
+    result = np.sort(re[real])
+    if result.size > 1:
+        # Кластер близких корней заменяется средним: для кратного корня
+        # погрешности отдельных корней взаимно компенсируются
+        new_cluster = np.diff(result) > _MERGE_TOL * (1 + np.abs(result[1:]))
+        labels = np.concatenate(([0], np.cumsum(new_cluster)))
+        result = np.bincount(labels, weights=result) / np.bincount(labels)
+    return result
+
+
+class RationalFunction:
+    """
+    f(x) = p(x) / q(x) с числовыми коэффициентами (от старшего).
+    Многочлен - частный случай q(x) = 1.
+    """
+    def __init__(self, numerator, denominator):
+        self.p = np.trim_zeros(np.atleast_1d(np.asarray(numerator, dtype=float)), 'f')
+        self.q = np.trim_zeros(np.atleast_1d(np.asarray(denominator, dtype=float)), 'f')
+        self._holes = None
+
+    @classmethod
+    def from_form(cls, form, args):
+        """
+        RationalFunction для значений параметров args; None, если при этих
+        значениях числитель или знаменатель тождественно равен нулю или
+        коэффициенты не вещественны.
+        """
+        numerator_func, denominator_func = form
+        with np.errstate(all='ignore'):
+            try:
+                numerator = np.asarray(numerator_func(*args), dtype=float)
+                denominator = np.asarray(denominator_func(*args), dtype=float)
+            except (TypeError, ValueError):
+                return None
+
+        if not (np.isfinite(numerator).all() and np.isfinite(denominator).all()):
+            return None
+        rational = cls(numerator, denominator)
+        if rational.p.size == 0 or rational.q.size == 0:
+            return None
+        return rational
+
+    def __call__(self, x):
+        with np.errstate(all='ignore'):
+            return np.polyval(self.p, x) / np.polyval(self.q, x)
+
+    def _is_root(self, coeffs, points):
+        points = np.asarray(points, dtype=float)
+        with np.errstate(all='ignore'):
+            residual = np.abs(np.polyval(coeffs, points))
+            scale = np.polyval(np.abs(coeffs), np.abs(points))
+        return residual <= 1e-9 * scale
+
+    def poles(self):
+        """
+        Вещественные корни знаменателя, не являющиеся корнями числителя.
+        """
+        roots = real_polynomial_roots(self.q)
+        return roots[~self._is_root(self.p, roots)]
+
+    def holes(self):
+        """
+        Выколотые точки: общие вещественные корни числителя и знаменателя.
+        """
+        if self._holes is None:
+            roots = real_polynomial_roots(self.q)
+            self._holes = roots[self._is_root(self.p, roots)]
+        return self._holes
+
+    def zeros(self):
+        """
+        Вещественные нули (корни числителя вне области, где q = 0, исключены).
+        """
+        roots = real_polynomial_roots(self.p)
+        if self.q.size > 1:
+            roots = roots[~self._is_root(self.q, roots)]
+        return roots
+
+    def critical_points(self):
+        """
+        Нули производной: корни p'q - pq', не являющиеся корнями q.
+        """
+        numerator = np.polysub(np.polymul(np.polyder(self.p), self.q),
+                               np.polymul(self.p, np.polyder(self.q)))
+        roots = real_polynomial_roots(numerator)
+        if self.q.size > 1:
+            roots = roots[~self._is_root(self.q, roots)]
+        return roots
+
+    def _limit_at_infinity(self, direction):
+        """
+        Предел f при x -> direction * ∞ (direction = ±1).
+        """
+        excess = (self.p.size - 1) - (self.q.size - 1)
+        ratio = self.p[0] / self.q[0]
+        if excess < 0:
+            return 0.0
+        if excess == 0:
+            return float(ratio)
+        return float(np.sign(ratio) * direction ** excess * np.inf)
+
+    def _limit_at_pole(self, pole, side, neighbours):
+        """
+        Предел f в полюсе слева (side = -1) или справа (side = +1): ±∞.
+        Знак берётся в точке настолько близкой к полюсу, что между ними нет
+        других нулей и полюсов.
+        """
+        gaps = np.abs(neighbours - pole)
+        gaps = gaps[gaps > 0]
+        h = 1e-6 * (1 + abs(pole))
+        if gaps.size:
+            h = min(h, gaps.min() / 2)
+        return float(np.sign(self(pole + side * h)) * np.inf)
+
+    def value_range(self):
+        """
+        Точное множество значений на всей области определения (множество sympy)
+        или None, если у функции есть выколотые точки.
+        """
+        if self.holes().size:
+            return None
+        if self.p.size == 1 and self.q.size == 1:
+            return sp.FiniteSet(_rounded(self.p[0] / self.q[0]))
+
+        poles = self.poles()
+        critical = self.critical_points()
+        neighbours = np.concatenate((poles, self.zeros()))
+        bounds = np.concatenate(([-np.inf], poles, [np.inf]))
+
+        pieces = []
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            # Значения в концах непрерывного участка не достигаются (пределы)
+            lo_limit = self._limit_at_infinity(-1) if lo == -np.inf else self._limit_at_pole(lo, 1, neighbours)
+            hi_limit = self._limit_at_infinity(1) if hi == np.inf else self._limit_at_pole(hi, -1, neighbours)
+            inside = critical[(critical > lo) & (critical < hi)]
+            attained = self(inside).tolist()
+
+            low = min([lo_limit, hi_limit] + attained)
+            high = max([lo_limit, hi_limit] + attained)
+            pieces.append(sp.Interval(_rounded(low), _rounded(high),
+                                      left_open=not any(np.isclose(v, low) for v in attained),
+                                      right_open=not any(np.isclose(v, high) for v in attained)))
+
+        return sp.Union(*pieces)
+
+
+def _rounded(value):
+    """
+    Граница для множества sympy: ±∞ - как oo, числа округляются, чтобы
+    одинаковые значения с разных участков объединялись.
+    """
+    if np.isinf(value):
+        return sp.oo if value > 0 else -sp.oo
+    return sp.Float(float(f"{value:.12g}"))
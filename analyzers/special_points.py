@@ -2,6 +2,7 @@
 Модуль для анализа особых точек параметрической кривой
 """
 import numpy as np
+from utils.math_utils import evaluate_array
 from sympy import solve, diff, symbols, N
 
 
@@ -76,29 +77,22 @@ def find_self_intersections(x_func, y_func, t_min, t_max):
     # t_sym = symbols('t')
     try:
         ts = np.linspace(t_min, t_max, 500)
+        xs = evaluate_array(x_func, ts)
+        ys = evaluate_array(y_func, ts)
+        finite = np.isfinite(xs) & np.isfinite(ys)
         points = {}
         intersections = []
 
-        for t in ts:
-            try:
-                x = x_func(t)
-                y = y_func(t)
-
-                if not (np.isfinite(x) and np.isfinite(y)):
-                    continue
+        for t, x, y in zip(ts[finite].tolist(), xs[finite].tolist(), ys[finite].tolist()):
+            # Округляем для сравнения
+            key = (round(x, 2), round(y, 2))
 
-                # Округляем для сравнения
-                key = (round(x, 2), round(y, 2))
-
-                if key in points:
-                    # Проверяем что это не та же точка параметра
-                    if abs(t - points[key]) > 0.1:
-                        intersections.append((key[0], key[1], points[key], t))
-                else:
-                    points[key] = t
-
-            except:
-                continue
+            if key in points:
+                # Проверяем что это не та же точка параметра
+                if abs(t - points[key]) > 0.1:
+                    intersections.append((key[0], key[1], points[key], t))
+            else:
+                points[key] = t
 
         if intersections:
             result = []
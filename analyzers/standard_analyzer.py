@@ -1,51 +1,252 @@
 """
 Анализатор для обычных функций y = f(x)
 """
+from collections import namedtuple
+
 from .base_analyzer import BaseAnalyzer
-from sympy.calculus.util import continuous_domain
-from sympy import S, simplify, diff, solve
+from .symbolic_analysis import get_symbolic_analysis
+from sympy import S
+from utils.branch_and_bound import enclose_range, find_roots
+from utils.math_utils import evaluate_array
+from utils.root_finding import refine_roots
+from utils.sample_table import get_sample_table
+from utils.time_budget import BudgetExceeded
 import numpy as np
 import re
 
 
+# Промежуточные результаты стадий анализа
+#   Zeros            - нули на отрезке (округлённые, по возрастанию) и способ: 'analytical' / 'numerical'
+#   CriticalPoints   - найденные вещественные корни f'(x) (периодические семейства -
+#                      только на отрезке), те из них, что лежат на отрезке, и полюсы
+#                      внутри отрезка, которые тоже разделяют участки монотонности
+#   SecondDerivative - значения f''(x) в критических точках на отрезке
+# Численные стадии берут значения из общей таблицы utils.sample_table.SampleTable
+Zeros = namedtuple('Zeros', 'values method')
+CriticalPoints = namedtuple('CriticalPoints', 'all inside poles')
+SecondDerivative = namedtuple('SecondDerivative', 'points values')
+
+
 class StandardAnalyzer(BaseAnalyzer):
     """
     Анализатор для обычных функций y = f(x)
+
+    Выражение может содержать параметры (a, b, ...): sympy решает задачу
+    один раз с параметрами-символами, а param_values только подставляются
+    в готовые формулы, поэтому анализ можно повторять при движении слайдера.
+
+    Стадии анализа считаются один раз на анализатор (см. _stage):
+        sympy-выражение (__init__) -> rational -> zeros, critical_points
+        critical_points -> second_derivative
+        table -> численные методы (значения, нули, экстремумы, знак, монотонность)
+        zeros, table -> знакопостоянство
+        critical_points, second_derivative -> экстремумы
+        critical_points -> монотонность, множество значений
+        rational -> полюсы (монотонность), точное множество значений
+
+    Для многочленов и дробно-рациональных функций (стадия rational) нули и
+    критические точки находятся по коэффициентам, без вызова solve.
     """
-    def __init__(self, func, user_expr, x_min, x_max):
+    def __init__(self, func, user_expr, x_min, x_max, param_values=None):
         super().__init__(func, user_expr, x_min, x_max, func_type='standard')
+        self.param_values = dict(param_values or {})
+        self.symbolic = None
+        self.solve_calls = 0
+        # Разделы, для которых символьный расчёт не уложился в бюджет времени
+        # и результат получен численно
+        self.approximate = set()
+        self._stages = {}
         self._parse_sympy_expression()
+        if self.expr_sym is not None:
+            self.symbolic = get_symbolic_analysis(self.compiled)
+
+    # Разделы анализа в порядке вывода: (ключ, заголовок, метод, многострочный)
+    SECTIONS = (
+        ('domain', "Область определения", '_analyze_domain', False),
+        ('range', "Множество значений", '_analyze_range', False),
+        ('zeros', "Нули функции", '_find_zeros', False),
+        ('sign', "Промежутки знакопостоянства", '_analyze_sign', True),
+        ('extrema', "Экстремумы", '_find_extrema', True),
+        ('monotonicity', "Монотонность", '_analyze_monotonicity', True),
+        ('parity', "Чётность", '_analyze_parity', False),
+    )
 
     def analyze(self):
         """
         Полный анализ обычной функции.
         """
-        return {
-            'type': 'standard',
-            'domain': self._analyze_domain(),
-            'range': self._analyze_range(),
-            'zeros': self._find_zeros(),
-            'sign': self._analyze_sign(),
-            'extrema': self._find_extrema(),
-            'monotonicity': self._analyze_monotonicity(),
-            'parity': self._analyze_parity(),
-        }
+        result = {'type': 'standard'}
+        result.update(self.iter_sections())
+        result['approximate'] = sorted(self.approximate)
+        return result
+
+    def iter_sections(self):
+        """
+        Считает разделы анализа по одному и отдаёт пары (ключ, результат),
+        чтобы вызывающий код мог показывать их по мере готовности
+        или прервать анализ между разделами.
+        """
+        solve_before = self.symbolic.solve_calls if self.symbolic else 0
+
+        for key, _, method, _ in self.SECTIONS:
+            value = getattr(self, method)()
+            # Знакопостоянство строится по нулям
+            if key == 'sign' and 'zeros' in self.approximate:
+                self.approximate.add('sign')
+            yield key, value
+
+        if self.symbolic:
+            self.solve_calls += self.symbolic.solve_calls - solve_before
+        # print(f"   Вызовов solve(): {self.solve_calls}, стадий: {len(self._stages)}") # DEBUG
+
+    def _note_timeout(self, section, error):
+        """
+        Помечает раздел как численное приближение, если sympy не уложился в бюджет.
+        """
+        if isinstance(error, BudgetExceeded):
+            self.approximate.add(section)
+
+    def _stage(self, name, *args):
+        """
+        Результат стадии анализа _compute_<name>(*args); считается один раз на анализатор.
+        """
+        key = (name,) + args
+        if key not in self._stages:
+            self._stages[key] = getattr(self, f"_compute_{name}")(*args)
+        return self._stages[key]
+
+    def _compute_table(self):
+        """
+        Общая таблица значений функции на отрезке (кэшируется по выражению,
+        значениям параметров и отрезку).
+        """
+        if self.compiled is not None:
+            key = (self.compiled.source, tuple(sorted(self.param_values.items())))
+        else:
+            key = None
+        return get_sample_table(self.func, self.x_min, self.x_max, key=key)
+
+    def _compute_rational(self):
+        """
+        RationalFunction, если выражение - отношение многочленов от x, иначе None.
+        """
+        if self.symbolic is None:
+            return None
+        try:
+            return self.symbolic.rational(self.param_values)
+        except Exception as e:
+            print(f"⚠️ Не удалось получить коэффициенты многочленов: {e}")
+            return None
+
+    def _compute_zeros(self):
+        zeros = []
+        method = 'analytical'
+        rational = self._stage('rational')
+
+        if rational is not None:
+            zeros = [val for val in rational.zeros().tolist() if self.x_min <= val <= self.x_max]
+            return Zeros(sorted(set(round(z, 4) for z in zeros)), method)
+
+        if self.expr_sym is not None:
+            try:
+                zeros = self.symbolic.roots_in_window(0, self.param_values, self.x_min, self.x_max)
+
+            except Exception as e:
+                print(f"⚠️ Аналитический поиск нулей не удался: {e}")
+                self._note_timeout('zeros', e)
+
+        if not zeros:
+            zeros = self._numerical_zeros()
+            method = 'numerical'
+
+        return Zeros(sorted(set(round(z, 4) for z in zeros)), method)
+
+    def _compute_critical_points(self):
+        rational = self._stage('rational')
+        roots = None
+        poles = []
+        if rational is not None:
+            roots = rational.critical_points().tolist()
+            poles = [p for p in rational.poles().tolist() if self.x_min < p < self.x_max]
+        elif self.symbolic is not None:
+            try:
+                roots = self.symbolic.roots_in_window(1, self.param_values, self.x_min, self.x_max)
+            except Exception as e:
+                print(f"⚠️ Аналитический поиск критических точек не удался: {e}")
+                self._note_timeout('extrema', e)
+                self._note_timeout('monotonicity', e)
+
+        if roots is None:
+            roots, poles = self._numerical_critical_points()
+        inside = [val for val in roots if self.x_min <= val <= self.x_max]
+        return CriticalPoints(roots, inside, poles)
+
+    def _numerical_critical_points(self):
+        """
+        Нули f'(x) по смене знака на сетке таблицы, уточнённые ITP; f' берётся
+        из ядра производных (без sympy - автоматическим дифференцированием).
+        Смена знака через полюс (1/x²) - не критическая точка, как в SampleTable.zeros.
+
+        Returns:
+            (критические точки, полюсы) - списки
+        """
+        xs = self._stage('table').xs
+        slope = self._derivative_values(xs)[1]
+        finite = np.isfinite(slope)
+        # Полюс точно в узле сетки: f' не определена в узле, но определена у соседей
+        isolated = np.flatnonzero(~finite[1:-1] & finite[:-2] & finite[2:]) + 1
+        node_poles = xs[isolated].tolist()
+
+        d1, d2 = slope[:-1], slope[1:]
+        brackets = np.flatnonzero(finite[:-1] & finite[1:] & ((d1 * d2 < 0) | (d1 == 0)))
+        if brackets.size == 0:
+            return [], node_poles
+
+        def derivative(points):
+            return self._derivative_values(points)[1]
+
+        roots = refine_roots(derivative, xs[brackets], xs[brackets + 1], d1[brackets], d2[brackets])
+        with np.errstate(invalid='ignore'):
+            bound = np.maximum(np.abs(d1[brackets]), np.abs(d2[brackets]))
+            pole = ~(np.abs(derivative(roots)) <= bound)
+        poles = sorted(node_poles + roots[np.isfinite(roots) & pole].tolist())
+        return roots[np.isfinite(roots) & ~pole].tolist(), poles
+
+    def _compute_second_derivative(self):
+        points = self._stage('critical_points').inside
+        if not points:
+            return SecondDerivative(points, np.array([]))
+        # Вторая производная во всех критических точках за один вызов ядра
+        return SecondDerivative(points, self._derivative_values(points)[2])
 
     def to_text(self):
         """
         Текстовое представление анализа.
         """
-        a = self.analyze()
+        return "".join(self.iter_text()).rstrip("\n")
 
-        result = f"Анализ функции: f(x) = {self.user_expr}\n\n"
-        result += f"• Область определения: {a['domain']}\n"
-        result += f"• Множество значений: {a['range']}\n"
-        result += f"• Нули функции: {a['zeros']}\n"
-        result += f"• Промежутки знакопостоянства:\n   {a['sign']}\n"
-        result += f"• Экстремумы:\n   {a['extrema']}\n"
-        result += f"• Монотонность:\n   {a['monotonicity']}\n"
-        result += f"• Чётность: {a['parity']}"
-        return result
+    def iter_text(self):
+        """
+        Текст анализа по частям: заголовок, затем по одной строке на раздел.
+        """
+        header = f"Анализ функции: f(x) = {self.user_expr}\n"
+        if self.compiled is not None and self.compiled.parameters:
+            values = ", ".join(f"{p} = {self.param_values[p]}" for p in self.compiled.parameters)
+            header += f"при {values}\n"
+        yield header + "\n"
+
+        for key, value in self.iter_sections():
+            yield self.format_section(key, value)
+
+    def format_section(self, key, value):
+        """
+        Строка отчёта для одного раздела.
+        """
+        title, multiline = next((t, m) for k, t, _, m in self.SECTIONS if k == key)
+        note = " (≈ численно)" if key in self.approximate else ""
+        if multiline:
+            return f"• {title}{note}:\n   {value}\n"
+        return f"• {title}{note}: {value}\n"
 
     def _analyze_domain(self):
         """
@@ -55,7 +256,7 @@ class StandardAnalyzer(BaseAnalyzer):
             return self._fallback_domain()
 
         try:
-            domain = continuous_domain(self.expr_sym, self.x_sym, S.Reals)
+            domain = self.symbolic.domain(self.param_values)
 
             if domain == S.Reals:
                 return "D(f) = R"
@@ -71,6 +272,7 @@ class StandardAnalyzer(BaseAnalyzer):
 
         except Exception as e:
             print(f"⚠️ Ошибка определения области: {e}")
+            self._note_timeout('domain', e)
             return self._fallback_domain()
 
     def _fallback_domain(self):
@@ -99,36 +301,35 @@ class StandardAnalyzer(BaseAnalyzer):
 
     def _analyze_range(self):
         """
-        Анализ множества значений.
+        Анализ множества значений. Численная оценка (два поиска методом
+        ветвей и границ) считается, только если точного ответа нет.
         """
-        numerical_range = self._numerical_range()
         analytical_range = self._analytical_range()
 
         if analytical_range:
             return analytical_range
 
-        return numerical_range
+        return self._numerical_range()
 
     def _numerical_range(self):
         """
-        Численное определение множества значений.
+        Численное определение множества значений на отрезке.
+
+        Если у функции есть интервальная оценка, границы находятся методом
+        ветвей и границ (гарантированно, с узкими пиками и полюсами);
+        иначе - по общей таблице значений.
         """
         try:
-            xs = np.linspace(self.x_min, self.x_max, 2000)
-            ys = []
-
-            for x in xs:
-                try:
-                    y = self.func(x)
-                    if np.isfinite(y):
-                        ys.append(y)
-                except:
-                    continue
+            enclosure = enclose_range(self.func, self.x_min, self.x_max)
+            if enclosure is not None:
+                return self._format_enclosure(enclosure)
+
+            value_range = self._stage('table').value_range()
 
-            if not ys:
+            if value_range is None:
                 return "E(f) = Ø"
 
-            y_min, y_max = min(ys), max(ys)
+            y_min, y_max = value_range
 
             if abs(y_min) > 1e6 or abs(y_max) > 1e6:
                 return "E(f) = (−∞; +∞)"
@@ -142,24 +343,38 @@ class StandardAnalyzer(BaseAnalyzer):
             print(f"⚠️ Ошибка численного анализа области значений: {e}")
             return "E(f) = не определено"
 
+    def _format_enclosure(self, enclosure):
+        """
+        Множество значений по RangeEnclosure: конечная граница - достигнутое
+        значение (не дальше 0.01% от гарантированной), бесконечная - ∞.
+        """
+        lower_infinite = np.isinf(enclosure.lower) and enclosure.lower < 0
+        upper_infinite = np.isinf(enclosure.upper) and enclosure.upper > 0
+
+        if not (lower_infinite or upper_infinite) and not np.isfinite(enclosure.low):
+            return "E(f) = Ø"
+        if lower_infinite and upper_infinite:
+            return "E(f) = (−∞; +∞)"
+
+        left = "(−∞" if lower_infinite else f"[{round(enclosure.low, 2)}"
+        right = "+∞)" if upper_infinite else f"{round(enclosure.high, 2)}]"
+        return f"E(f) ≈ {left}; {right}"
+
     def _analytical_range(self):
         """
-        Аналитическое определение области значений для простых случаев.
+        Аналитическое определение области значений: точно для многочленов
+        и дробно-рациональных функций, по таблице - для sin и cos.
         """
-        expr = self.user_expr.lower()
+        rational = self._stage('rational')
+        if rational is not None:
+            try:
+                value_range = rational.value_range()
+                if value_range is not None:
+                    return f"E(f) = {self._format_value_set(value_range)}"
+            except Exception as e:
+                print(f"⚠️ Не удалось найти множество значений: {e}")
 
-        if re.match(r'^[+-]?\d*\.?\d*\*?x\*\*2\s*[+-]?\s*\d*\.?\d*\*?x?\s*[+-]?\s*\d*\.?\d*$', expr.replace(' ', '')):
-            if self.expr_sym:
-                try:
-                    vertex_x = solve(diff(self.expr_sym, self.x_sym), self.x_sym)
-                    if vertex_x:
-                        vertex_y = float(self.expr_sym.subs(self.x_sym, vertex_x[0]))
-                        if 'x**2' in expr or 'x²' in expr:
-                            return f"E(f) = [{vertex_y:.2f}; +∞)"
-                        else:
-                            return f"E(f) = (−∞; {vertex_y:.2f}]"
-                except:
-                    pass
+        expr = self.user_expr.lower()
 
         if expr in ['sin(x)', 'cos(x)', 'math.sin(x)', 'math.cos(x)']:
             return "E(f) = [-1; 1]"
@@ -170,28 +385,7 @@ class StandardAnalyzer(BaseAnalyzer):
         """
         Поиск нулей функции.
         """
-        zeros = []
-
-        if self.expr_sym is not None:
-            try:
-                solutions = solve(self.expr_sym, self.x_sym)
-
-                for sol in solutions:
-                    if sol.is_real or sol.is_real is None:
-                        try:
-                            val = float(sol.evalf())
-                            if self.x_min <= val <= self.x_max:
-                                zeros.append(val)
-                        except (TypeError, ValueError):
-                            continue
-
-            except Exception as e:
-                print(f"⚠️ Аналитический поиск нулей не удался: {e}")
-
-        if not zeros:
-            zeros = self._numerical_zeros()
-
-        zeros = sorted(list(set([round(z, 4) for z in zeros])))
+        zeros = self._stage('zeros').values
 
         if zeros:
             return ", ".join([f"x = {z}" for z in zeros])
@@ -200,97 +394,43 @@ class StandardAnalyzer(BaseAnalyzer):
 
     def _numerical_zeros(self):
         """
-        Численный поиск нулей методом перебора с уточнением.
-        """
-        zeros = []
-        step = (self.x_max - self.x_min) / 1000
-
-        for i in range(1000):
-            x1 = self.x_min + i * step
-            x2 = x1 + step
-
-            try:
-                y1 = self.func(x1)
-                y2 = self.func(x2)
-
-                if np.isfinite(y1) and np.isfinite(y2):
-                    if y1 * y2 < 0:
-                        zero = self._bisect(x1, x2)
-                        if zero is not None:
-                            zeros.append(zero)
-                    elif abs(y1) < 1e-6:
-                        zeros.append(x1)
-
-            except:
-                continue
-
-        return zeros
-
-    def _bisect(self, a, b, tol=1e-6, max_iter=50):
-        """
-        Метод деления отрезка пополам для уточнения нуля.
+        Численный поиск нулей: отрезки, где нуль возможен, находятся методом
+        ветвей и границ (или по таблице), все смены знака уточняются одновременно.
         """
-        try:
-            for _ in range(max_iter):
-                c = (a + b) / 2
-                fc = self.func(c)
-
-                if abs(fc) < tol or (b - a) / 2 < tol:
-                    return c
-
-                fa = self.func(a)
-                if fa * fc < 0:
-                    b = c
-                else:
-                    a = c
-
-            return (a + b) / 2
-        except:
-            return None
+        table = self._stage('table')
+        interval = getattr(self.func, 'interval', None)
+        if interval is not None:
+            # Части отрезка, где интервальная оценка исключает нуль, не просматриваются
+            zeros = find_roots(lambda xs: evaluate_array(self.func, xs), interval,
+                               self.x_min, self.x_max, table.step)
+            if zeros is not None:
+                return zeros
+        return table.zeros(self.func)
 
     def _analyze_sign(self):
         """
         Анализ знакопостоянства.
         """
         try:
-            zeros_str = self._find_zeros()
-
-            zeros_list = []
-            if zeros_str != "Нулей нет на отрезке":
-                for part in zeros_str.split(','):
-                    try:
-                        z = float(part.split('=')[1].strip())
-                        zeros_list.append(z)
-                    except:
-                        continue
+            zeros_list = self._stage('zeros').values
 
             points = sorted([self.x_min] + zeros_list + [self.x_max])
+            table = self._stage('table')
 
             pos_intervals = []
             neg_intervals = []
 
-            for i in range(len(points) - 1):
-                a = points[i]
-                b = points[i + 1]
-
+            # Знак на каждом промежутке между нулями берётся из таблицы;
+            # промежуток дополнительно делится там, где функция не определена
+            for a, b in zip(points[:-1], points[1:]):
                 if b - a < 1e-9:
                     continue
 
-                mid = (a + b) / 2
-
-                try:
-                    val = self.func(mid)
-
-                    if not np.isfinite(val):
-                        continue
-
-                    if val > 1e-9:
-                        pos_intervals.append((a, b))
-                    elif val < -1e-9:
-                        neg_intervals.append((a, b))
-
-                except:
-                    continue
+                for start, stop, sign in table.sign_runs(a, b):
+                    if sign > 0:
+                        pos_intervals.append((start, stop))
+                    else:
+                        neg_intervals.append((start, stop))
 
             def format_intervals(intervals):
                 if not intervals:
@@ -317,7 +457,7 @@ class StandardAnalyzer(BaseAnalyzer):
         """
         extrema = []
 
-        if self.derivative_sym is not None:
+        if self.compiled is not None:
             extrema = self._analytical_extrema()
 
         if not extrema:
@@ -340,87 +480,56 @@ class StandardAnalyzer(BaseAnalyzer):
         extrema = []
 
         try:
-            critical_points = solve(self.derivative_sym, self.x_sym)
-
-            for cp in critical_points:
-                if cp.is_real or cp.is_real is None:
-                    try:
-                        x_val = float(cp.evalf())
-
-                        if not (self.x_min <= x_val <= self.x_max):
-                            continue
+            second = self._stage('second_derivative')
+            slopes = self._side_slopes(second.points)
 
-                        y_val = self.func(x_val)
+            for x_val, second_val, (left, right) in zip(second.points, second.values.tolist(), slopes):
+                y_val = self.func(x_val)
 
-                        if not np.isfinite(y_val):
-                            continue
-
-                        second_deriv = diff(self.derivative_sym, self.x_sym)
-                        second_val = float(second_deriv.subs(self.x_sym, cp).evalf())
-
-                        if second_val > 0:
-                            extrema.append(('min', x_val, y_val))
-                        elif second_val < 0:
-                            extrema.append(('max', x_val, y_val))
-                        else:
-                            eps = 0.001
-                            y_left = self.func(x_val - eps)
-                            y_right = self.func(x_val + eps)
-
-                            if y_val > y_left and y_val > y_right:
-                                extrema.append(('max', x_val, y_val))
-                            elif y_val < y_left and y_val < y_right:
-                                extrema.append(('min', x_val, y_val))
+                if not np.isfinite(y_val) or not np.isfinite(second_val):
+                    continue
 
-                    except (TypeError, ValueError):
-                        continue
+                if second_val > 0:
+                    extrema.append(('min', x_val, y_val))
+                elif second_val < 0:
+                    extrema.append(('max', x_val, y_val))
+                # f'' = 0 (x^4): экстремум, если f' меняет знак
+                elif left > 0 > right:
+                    extrema.append(('max', x_val, y_val))
+                elif left < 0 < right:
+                    extrema.append(('min', x_val, y_val))
 
         except Exception as e:
             print(f"⚠️ Аналитический поиск экстремумов не удался: {e}")
+            self._note_timeout('extrema', e)
 
         return extrema
 
+    def _side_slopes(self, points):
+        """
+        Знак f'(x) слева и справа от каждой критической точки: в серединах
+        промежутков до соседних критических точек (или концов отрезка),
+        где знак f' постоянен.
+        """
+        if not points:
+            return []
+        edges = [self.x_min] + list(points) + [self.x_max]
+        mids = [(a + b) / 2 for a, b in zip(edges[:-1], edges[1:])]
+        slopes = np.sign(self._derivative_values(mids)[1]).tolist()
+        return list(zip(slopes[:-1], slopes[1:]))
+
     def _numerical_extrema(self):
         """
         Численный поиск экстремумов.
         """
-        extrema = []
-        step = (self.x_max - self.x_min) / 500
-
-        for i in range(1, 499):
-            x0 = self.x_min + (i - 1) * step
-            x1 = self.x_min + i * step
-            x2 = self.x_min + (i + 1) * step
-
-            try:
-                y0 = self.func(x0)
-                y1 = self.func(x1)
-                y2 = self.func(x2)
-
-                if not (np.isfinite(y0) and np.isfinite(y1) and np.isfinite(y2)):
-                    continue
-
-                if y1 > y0 + 1e-9 and y1 > y2 + 1e-9:
-                    extrema.append(('max', x1, y1))
-                elif y1 < y0 - 1e-9 and y1 < y2 - 1e-9:
-                    extrema.append(('min', x1, y1))
-
-            except:
-                continue
-
-        filtered = []
-        for e in extrema:
-            if not any(abs(e[1] - f[1]) < step * 2 for f in filtered):
-                filtered.append(e)
-
-        return filtered
+        return self._stage('table').local_extrema()
 
     def _analyze_monotonicity(self):
         """
         Анализ монотонности функции.
         """
         try:
-            if self.derivative_sym is not None:
+            if self.compiled is not None:
                 return self._analytical_monotonicity()
             else:
                 return self._numerical_monotonicity()
@@ -433,101 +542,38 @@ class StandardAnalyzer(BaseAnalyzer):
         Аналитический анализ монотонности через производную.
         """
         try:
-            critical_points = solve(self.derivative_sym, self.x_sym)
-
-            crit_vals = []
-            for cp in critical_points:
-                if cp.is_real or cp.is_real is None:
-                    try:
-                        val = float(cp.evalf())
-                        if self.x_min <= val <= self.x_max:
-                            crit_vals.append(val)
-                    except:
-                        continue
+            critical = self._stage('critical_points')
+            # Полюсы тоже разделяют участки монотонности (1/x убывает на каждом)
+            crit_vals = critical.inside + critical.poles
 
             points = sorted([self.x_min] + crit_vals + [self.x_max])
+            mids = [(a + b) / 2 for a, b in zip(points[:-1], points[1:])]
+            deriv_vals = self._derivative_values(mids)[1]
 
             increasing = []
             decreasing = []
 
-            for i in range(len(points) - 1):
-                a = points[i]
-                b = points[i + 1]
-                mid = (a + b) / 2
-
-                try:
-                    deriv_val = float(self.derivative_sym.subs(self.x_sym, mid).evalf())
-
-                    if deriv_val > 1e-6:
-                        increasing.append((a, b))
-                    elif deriv_val < -1e-6:
-                        decreasing.append((a, b))
-                except:
+            for a, b, deriv_val in zip(points[:-1], points[1:], deriv_vals.tolist()):
+                if not np.isfinite(deriv_val):
                     continue
 
+                if deriv_val > 1e-6:
+                    increasing.append((a, b))
+                elif deriv_val < -1e-6:
+                    decreasing.append((a, b))
+
             return self._format_monotonicity(increasing, decreasing)
 
         except Exception as e:
             print(f"⚠️ Аналитическая монотонность не удалась: {e}")
+            self._note_timeout('monotonicity', e)
             return self._numerical_monotonicity()
 
     def _numerical_monotonicity(self):
         """
         Численный анализ монотонности.
         """
-        increasing = []
-        decreasing = []
-
-        step = (self.x_max - self.x_min) / 100
-        current_interval = None
-        current_type = None
-
-        for i in range(99):
-            x1 = self.x_min + i * step
-            x2 = x1 + step
-
-            try:
-                y1 = self.func(x1)
-                y2 = self.func(x2)
-
-                if not (np.isfinite(y1) and np.isfinite(y2)):
-                    if current_interval:
-                        if current_type == 'inc':
-                            increasing.append(current_interval)
-                        else:
-                            decreasing.append(current_interval)
-                        current_interval = None
-                    continue
-
-                if y2 > y1 + 1e-6:
-                    interval_type = 'inc'
-                elif y2 < y1 - 1e-6:
-                    interval_type = 'dec'
-                else:
-                    continue
-
-                if current_interval is None:
-                    current_interval = (x1, x2)
-                    current_type = interval_type
-                elif current_type == interval_type:
-                    current_interval = (current_interval[0], x2)
-                else:
-                    if current_type == 'inc':
-                        increasing.append(current_interval)
-                    else:
-                        decreasing.append(current_interval)
-                    current_interval = (x1, x2)
-                    current_type = interval_type
-
-            except:
-                continue
-
-        if current_interval:
-            if current_type == 'inc':
-                increasing.append(current_interval)
-            else:
-                decreasing.append(current_interval)
-
+        increasing, decreasing = self._stage('table').monotonic_runs()
         return self._format_monotonicity(increasing, decreasing)
 
     def _format_monotonicity(self, increasing, decreasing):
@@ -556,42 +602,31 @@ class StandardAnalyzer(BaseAnalyzer):
 
         if self.expr_sym is not None:
             try:
-                expr_minus_x = self.expr_sym.subs(self.x_sym, -self.x_sym)
+                parity = self.symbolic.parity(self.param_values)
 
-                if simplify(expr_minus_x - self.expr_sym) == 0:
+                if parity == 'even':
                     return "чётная"
 
-                if simplify(expr_minus_x + self.expr_sym) == 0:
+                if parity == 'odd':
                     return "нечётная"
 
             except Exception as e:
                 print(f"⚠️ Аналитическая проверка чётности не удалась: {e}")
+                self._note_timeout('parity', e)
 
         test_points = np.linspace(0.1, min(3.0, self.x_max), 10)
-        even = True
-        odd = True
+        inside = (test_points <= self.x_max) & (-test_points >= self.x_min)
+        # Как и при поточечной проверке, останавливаемся на первой точке вне отрезка
+        test_points = test_points[:np.argmin(inside)] if not inside.all() else test_points
 
-        for x in test_points:
-            if x > self.x_max or -x < self.x_min:
-                break
-
-            try:
-                fx = self.func(x)
-                fmx = self.func(-x)
+        fx = evaluate_array(self.func, test_points)
+        fmx = evaluate_array(self.func, -test_points)
 
-                if not (np.isfinite(fx) and np.isfinite(fmx)):
-                    even = odd = False
-                    break
-
-                if abs(fx - fmx) > 1e-4:
-                    even = False
-
-                if abs(fx + fmx) > 1e-4:
-                    odd = False
-
-            except:
-                even = odd = False
-                break
+        if not (np.isfinite(fx).all() and np.isfinite(fmx).all()):
+            even = odd = False
+        else:
+            even = bool(np.all(np.abs(fx - fmx) <= 1e-4))
+            odd = bool(np.all(np.abs(fx + fmx) <= 1e-4))
 
         if even:
             return "чётная"
@@ -600,6 +635,31 @@ class StandardAnalyzer(BaseAnalyzer):
         else:
             return "общего вида"
 
+    def _format_value_set(self, value_set):
+        """
+        Форматирование множества значений с числовыми границами.
+        """
+        if value_set == S.Reals:
+            return "R"
+        if value_set.is_FiniteSet:
+            return "{" + "; ".join(self._format_bound(v) for v in value_set.args) + "}"
+
+        parts = value_set.args if value_set.is_Union else [value_set]
+        formatted = []
+        for iv in parts:
+            lbracket = '(' if iv.left_open or iv.start.is_infinite else '['
+            rbracket = ')' if iv.right_open or iv.end.is_infinite else ']'
+            formatted.append(f"{lbracket}{self._format_bound(iv.start)}; {self._format_bound(iv.end)}{rbracket}")
+        return " U ".join(formatted)
+
+    def _format_bound(self, value):
+        if value == S.Infinity:
+            return "+∞"
+        if value == S.NegativeInfinity:
+            return "−∞"
+        text = f"{float(value):.2f}"
+        return "0.00" if text == "-0.00" else text
+
     def _format_interval(self, iv):
         """
         Форматирование интервала для вывода.
@@ -0,0 +1,380 @@
+"""
+Символьный анализ выражения, выполняемый один раз.
+
+solveset, solve и continuous_domain вызываются для выражения, в котором
+параметры (a, b, ...) остаются символами sympy. Найденные корни и условия
+чётности сохраняются в замкнутой форме и при каждом новом значении
+слайдеров только вычисляются численно. Производные вычисляются общим
+ядром BaseAnalyzer (см. base_analyzer.derivative_kernel).
+
+Для многочленов и дробно-рациональных функций solve не нужен: корни
+берутся из коэффициентов (см. rational_function).
+
+Каждый вызов solve, continuous_domain и simplify ограничен по времени
+(utils.time_budget); при превышении бюджета выбрасывается BudgetExceeded,
+и анализатор переходит к численному методу.
+"""
+import math
+import threading
+import weakref
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import sympy as sp
+from sympy import S, simplify, solve, solveset
+from sympy.calculus.util import continuous_domain
+from utils.time_budget import BudgetExceeded, run_with_budget
+from .rational_function import RationalFunction, rational_form
+
+
+# Часть общего решения solveset: точка offset (period is None) или семейство
+# offset + n·period, n ∈ Z; condition - условие на параметры, при котором часть
+# входит в решение; *_func - численные функции параметров; excluded - точки,
+# выколотые из части (Complement), как пары (значение, численная функция)
+SolutionPart = namedtuple('SolutionPart', 'condition offset period offset_func period_func excluded')
+
+
+class PeriodicSolutionError(ValueError):
+    """
+    solveset нашёл периодическое множество решений, которое не удалось
+    разложить на семейства: главные корни solve здесь неполны, нужен
+    численный поиск.
+    """
+
+
+class _PendingResult:
+    """
+    Результат _memo, который сейчас вычисляет другой поток.
+    """
+    def __init__(self):
+        self.finished = threading.Event()
+        self.result = None
+
+
+class SymbolicAnalysis:
+    """
+    Результаты sympy для одного CompiledExpression.
+    Каждый результат (в том числе ошибка, кроме превышения бюджета)
+    сохраняется после первого вычисления.
+    """
+    # Сколько областей определения хранить для разных значений параметров,
+    # если sympy не смог найти область с параметрами-символами
+    DOMAIN_CACHE_SIZE = 64
+
+    # Не больше стольких корней одного периодического семейства на отрезке
+    MAX_PERIODIC_ROOTS = 10000
+
+    def __init__(self, compiled):
+        self.compiled = compiled
+        self.x_sym = compiled.symbol
+        self.param_symbols = tuple(sp.Symbol(p) for p in compiled.parameters)
+        self._results = {}
+        self._domains = OrderedDict()
+        # Сколько раз для этого выражения действительно вызывался solve()
+        self.solve_calls = 0
+        self._lock = threading.RLock()
+        self._computing = {}
+        self._calls = {}
+
+    def _memo(self, key, compute):
+        """
+        Возвращает сохранённый результат; ошибка тоже сохраняется и выбрасывается повторно.
+
+        BudgetExceeded не сохраняется: медленный запуск (например, пока
+        устройство было занято) не должен навсегда лишать выражение
+        аналитического ответа. Незаконченные вызовы sympy остаются в
+        self._calls (см. utils.time_budget): повторный анализ не запускает
+        их заново, а забирает результат, когда он будет готов.
+
+        Вычисление идёт без блокировки, чтобы долгий solve не задерживал
+        остальные обращения; другие потоки, запросившие тот же ключ, ждут
+        его и получают тот же результат (в том числе BudgetExceeded).
+        """
+        with self._lock:
+            result = self._results.get(key)
+            pending = None if result is not None else self._computing.get(key)
+            owner = result is None and pending is None
+            if owner:
+                pending = self._computing[key] = _PendingResult()
+
+        if owner:
+            try:
+                result = (True, compute())
+            except Exception as e:
+                result = (False, e)
+            with self._lock:
+                if not isinstance(result[1], BudgetExceeded):
+                    self._results[key] = result
+                del self._computing[key]
+            pending.result = result
+            pending.finished.set()
+        elif result is None:
+            pending.finished.wait()
+            result = pending.result
+
+        ok, value = result
+        if not ok:
+            raise value
+        return value
+
+    def _solve(self, func, *args):
+        """
+        run_with_budget для solve/solveset; solve_calls не растёт, если такой
+        вызов ещё идёт с прошлого анализа и лишь снова ожидается.
+        """
+        if (func, args) not in self._calls:
+            self.solve_calls += 1
+        return run_with_budget(func, *args, calls=self._calls)
+
+    def _param_args(self, values):
+        return tuple(float(values[p]) for p in self.compiled.parameters)
+
+    def _substitutions(self, values):
+        # Значения слайдеров кратны 0.5, поэтому подставляются точными рациональными числами
+        return {sym: sp.nsimplify(v) for sym, v in zip(self.param_symbols, self._param_args(values))}
+
+    def _roots(self, order):
+        """
+        Корни производной порядка order (0 - самой функции) с параметрами-символами.
+        Каждый корень сохраняется вместе с численной функцией параметров.
+        """
+        def compute():
+            expr = self.compiled.sympy_expr if order == 0 else self.compiled.derivative(order)
+            roots = []
+            for sol in self._solve(solve, expr, self.x_sym):
+                if sol.is_real is False:
+                    continue
+                roots.append((sol, sp.lambdify(self.param_symbols, sol, 'numpy')))
+            return roots
+
+        return self._memo(('roots', order), compute)
+
+    def _real_value(self, sol, sol_func, args, values):
+        """
+        Вещественное значение решения sol при параметрах args или None.
+        """
+        try:
+            with np.errstate(all='ignore'):
+                value = complex(sol_func(*args))
+        except Exception:
+            # Функции, которых нет в numpy (например, LambertW)
+            try:
+                value = complex(sol.subs(self._substitutions(values)).evalf())
+            except (TypeError, ValueError):
+                return None
+
+        if not (np.isfinite(value.real) and np.isfinite(value.imag)):
+            return None
+        if abs(value.imag) > 1e-9 * (1 + abs(value.real)):
+            return None
+        return value.real
+
+    def real_roots(self, order, values):
+        """
+        Вещественные корни функции (order=0) или её производной при заданных параметрах.
+        Порядок - как у solve; корни вне отрезка анализа не отбрасываются.
+        """
+        args = tuple(np.complex128(v) for v in self._param_args(values))
+        result = []
+        for sol, sol_func in self._roots(order):
+            value = self._real_value(sol, sol_func, args, values)
+            if value is not None:
+                result.append(value)
+        return result
+
+    def _general_solution(self, order):
+        """
+        Общее решение f^(order)(x) = 0 на R (solveset, параметры - символы)
+        в виде списка SolutionPart. Не зависит от отрезка анализа.
+
+        Raises:
+            ValueError: если решение не сводится к точкам и семействам
+                        n·T + c (например, ConditionSet по x)
+        """
+        def compute():
+            expr = self.compiled.sympy_expr if order == 0 else self.compiled.derivative(order)
+            solutions = self._solve(solveset, expr, self.x_sym, S.Reals)
+            return self._solution_parts(solutions, S.true)
+
+        return self._memo(('general_solution', order), compute)
+
+    def _solution_parts(self, solutions, condition):
+        if solutions is S.EmptySet:
+            return []
+
+        if isinstance(solutions, sp.Union):
+            return [part for arg in solutions.args for part in self._solution_parts(arg, condition)]
+
+        if isinstance(solutions, sp.Intersection) and S.Reals in solutions.args:
+            # Intersection({±sqrt(a)}, Reals): комплексные корни отбрасываются при вычислении
+            rest = [arg for arg in solutions.args if arg != S.Reals]
+            if len(rest) == 1:
+                return self._solution_parts(rest[0], condition)
+
+        if isinstance(solutions, sp.ConditionSet) and self.x_sym not in solutions.condition.free_symbols:
+            return self._solution_parts(solutions.base_set, condition & solutions.condition)
+
+        if isinstance(solutions, sp.Complement) and isinstance(solutions.args[1], sp.FiniteSet):
+            # Complement(2nπ, {0}) у sin(x)/x: точки вычитаемого выкалываются из частей
+            excluded = tuple((point, sp.lambdify(self.param_symbols, point, 'numpy'))
+                             for point in solutions.args[1].args)
+            return [part._replace(excluded=part.excluded + excluded)
+                    for part in self._solution_parts(solutions.args[0], condition)]
+
+        if isinstance(solutions, sp.FiniteSet):
+            return [SolutionPart(condition, sol, None, sp.lambdify(self.param_symbols, sol, 'numpy'), None, ())
+                    for sol in solutions.args if sol.is_real is not False]
+
+        if (isinstance(solutions, sp.ImageSet) and solutions.base_sets == (S.Integers,)
+                and len(solutions.lamda.variables) == 1):
+            n = solutions.lamda.variables[0]
+            body = solutions.lamda.expr
+            period = sp.diff(body, n)
+            if period.free_symbols.isdisjoint({n}) and period != 0:
+                offset = body.subs(n, 0)
+                return [SolutionPart(condition, offset, period,
+                                     sp.lambdify(self.param_symbols, offset, 'numpy'),
+                                     sp.lambdify(self.param_symbols, period, 'numpy'), ())]
+
+        if solutions.has(sp.ImageSet):
+            raise PeriodicSolutionError(f"Неподдерживаемое периодическое множество решений: "
+                                        f"{type(solutions).__name__}")
+        raise ValueError(f"Неподдерживаемое множество решений: {type(solutions).__name__}")
+
+    def roots_in_window(self, order, values, x_min, x_max):
+        """
+        Все вещественные корни функции (order=0) или её производной
+        на [x_min, x_max] по возрастанию.
+
+        Общее решение находится один раз (solveset на R); периодические
+        семейства n·T + c перебираются по всем n, попадающим в отрезок,
+        поэтому для sin(x) на [-100; 100] находятся все 64 нуля. Если solveset
+        вернул множество другого вида, используется solve (см. real_roots);
+        если это множество периодическое (PeriodicSolutionError), главных
+        корней solve мало и ошибка передаётся вызывающему для численного поиска.
+        """
+        try:
+            parts = self._general_solution(order)
+        except (BudgetExceeded, PeriodicSolutionError):
+            raise
+        except Exception:
+            return sorted(v for v in self.real_roots(order, values) if x_min <= v <= x_max)
+
+        args = tuple(np.complex128(v) for v in self._param_args(values))
+        substitutions = self._substitutions(values) if self.param_symbols else {}
+        roots = []
+
+        for part in parts:
+            if part.condition is not S.true and part.condition.subs(substitutions) is not S.true:
+                continue
+
+            offset = self._real_value(part.offset, part.offset_func, args, values)
+            if offset is None:
+                continue
+            excluded = [self._real_value(point, point_func, args, values)
+                        for point, point_func in part.excluded]
+            excluded = [v for v in excluded if v is not None]
+
+            if part.period is None:
+                if not any(abs(offset - v) <= 1e-9 * (1 + abs(v)) for v in excluded):
+                    roots.append(offset)
+                continue
+
+            period = self._real_value(part.period, part.period_func, args, values)
+            if not period:
+                continue
+            period = abs(period)
+            n_min = math.ceil((x_min - offset) / period)
+            n_max = math.floor((x_max - offset) / period)
+            if n_max - n_min + 1 > self.MAX_PERIODIC_ROOTS:
+                raise ValueError("Слишком много корней на отрезке")
+            family = offset + np.arange(n_min, n_max + 1) * period
+            for v in excluded:
+                family = family[np.abs(family - v) > 1e-9 * (1 + abs(v))]
+            roots.extend(family.tolist())
+
+        roots = sorted(v for v in roots if x_min <= v <= x_max)
+        # Семейства могут пересекаться (nπ и 2nπ): совпадающие корни оставляем один раз
+        unique = []
+        for v in roots:
+            if not unique or v - unique[-1] > 1e-9 * (1 + abs(v)):
+                unique.append(v)
+        return unique
+
+    def rational(self, values):
+        """
+        RationalFunction при заданных параметрах или None, если выражение
+        не отношение многочленов от x. Коэффициенты извлекаются один раз.
+        """
+        form = self._memo('rational', lambda: rational_form(
+            self.compiled.sympy_expr, self.x_sym, self.param_symbols))
+        if form is None:
+            return None
+        return RationalFunction.from_form(form, self._param_args(values))
+
+    def domain(self, values):
+        """
+        Область определения при заданных параметрах (множество sympy).
+        Сначала ищется один раз с параметрами-символами; если sympy не справился,
+        ищется для конкретных значений и запоминается для них.
+        """
+        try:
+            domain = self._memo('domain', lambda: run_with_budget(
+                continuous_domain, self.compiled.sympy_expr, self.x_sym, S.Reals, calls=self._calls))
+            if self.param_symbols:
+                domain = domain.subs(self._substitutions(values))
+            return domain
+        except Exception:
+            if not self.param_symbols:
+                raise
+
+        key = self._param_args(values)
+        with self._lock:
+            if key in self._domains:
+                self._domains.move_to_end(key)
+                return self._domains[key]
+
+        expr = self.compiled.sympy_expr.subs(self._substitutions(values))
+        domain = run_with_budget(continuous_domain, expr, self.x_sym, S.Reals, calls=self._calls)
+
+        with self._lock:
+            self._domains[key] = domain
+            if len(self._domains) > self.DOMAIN_CACHE_SIZE:
+                self._domains.popitem(last=False)
+        return domain
+
+    def parity(self, values):
+        """
+        'even', 'odd' или None. Разности f(-x) ∓ f(x) упрощаются один раз,
+        при конкретных параметрах в них только подставляются числа.
+        """
+        def compute():
+            expr = self.compiled.sympy_expr
+            expr_minus_x = expr.subs(self.x_sym, -self.x_sym)
+            return (run_with_budget(simplify, expr_minus_x - expr, calls=self._calls),
+                    run_with_budget(simplify, expr_minus_x + expr, calls=self._calls))
+
+        even_residual, odd_residual = self._memo('parity', compute)
+        substitutions = self._substitutions(values)
+
+        if even_residual.subs(substitutions) == 0:
+            return 'even'
+        if odd_residual.subs(substitutions) == 0:
+            return 'odd'
+        return None
+
+
+_analyses = weakref.WeakKeyDictionary()
+_analyses_lock = threading.Lock()
+
+
+def get_symbolic_analysis(compiled):
+    """
+    SymbolicAnalysis для записи кэша выражений; живёт, пока жива сама запись.
+    """
+    with _analyses_lock:
+        analysis = _analyses.get(compiled)
+        if analysis is None:
+            analysis = SymbolicAnalysis(compiled)
+            _analyses[compiled] = analysis
+        return analysis
@@ -3,6 +3,7 @@
 """
 import numpy as np
 import re
+from utils.sample_table import get_sample_table
 from sympy import solve, diff, symbols, N
 
 
@@ -42,54 +43,9 @@ def find_zeros(func, expr_sym, user_expr, x_min, x_max):
 
 def _numerical_zeros(func, x_min, x_max):
     """
-    Численный поиск нулей методом перебора с уточнением.
+    Численный поиск нулей: все смены знака на сетке уточняются одновременно.
     """
-    zeros = []
-    step = (x_max - x_min) / 1000
-
-    for i in range(1000):
-        x1 = x_min + i * step
-        x2 = x1 + step
-
-        try:
-            y1 = func(x1)
-            y2 = func(x2)
-
-            if np.isfinite(y1) and np.isfinite(y2):
-                if y1 * y2 < 0:
-                    zero = _bisect(func, x1, x2)
-                    if zero is not None:
-                        zeros.append(zero)
-                elif abs(y1) < 1e-6:
-                    zeros.append(x1)
-
-        except:
-            continue
-
-    return zeros
-
-
-def _bisect(func, a, b, tol=1e-6, max_iter=50):
-    """
-    Метод деления отрезка пополам для уточнения нуля.
-    """
-    try:
-        for _ in range(max_iter):
-            c = (a + b) / 2
-            fc = func(c)
-
-            if abs(fc) < tol or (b - a) / 2 < tol:
-                return c
-
-            fa = func(a)
-            if fa * fc < 0:
-                b = c
-            else:
-                a = c
-
-        return (a + b) / 2
-    except:
-        return None
+    return get_sample_table(func, x_min, x_max).zeros(func)
 
 
 def find_extrema(func, derivative_sym, x_min, x_max):
@@ -169,33 +125,4 @@ def _numerical_extrema(func, x_min, x_max):
     """
     Численный поиск экстремумов.
     """
-    extrema = []
-    step = (x_max - x_min) / 500
-
-    for i in range(1, 499):
-        x0 = x_min + (i - 1) * step
-        x1 = x_min + i * step
-        x2 = x_min + (i + 1) * step
-
-        try:
-            y0 = func(x0)
-            y1 = func(x1)
-            y2 = func(x2)
-
-            if not (np.isfinite(y0) and np.isfinite(y1) and np.isfinite(y2)):
-                continue
-
-            if y1 > y0 + 1e-9 and y1 > y2 + 1e-9:
-                extrema.append(('max', x1, y1))
-            elif y1 < y0 - 1e-9 and y1 < y2 - 1e-9:
-                extrema.append(('min', x1, y1))
-
-        except:
-            continue
-
-    filtered = []
-    for e in extrema:
-        if not any(abs(e[1] - f[1]) < step * 2 for f in filtered):
-            filtered.append(e)
-
-    return filtered
\ No newline at end of file
+    return get_sample_table(func, x_min, x_max).local_extrema()
@@ -0,0 +1,106 @@
+"""
+Бенчмарк стоимости одного вычисления функции, построенной парсером.
+
+Сравнивает прежнюю схему (eval строки и новый контекст на каждый вызов)
+со скомпилированной один раз функцией и с её векторизованным ядром
+на примерах из интерфейса.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_parser.py
+"""
+import math
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsers.function_parser import FunctionParser  # noqa: E402
+
+
+# Примеры функций из карточки «Примеры функций» (ui/layout.py) и код,
+# который для них порождал прежний регулярный препроцессор
+EXAMPLES = [
+    ("x**2", "x**2"),
+    ("sin(x)", "math.sin(x)"),
+    ("cos(x)", "math.cos(x)"),
+    ("tan(x)", "math.tan(x)"),
+    ("2*x+1", "2*x+1"),
+    ("sqrt(x)", "math.sqrt(x)"),
+    ("1/x", "1/x"),
+    ("exp(x)", "math.exp(x)"),
+]
+
+SAMPLES = 1000
+REPEAT = 5
+
+
+def legacy_safe_function(expr, var_name='x'):
+    """
+    Прежняя реализация BaseParser._create_safe_function: eval на каждый вызов.
+    """
+    def func(*args):
+        try:
+            var_val = args[0]
+            context = {
+                'math': math,
+                'pi': math.pi,
+                'e': math.e,
+                var_name: var_val,
+            }
+            result = eval(expr, {"__builtins__": {}}, context)
+
+            if isinstance(result, (int, float)):
+                return float(result)
+            else:
+                return float('nan')
+
+        except ZeroDivisionError:
+            return float('inf')
+        except (ValueError, TypeError, NameError, SyntaxError, AttributeError):
+            return float('nan')
+
+    return func
+
+
+def per_sample_cost(func, xs):
+    """
+    Минимальное по REPEAT прогонам время одного вызова, в микросекундах.
+    """
+    def run():
+        for x in xs:
+            func(x)
+
+    best = min(timeit.repeat(run, number=1, repeat=REPEAT))
+    return best / len(xs) * 1e6
+
+
+def per_sample_cost_array(func, xs):
+    """
+    То же для векторизованного ядра: один вызов на весь массив точек.
+    """
+    values = np.asarray(xs)
+    best = min(timeit.repeat(lambda: func.vectorized(values), number=1, repeat=REPEAT))
+    return best / len(xs) * 1e6
+
+
+def main():
+    xs = [-5 + 10 * i / SAMPLES for i in range(SAMPLES + 1)]
+
+    print(f"{'выражение':<10} {'eval, мкс':>10} {'compiled, мкс':>14} {'ускорение':>10} "
+          f"{'numpy, мкс':>11} {'ускорение':>10}")
+    for expr, legacy_source in EXAMPLES:
+        legacy = legacy_safe_function(legacy_source)
+        compiled = FunctionParser.parse(expr)
+
+        legacy_cost = per_sample_cost(legacy, xs)
+        compiled_cost = per_sample_cost(compiled, xs)
+        array_cost = per_sample_cost_array(compiled, xs)
+        print(f"{expr:<10} {legacy_cost:>10.3f} {compiled_cost:>14.3f} {legacy_cost / compiled_cost:>9.1f}x "
+              f"{array_cost:>11.4f} {legacy_cost / array_cost:>9.0f}x")
+
+
+if __name__ == '__main__':
+    main()
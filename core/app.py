@@ -2,7 +2,8 @@
 Основной класс приложения GraphBuilder
 """
 import os
-import re
+import threading
+from functools import partial
 from kivy.config import Config
 from kivy.clock import Clock
 from kivymd.app import MDApp
@@ -12,6 +13,7 @@ from kivymd.uix.card import MDCard
 from kivy.metrics import dp
 from parsers.function_parser import FunctionParser
 from parsers.parametric_parser import ParametricParser
+from parsers.expression_cache import get_compiled
 from ui.layout import build_ui
 from ui.widgets.graph_widget import GraphWidget
 from analyzers.standard_analyzer import StandardAnalyzer
@@ -40,6 +42,22 @@ class GraphFunctionApp(MDApp):
         self.y_min_input = None
         self.y_max_input = None
         self._current_params = []
+        # Скомпилированные выражения построенных функций f(x), g(x);
+        # движение слайдера меняет только значения их параметров
+        self._plotted_exprs = []
+        # Пересечения при движении слайдера пересчитываются не чаще раза в 0.15 с
+        self._intersections_trigger = Clock.create_trigger(self._update_intersections, 0.15)
+        # Открытая карточка анализа обновляется вслед за слайдерами
+        self._analysis_trigger = Clock.create_trigger(self._update_analysis, 0.15)
+        # Номер текущего фонового анализа; запуски с другим номером отменены
+        self._analysis_job = 0
+        self._analysis_parts = []
+        self._analysis_running = False
+        # Один поток анализа на всё время работы и ячейка на один запрос:
+        # пока идёт анализ, новые запросы заменяют друг друга
+        self._analysis_request = None
+        self._analysis_wakeup = threading.Condition()
+        self._analysis_thread = None
 
     def build(self):
         """
@@ -52,6 +70,9 @@ class GraphFunctionApp(MDApp):
         # Построение UI
         layout = build_ui(self)
 
+        # Правка функции отменяет идущий анализ
+        self.func_input1.bind(text=self._cancel_analysis)
+
         # Сброс после загрузки
         Clock.schedule_once(lambda dt: self.reset_function(), 0.5)
 
@@ -148,8 +169,8 @@ class GraphFunctionApp(MDApp):
 
         # Проверяем, есть ли параметры (a, b, c) в выражениях
         params = set()
-        params.update(self.extract_parameters(x_expr))
-        params.update(self.extract_parameters(y_expr))
+        params.update(self.extract_parameters(x_expr, 't'))
+        params.update(self.extract_parameters(y_expr, 't'))
 
         if params:
             print(f"   ⚠️ Найдены параметры: {params}")
@@ -168,7 +189,6 @@ class GraphFunctionApp(MDApp):
         # Устанавливаем параметрическую функцию
         self.graph.set_parametric(x_func, y_func, t_min, t_max)
         self.graph.set_ranges(x_min, x_max, y_min, y_max)
-        self.graph.draw()
 
         print(f"   ✅ График построен")
 
@@ -208,7 +228,8 @@ class GraphFunctionApp(MDApp):
             self.content_layout.remove_widget(self.param_card)
             delattr(self, 'param_card')
             # Также удаляем сами слайдеры и метки, если они были
-            attrs_to_remove = [attr for attr in dir(self) if attr.endswith('_slider') or attr.endswith('_label')]
+            attrs_to_remove = [attr for attr in dir(self)
+                              if (attr.endswith('_slider') or attr.endswith('_label')) and attr != 'analysis_label']
             for attr in attrs_to_remove:
                 if hasattr(self, attr):
                     delattr(self, attr)
@@ -236,6 +257,8 @@ class GraphFunctionApp(MDApp):
     def _rebuild_graph_with_current_params(self):
         """
         Перестраивает график с текущими параметрами из ОБЕИХ функций.
+        Выражения разбираются и компилируются один раз (через кэш),
+        параметры передаются в ядро как аргументы.
         """
         expr1 = self.func_input1.text.strip()
         expr2 = self.func_input2.text.strip()
@@ -243,29 +266,8 @@ class GraphFunctionApp(MDApp):
         if not expr1 and not expr2:
             return
 
-        # Собираем все параметры
-        all_params = set()
-        if expr1:
-            all_params.update(self.extract_parameters(expr1))
-        if expr2:
-            all_params.update(self.extract_parameters(expr2))
-
-        # Подставляем значения параметров
-        final_funcs = []
-        for expr in [expr1, expr2]:
-            if not expr:
-                continue
-            expr_with_values = expr
-            for p in all_params:
-                if hasattr(self, f"{p}_slider"):
-                    val = getattr(self, f"{p}_slider").value
-                    val_rounded = round(val * 2) / 2
-                    expr_with_values = re.sub(rf'\b{p}\b', str(val_rounded), expr_with_values)
-            parser = FunctionParser()
-            final_funcs.append(parser.parse(expr_with_values))
-
-        if not final_funcs:
-            return
+        self._plotted_exprs = [get_compiled(expr, 'x') for expr in [expr1, expr2] if expr]
+        final_funcs = self._bind_current_params()
 
         # Получаем ВИДИМУЮ ОБЛАСТЬ из полей ввода
         x_min = float(self.x_min_input.text)
@@ -278,13 +280,49 @@ class GraphFunctionApp(MDApp):
         self.graph.set_functions(final_funcs)
         self.graph.set_ranges(x_min, x_max, y_min, y_max)
 
-        # Пересечения
+        self._update_intersections()
+        # print(f"   Кэш выражений: {cache_info()}") # DEBUG
+
+    def _current_param_values(self):
+        """
+        Текущие значения параметров со слайдеров (с шагом 0.5).
+        """
+        values = {}
+        for p in self._current_params if hasattr(self, '_current_params') else []:
+            if hasattr(self, f"{p}_slider"):
+                values[p] = round(getattr(self, f"{p}_slider").value * 2) / 2
+        return values
+
+    def _bind_current_params(self):
+        """
+        Функции построенных выражений с текущими значениями параметров.
+        """
+        values = self._current_param_values()
+        return [compiled.bind(values) for compiled in self._plotted_exprs]
+
+    def _apply_param_values(self):
+        """
+        Перерисовка после движения слайдера: без разбора и компиляции,
+        только новые аргументы ядра и одна выборка точек.
+        """
+        if not self._plotted_exprs or self.graph.is_parametric:
+            return
+
+        self.graph.set_functions(self._bind_current_params())
+        if len(self._plotted_exprs) == 2:
+            self._intersections_trigger()
+        if hasattr(self, 'analysis_card') and self.analysis_card in self.content_layout.children:
+            self._analysis_trigger()
+
+    def _update_intersections(self, *args):
+        """
+        Пересчитывает точки пересечения текущих функций и перерисовывает график.
+        """
+        funcs = self.graph.functions
         intersections = []
-        if len(final_funcs) == 2:
-            intersections = find_intersections(final_funcs[0], final_funcs[1], x_min, x_max)
+        if len(funcs) == 2 and not self.graph.is_parametric:
+            intersections = find_intersections(funcs[0], funcs[1], self.graph.x_min, self.graph.x_max)
         self.graph.intersection_points = intersections
-
-        self.graph.draw()
         self._show_intersection_card(intersections)
 
     def reset_function(self, *args):
@@ -325,12 +363,15 @@ class GraphFunctionApp(MDApp):
             self.content_layout.remove_widget(self.t_range_card)
 
         # Удаляем все слайдеры и метки
-        attrs_to_remove = [attr for attr in dir(self) if attr.endswith('_slider') or attr.endswith('_label')]
+        attrs_to_remove = [attr for attr in dir(self)
+                          if (attr.endswith('_slider') or attr.endswith('_label')) and attr != 'analysis_label']
         for attr in attrs_to_remove:
             delattr(self, attr)
 
         if hasattr(self, '_current_params'):
             delattr(self, '_current_params')
+        self._plotted_exprs = []
+        self._cancel_analysis()
 
         print("   ✅ Сброс выполнен")
 
@@ -343,15 +384,6 @@ class GraphFunctionApp(MDApp):
             if not expr:
                 return
 
-            x_min = float(self.x_min_input.text)
-            x_max = float(self.x_max_input.text)
-
-            parser = FunctionParser()
-            func = parser.parse(expr)
-
-            analyzer = StandardAnalyzer(func, expr, x_min, x_max)
-            analysis_text = analyzer.to_text()
-
             if hasattr(self, 'analysis_card'):
                 self.content_layout.remove_widget(self.analysis_card)
 
@@ -363,8 +395,8 @@ class GraphFunctionApp(MDApp):
                 elevation=2,
                 radius=[10]
             )
-            label = MDLabel(
-                text=analysis_text,
+            self.analysis_label = MDLabel(
+                text="",
                 halign="left",
                 valign="top",
                 font_size="14sp",
@@ -372,13 +404,143 @@ class GraphFunctionApp(MDApp):
                 size_hint_y=None,
                 height=dp(310)
             )
-            self.analysis_card.add_widget(label)
+            self.analysis_card.add_widget(self.analysis_label)
             self.content_layout.add_widget(self.analysis_card)
 
+            self._start_analysis(expr)
+
+        except Exception as e:
+            print(f"Ошибка анализа: {e}")
+            import traceback
+            traceback.print_exc()
+
+    def _start_analysis(self, expr, progressive=True):
+        """
+        Запускает анализ функции с текущими значениями параметров в фоновом
+        потоке (_analysis_loop). Предыдущий запуск отменяется. При progressive=True разделы появляются
+        в карточке по мере готовности, иначе текст заменяется целиком в конце.
+        """
+        self._analysis_job += 1
+        job = self._analysis_job
+
+        try:
+            x_min = float(self.x_min_input.text)
+            x_max = float(self.x_max_input.text)
+
+            # Слайдеров ещё нет (анализ до построения графика): параметры
+            # получают начальное значение слайдера
+            param_values = {p: 1.0 for p in self.extract_parameters(expr)}
+            param_values.update(self._current_param_values())
+            func = FunctionParser.parse(expr, param_values)
+        except Exception as e:
+            print(f"Ошибка анализа: {e}")
+            self._analysis_running = False
+            self._show_analysis_text(job, f"Ошибка анализа: {e}")
+            return
+
+        self._analysis_parts = []
+        self._analysis_running = True
+        if progressive:
+            self.analysis_label.text = "⏳ Анализ..."
+
+        with self._analysis_wakeup:
+            self._analysis_request = (job, func, expr, x_min, x_max, param_values, progressive)
+            self._analysis_wakeup.notify()
+        if self._analysis_thread is None:
+            self._analysis_thread = threading.Thread(target=self._analysis_loop, daemon=True)
+            self._analysis_thread.start()
+
+    def _analysis_loop(self):
+        """
+        Поток анализа: выполняет только последний запрос. Запросы, пришедшие
+        во время анализа (движение слайдера), заменяют друг друга в ячейке,
+        а идущий анализ прерывается на границе раздела и не копится.
+        """
+        while True:
+            with self._analysis_wakeup:
+                while self._analysis_request is None:
+                    self._analysis_wakeup.wait()
+                request = self._analysis_request
+                self._analysis_request = None
+            # Запрос мог быть отменён, пока ждал в ячейке
+            if request[0] == self._analysis_job:
+                self._analysis_worker(*request)
+
+    def _analysis_worker(self, job, func, expr, x_min, x_max, param_values, progressive):
+        """
+        Анализ одного запроса в потоке _analysis_loop: каждый готовый раздел
+        передаётся в главный поток через Clock.schedule_once. Отмена
+        проверяется между разделами.
+        """
+        try:
+            analyzer = StandardAnalyzer(func, expr, x_min, x_max, param_values)
+            parts = []
+            for part in analyzer.iter_text():
+                if job != self._analysis_job:
+                    # print("   Анализ отменён") # DEBUG
+                    return
+                parts.append(part)
+                if progressive:
+                    Clock.schedule_once(partial(self._show_analysis_part, job, part, False))
+
+            if progressive:
+                Clock.schedule_once(partial(self._show_analysis_part, job, "", True))
+            else:
+                Clock.schedule_once(partial(self._show_analysis_text, job, "".join(parts)))
+            # print(f"   Кэш выражений: {cache_info()}") # DEBUG
+
         except Exception as e:
             print(f"Ошибка анализа: {e}")
             import traceback
             traceback.print_exc()
+            Clock.schedule_once(partial(self._show_analysis_text, job, f"Ошибка анализа: {e}"))
+
+    def _show_analysis_part(self, job, part, finished, *args):
+        """
+        Добавляет готовый раздел в карточку анализа (главный поток).
+        """
+        if job != self._analysis_job or not hasattr(self, 'analysis_label'):
+            return
+        self._analysis_parts.append(part)
+        text = "".join(self._analysis_parts).rstrip("\n")
+        self.analysis_label.text = text if finished else text + "\n⏳ ..."
+        self._analysis_running = not finished
+
+    def _show_analysis_text(self, job, text, *args):
+        """
+        Заменяет текст карточки анализа целиком (главный поток).
+        """
+        if job != self._analysis_job or not hasattr(self, 'analysis_label'):
+            return
+        self.analysis_label.text = text.rstrip("\n")
+        self._analysis_running = False
+
+    def _cancel_analysis(self, *args):
+        """
+        Отменяет идущий анализ: поток завершится на границе ближайшего раздела,
+        а уже запланированные им обновления карточки будут проигнорированы.
+        """
+        self._analysis_job += 1
+        if self._analysis_running and hasattr(self, 'analysis_label'):
+            text = "".join(self._analysis_parts).rstrip("\n")
+            self.analysis_label.text = (text + "\n" if text else "") + "⛔ Анализ прерван"
+        self._analysis_running = False
+
+    def _update_analysis(self, *args):
+        """
+        Обновляет текст открытой карточки анализа после движения слайдера.
+        """
+        if not hasattr(self, 'analysis_card') or self.analysis_card not in self.content_layout.children:
+            return
+
+        expr = self.func_input1.text.strip()
+        if not expr:
+            return
+
+        try:
+            self._start_analysis(expr, progressive=False)
+        except Exception as e:
+            print(f"Ошибка анализа: {e}")
 
     def save_screenshot(self, *args):
         """
@@ -416,19 +578,13 @@ class GraphFunctionApp(MDApp):
             import traceback
             traceback.print_exc()
 
-    def extract_parameters(self, expr):
+    def extract_parameters(self, expr, var_name='x'):
         """
-        Извлекает параметры из выражения (все буквы, кроме x, t и функций).
+        Извлекает параметры из выражения (все имена, кроме var_name и функций).
+        Берутся из дерева выражения, то есть совпадают с аргументами ядра:
+        t в f(x) - такой же параметр со своим слайдером.
         """
-        # Удаляем известные функции
-        func_free = re.sub(
-            r'\b(sin|cos|tan|asin|acos|atan|sqrt|log|exp|abs|pi|e)\b',
-            '',
-            expr.lower()
-        )
-        # Находим все одиночные буквы (кроме 'x' и 't')
-        params = set(re.findall(r'\b([a-su-wyz])\b', func_free))  # исключили 't'
-        return sorted(params)
+        return list(get_compiled(expr, var_name).parameters)
 
     def update_parameter_sliders(self, params):
         """
@@ -545,8 +701,8 @@ class GraphFunctionApp(MDApp):
         """
         rounded_value = round(value * 2) / 2
         label.text = f"{param_name} = {rounded_value:.1f}"
-        # Перестраиваем график с новыми значениями параметров
-        self._rebuild_graph_with_current_params()
+        # Перерисовываем график с новыми значениями параметров
+        self._apply_param_values()
 
     def set_example(self, expr, ranges):
         """
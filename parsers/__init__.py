@@ -3,5 +3,6 @@
 """
 from .function_parser import FunctionParser
 from .parametric_parser import ParametricParser
+from .expression_cache import get_compiled, cache_info
 
-__all__ = ['FunctionParser', 'ParametricParser']
+__all__ = ['FunctionParser', 'ParametricParser', 'get_compiled', 'cache_info']
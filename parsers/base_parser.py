@@ -2,7 +2,43 @@
 Базовый класс для парсеров функций
 """
 import math
-import re
+
+import numpy as np
+
+from .expression_tree import parse_expression, to_source
+
+
+def _cot(value):
+    return 1 / math.tan(value)
+
+
+def _array_cot(values):
+    return 1 / np.tan(values)
+
+
+# Фиксированное пространство имён скомпилированных выражений.
+# Создаётся один раз при импорте и никогда не изменяется.
+# Ключи - канонические имена функций из expression_tree.FUNCTION_ALIASES.
+_SAFE_NAMESPACE = {
+    '__builtins__': {},
+    'sin': math.sin, 'cos': math.cos, 'tan': math.tan, 'cot': _cot,
+    'asin': math.asin, 'acos': math.acos, 'atan': math.atan,
+    'sqrt': math.sqrt, 'log': math.log, 'exp': math.exp,
+    'abs': abs,
+    'pi': math.pi,
+    'e': math.e,
+}
+
+# То же пространство имён для массивов: функции math заменены эквивалентами из numpy
+_ARRAY_NAMESPACE = {
+    '__builtins__': {},
+    'sin': np.sin, 'cos': np.cos, 'tan': np.tan, 'cot': _array_cot,
+    'asin': np.arcsin, 'acos': np.arccos, 'atan': np.arctan,
+    'sqrt': np.sqrt, 'log': np.log, 'exp': np.exp,
+    'abs': np.abs,
+    'pi': np.pi,
+    'e': np.e,
+}
 
 
 class BaseParser:
@@ -13,88 +49,77 @@ class BaseParser:
     @staticmethod
     def _preprocess_expression(expr):
         """
-        Предварительная обработка выражения: замена степеней, функций и т.д.
+        Предварительная обработка выражения: разбор в дерево и генерация
+        исходного кода Python (степени, синонимы функций, неявное умножение).
         """
-        if not isinstance(expr, str):
-             raise TypeError(f"Выражение должно быть строкой, получено: {type(expr)}")
-        expr = expr.lower().strip()
-
-        expr = expr.replace('^', '**')
-        expr = expr.replace('²', '**2')
-        expr = expr.replace('³', '**3')
-
-        # ЗАМЕНА ФУНКЦИЙ
-        replacements = [
-            (r'(?<!math\.)\b(?:arcsin|asin)\(', lambda m: 'math.asin('),
-            (r'(?<!math\.)\b(?:arccos|acos)\(', lambda m: 'math.acos('),
-            (r'(?<!math\.)\b(?:arctan|atan)\(', lambda m: 'math.atan('),
-            (r'(?<!math\.)\b(?:cot|ctg)\(', lambda m: '1/math.tan('),
-            (r'(?<!math\.)\bsin\(', lambda m: 'math.sin('),
-            (r'(?<!math\.)\bcos\(', lambda m: 'math.cos('),
-            (r'(?<!math\.)\btan\(', lambda m: 'math.tan('),
-            (r'(?<!math\.)\bsqrt\(', lambda m: 'math.sqrt('),
-            (r'(?<!math\.)\blog\(', lambda m: 'math.log('),
-            (r'(?<!math\.)\bln\(', lambda m: 'math.log('),
-            (r'(?<!math\.)\bexp\(', lambda m: 'math.exp('),
-            (r'(?<!math\.)\babs\(', lambda m: 'abs('),
-        ]
-
-        for pattern, repl_func in replacements:
-            expr = re.sub(pattern, repl_func, expr)
-
-        # Неявное умножение
-        mult_replacements = [
-            (r'(\d)(?![.\d])([a-zA-Z])', lambda m: f'{m.group(1)}*{m.group(2)}'),
-            (r'(?<!\*)\b([a-zA-Z\)])\(', r'\1*('),
-            (r'(\))([a-zA-Z\d])', lambda m: f'{m.group(1)}*{m.group(2)}'),
-            (r'([a-zA-Z])(\d)', lambda m: f'{m.group(1)}*{m.group(2)}'),
-        ]
-
-        for pattern, repl_func in mult_replacements:
-            if callable(repl_func):
-                expr = re.sub(pattern, repl_func, expr)
-            else:
-                expr = re.sub(pattern, repl_func, expr)
-
-        # Финальная очистка
-        cleanup_replacements = [
-            (r'math\.(\w+)\*\(', lambda m: f'math.{m.group(1)}('),
-            (r'abs\*\(', lambda m: 'abs('),
-        ]
-
-        for pattern, repl_func in cleanup_replacements:
-            expr = re.sub(pattern, repl_func, expr)
-
-        return expr
+        return to_source(parse_expression(expr))
 
     @staticmethod
-    def _create_safe_function(expr, var_name='x'): # Добавлен аргумент var_name
+    def _compile_expression(expr, var_name='x', namespace=None, parameters=()):
+        """
+        Один раз компилирует сгенерированный исходный код в функцию.
+        Первый аргумент - переменная var_name, следующие - параметры
+        (a, b, ...) в порядке parameters.
+        Функция привязывается к фиксированному пространству имён
+        (по умолчанию _SAFE_NAMESPACE, для массивов - _ARRAY_NAMESPACE).
+        """
+        arguments = ", ".join((var_name,) + tuple(parameters))
+        code = compile(f"lambda {arguments}: ({expr})", '<expression>', 'eval')
+        return eval(code, _SAFE_NAMESPACE if namespace is None else namespace)
+
+    @staticmethod
+    def _create_array_function(expr, var_name='x', parameters=()):
+        """
+        Создание векторизованной версии выражения.
+        Принимает ndarray значений переменной (и значения параметров)
+        и возвращает ndarray той же формы;
+        в точках вне области определения получается nan или ±inf.
+        """
+        kernel = BaseParser._compile_expression(expr, var_name, _ARRAY_NAMESPACE, parameters)
+
+        def array_func(values, *param_values):
+            values = np.asarray(values, dtype=float)
+            with np.errstate(all='ignore'):
+                try:
+                    result = np.asarray(kernel(values, *param_values))
+                except (ValueError, TypeError, AttributeError):
+                    return np.full(values.shape, np.nan)
+
+                if np.iscomplexobj(result):
+                    result = np.where(result.imag == 0, result.real, np.nan)
+
+                return np.broadcast_to(result.astype(float), values.shape).copy()
+
+        return array_func
+
+    @staticmethod
+    def _create_safe_function(expr, var_name='x', parameters=()):
         """
         Создание безопасной функции для вычисления выражения.
+        expr - исходный код, полученный из дерева выражения (см. _preprocess_expression)
         var_name - имя переменной (например, 'x' для f(x) или 't' для x(t), y(t))
+        parameters - имена параметров; их значения передаются после переменной
+
+        Выражение компилируется один раз; при каждом вызове выполняется только
+        готовый байткод, без разбора строки и без построения контекста.
+        Векторизованная версия доступна как атрибут func.vectorized.
         """
+        kernel = BaseParser._compile_expression(expr, var_name, parameters=parameters)
+
         def func(*args):
             try:
-                # args[0] - это значение переменной (x или t)
-                var_val = args[0]
-                context = {
-                    'math': math,
-                    'pi': math.pi,
-                    'e': math.e,
-                    var_name: var_val, # Передаем переменную с правильным именем
-                }
-                # print(f"DEBUG: eval expr='{expr}', context keys={list(context.keys())}") # DEBUG
-                result = eval(expr, {"__builtins__": {}}, context)
+                # args[0] - это значение переменной (x или t), далее - параметры
+                result = kernel(*args)
 
                 if isinstance(result, (int, float)):
                     return float(result)
                 else:
                     return float('nan')
 
-            except ZeroDivisionError:
+            except (ZeroDivisionError, OverflowError):
                 return float('inf')
-            except (ValueError, TypeError, NameError, SyntaxError, AttributeError) as e:
-                # print(f"DEBUG: Error in eval: {e}") # DEBUG
+            except (ValueError, TypeError, AttributeError):
                 return float('nan')
 
-        return func
\ No newline at end of file
+        func.vectorized = BaseParser._create_array_function(expr, var_name, parameters)
+        return func
@@ -0,0 +1,192 @@
+"""
+Кэш скомпилированных выражений.
+
+Одна и та же строка пользователя разбирается при построении графика,
+при анализе и при каждом нажатии на пример. Кэш сопоставляет канонической
+записи выражения (после разбора в дерево: без пробелов, в нижнем регистре,
+с каноническими именами функций) числовое ядро, sympy-выражение и его
+производные. Кэш общий для всего процесса и ограничен по размеру (LRU).
+"""
+import threading
+from collections import OrderedDict
+
+from .base_parser import BaseParser
+from .expression_tree import parse_expression, free_symbols, to_source, to_sympy
+from .interval_arithmetic import interval_function
+from .dual_numbers import derivative_function
+
+
+class CompiledExpression:
+    """
+    Запись кэша: всё, что строится из одного выражения.
+    Числовое ядро, sympy-выражение и производные вычисляются лениво.
+
+    Параметры (a, b, ...) компилируются как дополнительные аргументы ядра,
+    поэтому смена их значений не требует повторного разбора и компиляции.
+    """
+    def __init__(self, tree, var_name='x', source=None):
+        self.tree = tree
+        self.var_name = var_name
+        self.source = to_source(tree) if source is None else source
+        self.parameters = tuple(sorted(free_symbols(tree) - {var_name}))
+        self._kernel = None
+        self._sympy_expr = None
+        self._derivatives = []
+        self._lock = threading.Lock()
+
+    @property
+    def kernel(self):
+        """
+        Скомпилированная функция kernel(var, *параметры) с атрибутами vectorized,
+        interval (интервальная оценка, см. interval_arithmetic), derivatives
+        (значения f, f', f'' без sympy, см. dual_numbers) и cache_key.
+        """
+        if self._kernel is None:
+            kernel = BaseParser._create_safe_function(self.source, self.var_name, self.parameters)
+            kernel.interval = interval_function(self.tree, self.var_name, self.parameters)
+            kernel.derivatives = derivative_function(self.tree, self.var_name, self.parameters)
+            kernel.cache_key = (self.var_name, self.source, ())
+            self._kernel = kernel
+        return self._kernel
+
+    @property
+    def func(self):
+        """
+        Функция одной переменной var_name; только для выражений без параметров.
+        """
+        return self.bind({})
+
+    def bind(self, values):
+        """
+        Подставляет значения параметров как аргументы уже скомпилированного ядра.
+
+        Args:
+            values: словарь имя параметра -> значение (лишние имена игнорируются)
+
+        Returns:
+            функция одной переменной с атрибутами vectorized, interval, derivatives
+            и cache_key - (var_name, запись, значения параметров): одинаковый
+            ключ означает одинаковые значения (см. utils.tile_cache)
+        """
+        missing = [p for p in self.parameters if p not in values]
+        if missing:
+            raise ValueError(f"Неизвестное имя в выражении: '{', '.join(missing)}'")
+
+        kernel = self.kernel
+        if not self.parameters:
+            return kernel
+
+        args = tuple(float(values[p]) for p in self.parameters)
+
+        def bound(value):
+            return kernel(value, *args)
+
+        def bound_vectorized(values_array):
+            return kernel.vectorized(values_array, *args)
+
+        def bound_interval(lo, hi):
+            return kernel.interval(lo, hi, *args)
+
+        def bound_derivatives(values_array):
+            return kernel.derivatives(values_array, *args)
+
+        bound.vectorized = bound_vectorized
+        bound.interval = bound_interval
+        bound.derivatives = bound_derivatives
+        bound.cache_key = (self.var_name, self.source, args)
+        return bound
+
+    @property
+    def symbol(self):
+        import sympy as sp
+        return sp.Symbol(self.var_name)
+
+    @property
+    def sympy_expr(self):
+        """
+        sympy-выражение, построенное из дерева.
+        """
+        if self._sympy_expr is None:
+            self._sympy_expr = to_sympy(self.tree, {self.var_name: self.symbol})
+        return self._sympy_expr
+
+    def derivative(self, order=1):
+        """
+        Производная заданного порядка по var_name; каждая считается один раз.
+        """
+        import sympy as sp
+
+        with self._lock:
+            while len(self._derivatives) < order:
+                previous = self._derivatives[-1] if self._derivatives else self.sympy_expr
+                self._derivatives.append(sp.diff(previous, self.symbol))
+            return self._derivatives[order - 1]
+
+
+class ExpressionCache:
+    """
+    LRU-кэш CompiledExpression с ключом (var_name, каноническая запись).
+    """
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, expr, var_name='x'):
+        tree = parse_expression(expr)
+        source = to_source(tree)
+        key = (var_name, source)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+            self.misses += 1
+            entry = CompiledExpression(tree, var_name, source)
+            self._entries[key] = entry
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return entry
+
+    def info(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+_cache = ExpressionCache()
+
+
+def get_compiled(expr, var_name='x'):
+    """
+    Возвращает CompiledExpression для выражения, разбирая его только при промахе кэша.
+    """
+    return _cache.get(expr, var_name)
+
+
+def cache_info():
+    """
+    Счётчики кэша: hits, misses, evictions, size, maxsize.
+    """
+    return _cache.info()
+
+
+def clear_cache():
+    _cache.clear()
@@ -0,0 +1,310 @@
+"""
+Единый разбор пользовательских выражений в дерево.
+
+Токенизатор за один линейный проход обрабатывает неявное умножение, степени
+(^, **, ², ³), префикс math. и синонимы функций (ctg, arcsin, ln, ...).
+Из полученного дерева генерируются и числовое ядро (исходный код Python),
+и sympy-выражение, так что строка пользователя разбирается ровно один раз.
+"""
+from collections import namedtuple
+
+
+# Узел дерева выражения.
+#   op    - 'num', 'const', 'var', 'neg', 'add', 'sub', 'mul', 'div', 'pow', 'call'
+#   args  - кортеж дочерних узлов
+#   value - число, имя константы/переменной или каноническое имя функции
+Node = namedtuple('Node', 'op args value')
+
+# Синонимы функций -> каноническое имя
+FUNCTION_ALIASES = {
+    'sin': 'sin', 'cos': 'cos',
+    'tan': 'tan', 'tg': 'tan',
+    'cot': 'cot', 'ctg': 'cot',
+    'asin': 'asin', 'arcsin': 'asin',
+    'acos': 'acos', 'arccos': 'acos',
+    'atan': 'atan', 'arctan': 'atan', 'arctg': 'atan',
+    'sqrt': 'sqrt',
+    'log': 'log', 'ln': 'log',
+    'exp': 'exp',
+    'abs': 'abs',
+}
+
+CONSTANTS = ('pi', 'e')
+
+# Символы, которые пользователь может ввести вместо ASCII-операторов
+_CHAR_ALIASES = {'−': '-', '×': '*', '·': '*', '÷': '/'}
+_SUPERSCRIPTS = {'²': 2, '³': 3}
+# str.isdigit() считает цифрами и '²', поэтому множество задано явно
+_DIGITS = '.0123456789'
+
+# Приоритеты операций при генерации исходного кода
+_PRECEDENCE = {'add': 1, 'sub': 1, 'mul': 2, 'div': 2, 'neg': 3, 'pow': 4}
+_OPERATORS = {'add': '+', 'sub': '-', 'mul': '*', 'div': '/', 'pow': '**'}
+
+
+def tokenize(text):
+    """
+    Разбивает выражение на токены за один проход.
+
+    Returns:
+        список пар (тип, значение); типы: 'num', 'name', 'func', 'op', '(', ')', 'sup'
+    """
+    if not isinstance(text, str):
+        raise TypeError(f"Выражение должно быть строкой, получено: {type(text)}")
+
+    text = text.lower()
+    tokens = []
+    i = 0
+    n = len(text)
+
+    while i < n:
+        ch = _CHAR_ALIASES.get(text[i], text[i])
+
+        if ch.isspace():
+            i += 1
+        elif ch in _DIGITS:
+            start = i
+            while i < n and text[i] in _DIGITS:
+                i += 1
+            literal = text[start:i]
+            if literal.count('.') > 1 or literal == '.':
+                raise ValueError(f"Некорректное число: '{literal}'")
+            tokens.append(('num', literal))
+        elif ch.isalpha() and ch.isascii():
+            start = i
+            while i < n and text[i].isascii() and text[i].isalpha():
+                i += 1
+            word = text[start:i]
+            # Префикс math. из старых выражений просто пропускаем
+            if word == 'math' and i < n and text[i] == '.':
+                i += 1
+                continue
+            if word in FUNCTION_ALIASES:
+                tokens.append(('func', FUNCTION_ALIASES[word]))
+            elif word in CONSTANTS or len(word) == 1:
+                tokens.append(('name', word))
+            else:
+                raise ValueError(f"Неизвестное имя в выражении: '{word}'")
+        elif ch == '*' and text[i + 1:i + 2] == '*':
+            tokens.append(('op', '^'))
+            i += 2
+        elif ch in '+-*/^':
+            tokens.append(('op', ch))
+            i += 1
+        elif ch in '()':
+            tokens.append((ch, ch))
+            i += 1
+        elif ch in _SUPERSCRIPTS:
+            tokens.append(('sup', _SUPERSCRIPTS[ch]))
+            i += 1
+        else:
+            raise ValueError(f"Недопустимый символ в выражении: '{text[i]}'")
+
+    return tokens
+
+
+class _Parser:
+    """
+    Рекурсивный спуск по списку токенов.
+
+    expr   := term (('+' | '-') term)*
+    term   := unary (('*' | '/') unary | <неявное умножение> power)*
+    unary  := ('+' | '-') unary | power
+    power  := postfix ('^' unary)?
+    postfix:= atom ('²' | '³')*
+    atom   := num | name | func '(' expr ')' | '(' expr ')'
+    """
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return (None, None)
+
+    def take(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def expect(self, kind):
+        token = self.take()
+        if token[0] != kind:
+            raise ValueError(f"Ожидалось '{kind}', получено: '{token[1] or 'конец выражения'}'")
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            raise ValueError("Пустое выражение")
+        node = self.expr()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"Лишний символ в выражении: '{self.peek()[1]}'")
+        return node
+
+    def expr(self):
+        node = self.term()
+        while self.peek() in (('op', '+'), ('op', '-')):
+            op = 'add' if self.take()[1] == '+' else 'sub'
+            node = Node(op, (node, self.term()), None)
+        return node
+
+    def term(self):
+        node = self.unary()
+        while True:
+            kind, value = self.peek()
+            if kind == 'op' and value in '*/':
+                self.take()
+                op = 'mul' if value == '*' else 'div'
+                node = Node(op, (node, self.unary()), None)
+            elif kind in ('num', 'name', 'func', '('):
+                # Неявное умножение: 2x, x(x+1), (x+1)(x-1), 2sin(x)
+                node = Node('mul', (node, self.power()), None)
+            else:
+                return node
+
+    def unary(self):
+        if self.peek() == ('op', '-'):
+            self.take()
+            return Node('neg', (self.unary(),), None)
+        if self.peek() == ('op', '+'):
+            self.take()
+            return self.unary()
+        return self.power()
+
+    def power(self):
+        base = self.postfix()
+        if self.peek() == ('op', '^'):
+            self.take()
+            return Node('pow', (base, self.unary()), None)
+        return base
+
+    def postfix(self):
+        node = self.atom()
+        while self.peek()[0] == 'sup':
+            node = Node('pow', (node, Node('num', (), self.take()[1])), None)
+        return node
+
+    def atom(self):
+        kind, value = self.take()
+        if kind == 'num':
+            return Node('num', (), float(value) if '.' in value else int(value))
+        if kind == 'name':
+            if value in CONSTANTS:
+                return Node('const', (), value)
+            return Node('var', (), value)
+        if kind == 'func':
+            self.expect('(')
+            arg = self.expr()
+            self.expect(')')
+            return Node('call', (arg,), value)
+        if kind == '(':
+            node = self.expr()
+            self.expect(')')
+            return node
+        raise ValueError(f"Неожиданный символ в выражении: '{value or 'конец выражения'}'")
+
+
+def parse_expression(text):
+    """
+    Разбирает строку пользователя в дерево выражения.
+
+    Raises:
+        ValueError: если выражение некорректно
+    """
+    return _Parser(tokenize(text)).parse()
+
+
+def free_symbols(node):
+    """
+    Возвращает множество имён переменных, встречающихся в дереве.
+    """
+    if node.op == 'var':
+        return {node.value}
+    names = set()
+    for arg in node.args:
+        names |= free_symbols(arg)
+    return names
+
+
+def to_source(node):
+    """
+    Генерирует исходный код Python с минимальной расстановкой скобок.
+    Функции записываются каноническими именами (sin, cot, log, ...),
+    их реализации подставляются пространством имён при компиляции.
+    """
+    op = node.op
+    if op == 'num':
+        return repr(node.value)
+    if op in ('const', 'var'):
+        return node.value
+    if op == 'call':
+        return f"{node.value}({to_source(node.args[0])})"
+    if op == 'neg':
+        return f"-{_wrap(node.args[0], _PRECEDENCE['neg'])}"
+
+    left, right = node.args
+    prec = _PRECEDENCE[op]
+    if op == 'pow':
+        # Основание - только атом; показатель может быть унарным минусом: x**-2
+        return f"{_wrap(left, prec + 1)}**{_wrap(right, _PRECEDENCE['neg'])}"
+    # Правый операнд вычитания и деления берём в скобки при равном приоритете
+    right_prec = prec + 1 if op in ('sub', 'div') else prec
+    return f"{_wrap(left, prec)}{_OPERATORS[op]}{_wrap(right, right_prec)}"
+
+
+def _wrap(node, min_prec):
+    """
+    Исходный код узла, в скобках - если его приоритет ниже требуемого.
+    """
+    source = to_source(node)
+    if _PRECEDENCE.get(node.op, 5) < min_prec:
+        return f"({source})"
+    return source
+
+
+def to_sympy(node, symbols=None):
+    """
+    Строит sympy-выражение прямо из дерева, без повторного разбора строки.
+
+    Args:
+        node: дерево выражения
+        symbols: необязательный словарь имя -> sympy.Symbol
+    """
+    import sympy as sp
+
+    functions = {
+        'sin': sp.sin, 'cos': sp.cos, 'tan': sp.tan, 'cot': sp.cot,
+        'asin': sp.asin, 'acos': sp.acos, 'atan': sp.atan,
+        'sqrt': sp.sqrt, 'log': sp.log, 'exp': sp.exp, 'abs': sp.Abs,
+    }
+    constants = {'pi': sp.pi, 'e': sp.E}
+    symbols = {} if symbols is None else symbols
+
+    def build(n):
+        op = n.op
+        if op == 'num':
+            return sp.Integer(n.value) if isinstance(n.value, int) else sp.Float(n.value)
+        if op == 'const':
+            return constants[n.value]
+        if op == 'var':
+            if n.value not in symbols:
+                symbols[n.value] = sp.Symbol(n.value)
+            return symbols[n.value]
+        if op == 'call':
+            return functions[n.value](build(n.args[0]))
+        if op == 'neg':
+            return -build(n.args[0])
+
+        left, right = build(n.args[0]), build(n.args[1])
+        if op == 'add':
+            return left + right
+        if op == 'sub':
+            return left - right
+        if op == 'mul':
+            return left * right
+        if op == 'div':
+            return left / right
+        return left ** right
+
+    return build(node)
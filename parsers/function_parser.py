@@ -1,8 +1,8 @@
 """
 Парсер для обычных функций вида y = f(x)
 """
-import math
 from .base_parser import BaseParser
+from .expression_cache import get_compiled
 
 
 class FunctionParser(BaseParser):
@@ -10,23 +10,24 @@ class FunctionParser(BaseParser):
     Парсер для обычных функций y = f(x)
     """
     @staticmethod
-    def parse(expr):
+    def parse(expr, param_values=None):
         """
         Парсит выражение функции вида y = f(x)
         
         Args:
             expr: строка вида "x**2" или "sin(x)"
+            param_values: значения параметров (a, b, ...), если они есть в выражении
         
         Returns:
             func: функция, принимающая x и возвращающая y
         """
         # print(f"\n🔧 ПАРСЕР: Обработка: '{expr}'") # DEBUG
 
-        processed_expr = FunctionParser._preprocess_expression(expr)
-        # print(f"🔧 После обработки: '{processed_expr}'") # DEBUG
+        # Скомпилированная функция берётся из общего кэша выражений
+        compiled = get_compiled(expr, 'x')
+        # print(f"🔧 После обработки: '{compiled.source}'") # DEBUG
 
-        # Создаем безопасную функцию, передавая имя переменной 'x'
-        safe_func = FunctionParser._create_safe_function(processed_expr, 'x')
+        safe_func = compiled.bind(param_values or {})
 
         # Тестируем
         # print(f"\n🔧 Тест парсера:") # DEBUG
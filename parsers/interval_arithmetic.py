@@ -0,0 +1,296 @@
+"""
+Интервальная арифметика на дереве выражения.
+
+Для массива отрезков [lo, hi] значений переменной вычисляется отрезок,
+гарантированно содержащий все значения выражения на каждом из них
+(часть отрезка вне области определения просто не учитывается).
+Каждая операция расширяет результат наружу на одну единицу последнего
+разряда, так что ошибки округления не нарушают гарантию.
+
+Пустой результат (отрезок целиком вне области определения, например
+sqrt на [-2; -1]) обозначается nan в обеих границах. Отрезок, содержащий
+полюс, даёт [-∞; +∞].
+
+Поддеревья без переменных (2+1, pi/2) заранее вычисляются в число,
+как их вычислит числовое ядро.
+"""
+import numpy as np
+
+from .expression_tree import free_symbols
+
+
+_HALF_PI = np.pi / 2
+
+
+def interval_function(tree, var_name='x', parameters=()):
+    """
+    Компилирует дерево выражения в интервальную функцию.
+
+    Returns:
+        функция (lo, hi, *значения параметров) -> (lo, hi) для массивов
+        границ отрезков одинаковой формы
+    """
+    evaluate = _compile(tree, var_name, tuple(parameters))
+
+    def interval_func(lo, hi, *param_values):
+        lo = np.asarray(lo, dtype=float)
+        hi = np.asarray(hi, dtype=float)
+        with np.errstate(all='ignore'):
+            result_lo, result_hi = evaluate(lo, hi, param_values)
+            return (np.broadcast_to(result_lo, lo.shape).copy(),
+                    np.broadcast_to(result_hi, lo.shape).copy())
+
+    return interval_func
+
+
+def _outward(lo, hi):
+    return np.nextafter(lo, -np.inf), np.nextafter(hi, np.inf)
+
+
+def _point(value):
+    lo, hi = _outward(np.float64(value), np.float64(value))
+    return lambda x_lo, x_hi, params: (lo, hi)
+
+
+def _compile(node, var_name, parameters):
+    """
+    Рекурсивно строит замыкание evaluate(lo, hi, param_values) -> (lo, hi).
+    """
+    op = node.op
+
+    value = _constant_value(node)
+    if value is not None:
+        return _point(value)
+    if op == 'var':
+        if node.value == var_name:
+            return lambda lo, hi, params: (lo, hi)
+        index = parameters.index(node.value)
+        return lambda lo, hi, params: (np.float64(params[index]), np.float64(params[index]))
+
+    args = [_compile(arg, var_name, parameters) for arg in node.args]
+
+    if op == 'neg':
+        inner, = args
+        def evaluate(lo, hi, params):
+            a_lo, a_hi = inner(lo, hi, params)
+            return -a_hi, -a_lo
+        return evaluate
+
+    if op == 'call':
+        inner, = args
+        function = _FUNCTIONS[node.value]
+        return lambda lo, hi, params: function(*inner(lo, hi, params))
+
+    left, right = args
+
+    if op == 'pow':
+        exponent = _constant_value(node.args[1])
+        if exponent is not None:
+            return lambda lo, hi, params: _power_const(*left(lo, hi, params), exponent)
+        return lambda lo, hi, params: _power(*left(lo, hi, params), *right(lo, hi, params))
+
+    operation = _OPERATIONS[op]
+    return lambda lo, hi, params: operation(*left(lo, hi, params), *right(lo, hi, params))
+
+
+def _constant_value(node):
+    """
+    Числовое значение узла без переменных или None (в том числе если
+    значение не определено или бесконечно).
+    """
+    if free_symbols(node):
+        return None
+    try:
+        with np.errstate(all='ignore'):
+            value = float(_fold(node))
+    except OverflowError:
+        return None
+    return value if np.isfinite(value) else None
+
+
+def _fold(node):
+    """
+    Значение дерева без переменных в тех же операциях numpy, что у числового ядра.
+    """
+    op = node.op
+    if op == 'num':
+        return np.float64(node.value)
+    if op == 'const':
+        return np.float64(np.pi if node.value == 'pi' else np.e)
+    if op == 'neg':
+        return -_fold(node.args[0])
+    if op == 'call':
+        return _CONSTANT_FUNCTIONS[node.value](_fold(node.args[0]))
+    return _CONSTANT_OPERATIONS[op](_fold(node.args[0]), _fold(node.args[1]))
+
+
+def _add(a_lo, a_hi, b_lo, b_hi):
+    return _outward(a_lo + b_lo, a_hi + b_hi)
+
+
+def _sub(a_lo, a_hi, b_lo, b_hi):
+    return _outward(a_lo - b_hi, a_hi - b_lo)
+
+
+def _mul(a_lo, a_hi, b_lo, b_hi):
+    products = [a_lo * b_lo, a_lo * b_hi, a_hi * b_lo, a_hi * b_hi]
+    # 0·∞ даёт nan, хотя оба отрезка не пусты: такое произведение считаем нулём
+    empty = np.isnan(a_lo) | np.isnan(b_lo)
+    products = [np.where(np.isnan(p) & ~empty, 0.0, p) for p in products]
+    lo = np.minimum(np.minimum(products[0], products[1]), np.minimum(products[2], products[3]))
+    hi = np.maximum(np.maximum(products[0], products[1]), np.maximum(products[2], products[3]))
+    return _outward(lo, hi)
+
+
+def _reciprocal(lo, hi):
+    # Отрезок, содержащий 0, даёт всю прямую ([0; 0] - пустое множество)
+    contains_zero = (lo <= 0) & (hi >= 0)
+    only_zero = (lo == 0) & (hi == 0)
+    r_lo = np.where(contains_zero, -np.inf, 1 / hi)
+    r_hi = np.where(contains_zero, np.inf, 1 / lo)
+    r_lo = np.where(only_zero, np.nan, r_lo)
+    r_hi = np.where(only_zero, np.nan, r_hi)
+    return _outward(r_lo, r_hi)
+
+
+def _div(a_lo, a_hi, b_lo, b_hi):
+    return _mul(a_lo, a_hi, *_reciprocal(b_lo, b_hi))
+
+
+def _power_const(lo, hi, exponent):
+    """
+    Степень с постоянным показателем: x^2, x^3, x^-1, x^0.5.
+    """
+    if exponent == int(exponent):
+        n = int(exponent)
+        if n == 0:
+            return np.where(np.isnan(lo), np.nan, 1.0), np.where(np.isnan(lo), np.nan, 1.0)
+        if n < 0:
+            return _reciprocal(*_power_const(lo, hi, -n))
+        if n % 2:
+            return _outward(lo ** n, hi ** n)
+        contains_zero = (lo <= 0) & (hi >= 0)
+        p_lo, p_hi = lo ** n, hi ** n
+        result_lo = np.where(contains_zero, 0.0, np.minimum(p_lo, p_hi))
+        return _outward(result_lo, np.maximum(p_lo, p_hi))
+
+    # Дробный показатель определён только для x >= 0 (как в числовом ядре)
+    empty = hi < 0
+    lo = np.maximum(lo, 0.0)
+    p_lo, p_hi = lo ** exponent, hi ** exponent
+    if exponent < 0:
+        p_lo, p_hi = p_hi, p_lo
+    return _outward(np.where(empty, np.nan, p_lo), np.where(empty, np.nan, p_hi))
+
+
+def _power(a_lo, a_hi, b_lo, b_hi):
+    """
+    Общая степень a^b = exp(b·log a) для a > 0.
+
+    Как в числовом ядре, при a < 0 степень определена только для целых b.
+    Показатель-параметр, отрезок которого содержит ровно одно целое число
+    (x^a при a = 2, x^(a+1) после округления наружу), считается этим числом.
+    Если показатель может оказаться целым, для a < 0 значение может быть
+    любым: результат [-∞; +∞], а не пустой отрезок.
+    """
+    if np.ndim(b_lo) == 0 and np.ndim(b_hi) == 0:
+        n = np.ceil(b_lo)
+        if n == np.floor(b_hi) and b_hi - b_lo <= 1e-9 * (1 + abs(n)):
+            return _power_const(a_lo, a_hi, float(n))
+
+    p_lo, p_hi = _exp(*_mul(b_lo, b_hi, *_log(a_lo, a_hi)))
+    negative = (a_lo < 0) & (np.ceil(b_lo) <= b_hi)
+    return np.where(negative, -np.inf, p_lo), np.where(negative, np.inf, p_hi)
+
+
+def _monotone(function):
+    return lambda lo, hi: _outward(function(lo), function(hi))
+
+
+def _exp(lo, hi):
+    return _outward(np.exp(lo), np.exp(hi))
+
+
+def _log(lo, hi):
+    empty = hi <= 0
+    return _outward(np.where(empty, np.nan, np.log(np.maximum(lo, 0.0))),
+                    np.where(empty, np.nan, np.log(hi)))
+
+
+def _sqrt(lo, hi):
+    empty = hi < 0
+    return _outward(np.where(empty, np.nan, np.sqrt(np.maximum(lo, 0.0))),
+                    np.where(empty, np.nan, np.sqrt(hi)))
+
+
+def _abs(lo, hi):
+    contains_zero = (lo <= 0) & (hi >= 0)
+    a_lo, a_hi = np.abs(lo), np.abs(hi)
+    return (np.where(contains_zero, 0.0, np.minimum(a_lo, a_hi)), np.maximum(a_lo, a_hi))
+
+
+def _contains_point(lo, hi, offset, period):
+    """
+    Есть ли на [lo; hi] точка вида offset + k·period.
+    """
+    k = np.ceil((lo - offset) / period)
+    return offset + k * period <= hi
+
+
+def _sin(lo, hi):
+    s_lo, s_hi = np.sin(lo), np.sin(hi)
+    result_lo = np.minimum(s_lo, s_hi)
+    result_hi = np.maximum(s_lo, s_hi)
+    # Максимумы синуса в π/2 + 2kπ, минимумы в -π/2 + 2kπ
+    result_hi = np.where(_contains_point(lo, hi, _HALF_PI, 2 * np.pi), 1.0, result_hi)
+    result_lo = np.where(_contains_point(lo, hi, -_HALF_PI, 2 * np.pi), -1.0, result_lo)
+    wide = hi - lo >= 2 * np.pi
+    result_lo, result_hi = _outward(np.where(wide, -1.0, result_lo), np.where(wide, 1.0, result_hi))
+    return np.maximum(result_lo, -1.0), np.minimum(result_hi, 1.0)
+
+
+def _cos(lo, hi):
+    return _sin(*_add(lo, hi, _HALF_PI, _HALF_PI))
+
+
+def _tan(lo, hi):
+    # Полюсы в π/2 + kπ; между ними тангенс возрастает
+    pole = _contains_point(lo, hi, _HALF_PI, np.pi) | (hi - lo >= np.pi)
+    return _outward(np.where(pole, -np.inf, np.tan(lo)), np.where(pole, np.inf, np.tan(hi)))
+
+
+def _cot(lo, hi):
+    # Полюсы в kπ; между ними котангенс убывает
+    pole = _contains_point(lo, hi, 0.0, np.pi) | (hi - lo >= np.pi)
+    return _outward(np.where(pole, -np.inf, 1 / np.tan(hi)), np.where(pole, np.inf, 1 / np.tan(lo)))
+
+
+def _arc(function, increasing):
+    def evaluate(lo, hi):
+        empty = (hi < -1) | (lo > 1)
+        f_lo, f_hi = function(np.maximum(lo, -1.0)), function(np.minimum(hi, 1.0))
+        if not increasing:
+            f_lo, f_hi = f_hi, f_lo
+        return _outward(np.where(empty, np.nan, f_lo), np.where(empty, np.nan, f_hi))
+    return evaluate
+
+
+_OPERATIONS = {'add': _add, 'sub': _sub, 'mul': _mul, 'div': _div}
+
+_CONSTANT_OPERATIONS = {'add': np.add, 'sub': np.subtract, 'mul': np.multiply,
+                        'div': np.divide, 'pow': np.power}
+
+_CONSTANT_FUNCTIONS = {
+    'sin': np.sin, 'cos': np.cos, 'tan': np.tan, 'cot': lambda v: 1 / np.tan(v),
+    'asin': np.arcsin, 'acos': np.arccos, 'atan': np.arctan,
+    'sqrt': np.sqrt, 'log': np.log, 'exp': np.exp,
+    'abs': np.abs,
+}
+
+_FUNCTIONS = {
+    'sin': _sin, 'cos': _cos, 'tan': _tan, 'cot': _cot,
+    'asin': _arc(np.arcsin, True), 'acos': _arc(np.arccos, False),
+    'atan': _monotone(np.arctan),
+    'sqrt': _sqrt, 'log': _log, 'exp': _exp,
+    'abs': _abs,
+}
@@ -4,6 +4,7 @@ x = x(t)
 y = y(t)
 """
 from .base_parser import BaseParser
+from .expression_cache import get_compiled
 
 
 class ParametricParser(BaseParser):
@@ -59,10 +60,10 @@ class ParametricParser(BaseParser):
         """
         print(f"\n🔧 Парсинг {coord}({param}): '{expr}'")
 
-        processed_expr = ParametricParser._preprocess_expression(expr)
-        print(f"🔧 Финальное выражение: '{processed_expr}'")
+        # Скомпилированная функция берётся из общего кэша выражений
+        compiled = get_compiled(expr, param)
+        print(f"🔧 Финальное выражение: '{compiled.source}'")
 
-        # Создаем безопасную функцию, передавая имя параметра
-        safe_func = ParametricParser._create_safe_function(processed_expr, param)
+        safe_func = compiled.func
 
         return safe_func
\ No newline at end of file
@@ -0,0 +1,10 @@
+"""
+Общие настройки тестов: модули импортируются от корня репозитория.
+
+Запуск из корня репозитория:
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
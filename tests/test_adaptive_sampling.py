@@ -0,0 +1,69 @@
+"""
+Адаптивная выборка: бюджет вычислений и точность.
+"""
+import numpy as np
+import pytest
+
+from utils.adaptive_sampling import (INITIAL_SEGMENTS, MAX_EVALUATIONS, EvaluationBudget,
+                                     adaptive_refinement, adaptive_sample)
+
+
+def counting(func, scale=100.0):
+    """
+    points(ts) для кривой y = func(x) в пикселях (масштаб scale) со счётчиком вычислений.
+    """
+    calls = []
+
+    def points(ts):
+        calls.append(ts.size)
+        with np.errstate(all='ignore'):
+            return ts * scale, func(ts) * scale
+    return points, calls
+
+
+@pytest.mark.parametrize('func', [lambda x: np.sin(100 * x), np.tan, lambda x: 1 / x])
+def test_per_curve_budget_respected(func):
+    points, calls = counting(func)
+    ts, _, _ = adaptive_sample(points, -5, 5)
+    assert sum(calls) <= MAX_EVALUATIONS
+    assert ts.size == sum(calls)
+
+
+def test_shared_budget_across_samplers():
+    budget = EvaluationBudget(3000)
+    points, calls = counting(lambda x: np.sin(100 * x))
+    samplers = [adaptive_refinement(points, lo, lo + 1, budget=budget, segments=32)
+                for lo in range(-5, 5)]
+    # Как плитки utils.tile_cache: по уровню каждой выборки за шаг
+    while samplers:
+        for sampler in list(samplers):
+            try:
+                next(sampler)
+            except StopIteration:
+                samplers.remove(sampler)
+    assert sum(calls) <= 3000
+    assert budget.exhausted
+
+
+def test_straight_line_needs_only_initial_grid_and_one_level():
+    points, calls = counting(lambda x: 2 * x + 1)
+    adaptive_sample(points, -5, 5)
+    assert sum(calls) == 2 * INITIAL_SEGMENTS + 1
+
+
+def test_final_samples_within_tolerance():
+    points, _ = counting(np.sin)
+    ts, xs, ys = adaptive_sample(points, -5, 5, tolerance=0.5)
+    # Середина каждого отрезка параметра - не дальше допуска от середины хорды
+    mids = (ts[1:] + ts[:-1]) / 2
+    mid_xs, mid_ys = points(mids)
+    error = np.hypot(mid_xs - (xs[1:] + xs[:-1]) / 2, mid_ys - (ys[1:] + ys[:-1]) / 2)
+    assert error.max() <= 0.5
+
+
+def test_refinement_ends_with_adaptive_sample_result():
+    points, _ = counting(np.tan)
+    steps = list(adaptive_refinement(points, -5, 5))
+    ts, _, _ = adaptive_sample(points, -5, 5)
+    assert steps[0][0].size == INITIAL_SEGMENTS + 1
+    np.testing.assert_array_equal(steps[-1][0], ts)
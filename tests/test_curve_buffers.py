@@ -0,0 +1,51 @@
+"""
+Вершины линий графика: отсечение, разбиение на участки, проходы.
+"""
+import numpy as np
+
+from utils.curve_buffers import (FUNCTION_COLORS, PARAMETRIC_COLOR, function_passes,
+                                 function_polylines, parametric_polylines)
+
+
+VIEW = (-5, 5, -5, 5)
+AREA = (10, 20, 400)
+
+
+def vertices(polyline):
+    return np.asarray(polyline.points).reshape(-1, 2)
+
+
+def inside_area(points):
+    area_x, area_y, size = AREA
+    return np.all((points >= (area_x, area_y)) & (points <= (area_x + size, area_y + size)))
+
+
+def test_pole_splits_curve_into_visible_runs():
+    with np.errstate(divide='ignore'):
+        polylines = function_polylines([lambda x: 1 / x], VIEW, AREA)
+    assert len(polylines) >= 2
+    for polyline in polylines:
+        assert polyline.color == FUNCTION_COLORS[0]
+        assert inside_area(vertices(polyline))
+
+
+def test_each_function_gets_its_color():
+    polylines = function_polylines([np.sin, np.cos], VIEW, AREA)
+    assert {p.color for p in polylines} == set(FUNCTION_COLORS)
+
+
+def test_passes_go_from_coarse_to_final():
+    passes = list(function_passes([lambda x: np.sin(5 * x)], VIEW, AREA, frame_time=0))
+    assert len(passes) > 2
+    assert not any(p.done for p in passes[:-1]) and passes[-1].done
+    assert passes[0].sampled < passes[-1].sampled
+    final = function_polylines([lambda x: np.sin(5 * x)], VIEW, AREA)
+    assert [p.points for p in passes[-1].polylines] == [p.points for p in final]
+
+
+def test_parametric_circle_is_clipped_and_simplified():
+    polylines, sampled, visible, count = parametric_polylines(
+        np.cos, np.sin, 0, 2 * np.pi, (-2, 2, -2, 2), AREA, simplify_tolerance=0.5)
+    assert len(polylines) == 1 and polylines[0].color == PARAMETRIC_COLOR
+    assert count == len(vertices(polylines[0])) < visible <= sampled
+    assert inside_area(vertices(polylines[0]))
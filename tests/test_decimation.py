@@ -0,0 +1,75 @@
+"""
+Прореживание ломаных: M4 по столбцам пикселей и Рамер-Дуглас-Пекер.
+"""
+import numpy as np
+
+from utils.decimation import m4_decimate, m4_indices, rdp_indices, simplify_polyline
+
+
+def test_m4_keeps_extremes_of_every_column():
+    rng = np.random.default_rng(0)
+    xs = np.sort(rng.uniform(0, 200, 20000))
+    ys = np.sin(xs * 3) * 100 + rng.normal(0, 5, xs.size)
+    keep = m4_indices(xs, ys)
+
+    columns = np.floor(xs).astype(int)
+    kept_columns = columns[keep]
+    for column in np.unique(columns):
+        in_column = columns == column
+        kept = keep[kept_columns == column]
+        assert ys[kept].min() == ys[in_column].min()
+        assert ys[kept].max() == ys[in_column].max()
+        # Первая и последняя точки столбца соединяют его с соседями
+        first, last = np.flatnonzero(in_column)[[0, -1]]
+        assert first in kept and last in kept
+        assert kept.size <= 4
+
+
+def test_m4_bounds_vertex_count_and_keeps_order():
+    xs = np.linspace(0, 100, 50001)
+    ys = np.sin(xs * 50)
+    out_xs, out_ys = m4_decimate(xs, ys)
+    assert out_xs.size <= 4 * 101
+    assert np.all(np.diff(out_xs) >= 0)
+    assert out_xs[0] == xs[0] and out_xs[-1] == xs[-1]
+
+
+def test_m4_short_input_unchanged():
+    np.testing.assert_array_equal(m4_indices([0.1, 0.2, 0.3], [1, 2, 3]), [0, 1, 2])
+
+
+def _max_deviation(xs, ys, keep):
+    """
+    Наибольшее расстояние от исходных вершин до отрезка упрощённой ломаной,
+    заменившего их.
+    """
+    worst = 0.0
+    for start, end in zip(keep[:-1], keep[1:]):
+        ax, ay, bx, by = xs[start], ys[start], xs[end], ys[end]
+        px, py = xs[start:end + 1] - ax, ys[start:end + 1] - ay
+        dx, dy = bx - ax, by - ay
+        length = np.hypot(dx, dy)
+        distance = np.abs(dx * py - dy * px) / length if length else np.hypot(px, py)
+        worst = max(worst, distance.max())
+    return worst
+
+
+def test_rdp_stays_within_tolerance():
+    t = np.linspace(0, 6 * np.pi, 5000)
+    xs, ys = 200 + t * 10 * np.cos(t), 200 + t * 10 * np.sin(t)
+    for tolerance in (0.25, 0.5, 2.0):
+        keep = rdp_indices(xs, ys, tolerance)
+        assert keep[0] == 0 and keep[-1] == xs.size - 1
+        assert np.all(np.diff(keep) > 0)
+        assert keep.size < xs.size
+        assert _max_deviation(xs, ys, keep) <= tolerance
+
+
+def test_rdp_closed_curve_and_straight_line():
+    t = np.linspace(0, 2 * np.pi, 257)
+    xs, ys = simplify_polyline(100 * np.cos(t), 100 * np.sin(t), 0.5)
+    assert 3 < xs.size < 257
+    np.testing.assert_allclose((xs[0], ys[0]), (xs[-1], ys[-1]), atol=1e-9)
+
+    line = np.linspace(0, 100, 1000)
+    np.testing.assert_array_equal(rdp_indices(line, 2 * line), [0, 999])
@@ -0,0 +1,55 @@
+"""
+Интервальная арифметика: отрезок содержит значения ядра во всех точках отрезка аргумента.
+"""
+import numpy as np
+import pytest
+
+from parsers.expression_cache import get_compiled
+
+
+EXPRESSIONS = [
+    ('x^2 - 3x', {}),
+    ('x^3', {}),
+    ('x^(2+1)', {}),
+    ('x^(1+1)*sin(x) - 1', {}),
+    ('x^(4/2)', {}),
+    ('x^(-(1+1))', {}),
+    ('x^(1/3)', {}),
+    ('x^0.5 + 1/x', {}),
+    ('(2-3)^x', {}),
+    ('x^x', {}),
+    ('tan(x) + cot(x)', {}),
+    ('sqrt(x) * log(x)', {}),
+    ('exp(-x^2) * cos(pi/2*x)', {}),
+    ('x^a', {'a': 2}),
+    ('x^a', {'a': 3}),
+    ('x^a', {'a': -1}),
+    ('x^a', {'a': 0.5}),
+    ('x^(a+1)', {'a': 2}),
+    ('x^(a+1)', {'a': -0.5}),
+    ('x^(2a)', {'a': 1.5}),
+    ('a*x^b - 1', {'a': 2, 'b': 3}),
+]
+
+
+@pytest.mark.parametrize('expr, values', EXPRESSIONS)
+def test_enclosure(expr, values):
+    func = get_compiled(expr, 'x').bind(values)
+    rng = np.random.default_rng(0)
+    centers = rng.uniform(-5, 5, 3000)
+    widths = rng.choice([1e-6, 1e-2, 0.3, 2.0], centers.size)
+    lo, hi = centers - widths / 2, centers + widths / 2
+    interval_lo, interval_hi = func.interval(lo, hi)
+
+    # Концы и целые точки отрезков - там, где показатель-целое число значим
+    # (например, (-1)^x определено только в целых x)
+    samples = np.column_stack([lo, hi, np.round(centers),
+                               rng.uniform(lo[:, None], hi[:, None], (lo.size, 8))])
+    inside = (samples >= lo[:, None]) & (samples <= hi[:, None])
+    values_at = func.vectorized(samples.ravel()).reshape(samples.shape)
+    defined = inside & np.isfinite(values_at)
+
+    below = defined & ~(values_at >= interval_lo[:, None])
+    above = defined & ~(values_at <= interval_hi[:, None])
+    assert not below.any() and not above.any(), (
+        f"{expr}: {int((below | above).sum())} значений вне отрезка")
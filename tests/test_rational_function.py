@@ -0,0 +1,41 @@
+"""
+Корни многочленов для быстрого пути дробно-рациональных функций.
+"""
+import numpy as np
+import pytest
+
+from analyzers.rational_function import real_polynomial_roots, square_free_part
+
+
+def poly_from_roots(*roots):
+    return np.poly(roots)
+
+
+@pytest.mark.parametrize('roots, expected', [
+    ((1, 1, 1, 1), [1]),
+    ((1,) * 6, [1]),
+    ((3, 3, 3, 3, -2), [-2, 3]),
+    ((0.1, 0.1, 0.1, 0.1), [0.1]),
+    ((0.3, 0.3, 0.7), [0.3, 0.7]),
+    ((-1.5, -1.5, -1.5, 2, 2), [-1.5, 2]),
+])
+def test_repeated_roots_reported_once(roots, expected):
+    result = real_polynomial_roots(poly_from_roots(*roots))
+    np.testing.assert_allclose(result, expected, atol=1e-9)
+
+
+def test_simple_and_irrational_roots():
+    np.testing.assert_allclose(real_polynomial_roots([1, -3, 2]), [1, 2])
+    np.testing.assert_allclose(real_polynomial_roots([1, 0, -2]), [-np.sqrt(2), np.sqrt(2)])
+    np.testing.assert_allclose(real_polynomial_roots(poly_from_roots(np.pi, np.pi)), [np.pi], atol=1e-6)
+
+
+def test_no_real_roots():
+    assert real_polynomial_roots([1, 0, 1]).size == 0
+    assert real_polynomial_roots([5]).size == 0
+
+
+def test_square_free_part_removes_multiplicity():
+    # (x - 1)^3 (x + 2) -> (x - 1)(x + 2)
+    part = square_free_part(np.polymul(poly_from_roots(1, 1, 1), poly_from_roots(-2)))
+    np.testing.assert_allclose(part, poly_from_roots(1, -2))
@@ -0,0 +1,21 @@
+"""
+Общее решение solveset: периодические семейства и выколотые точки.
+"""
+import numpy as np
+
+from analyzers.symbolic_analysis import get_symbolic_analysis
+from parsers.expression_cache import get_compiled
+
+
+def roots(expr, x_min, x_max, order=0):
+    return get_symbolic_analysis(get_compiled(expr, 'x')).roots_in_window(order, {}, x_min, x_max)
+
+
+def test_periodic_family_enumerated():
+    np.testing.assert_allclose(roots('sin(x)', -10, 10), np.pi * np.arange(-3, 4))
+
+
+def test_complement_points_removed():
+    # solveset: Union(Complement(2nπ, {0}), Complement(2nπ + π, {0}))
+    expected = np.pi * np.array([-3, -2, -1, 1, 2, 3])
+    np.testing.assert_allclose(roots('sin(x)/x', -10, 10), expected)
@@ -0,0 +1,99 @@
+"""
+Кэш выборок по плиткам: совпадение с выборкой без плиток, бюджет, вытеснение.
+"""
+import numpy as np
+import pytest
+
+from utils import tile_cache
+from utils.adaptive_sampling import MAX_EVALUATIONS
+from utils.curve_buffers import function_passes, function_polylines
+from utils.tile_cache import CurveTileCache, tiled_refinement
+
+
+AREA = (0, 0, 800)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    tile_cache.clear_tile_cache()
+    yield
+    tile_cache.clear_tile_cache()
+
+
+def curve(func, key):
+    """
+    Функция с cache_key и векторизованным ядром, считающая вычисления.
+    """
+    def f(x):
+        return func(np.asarray(x, dtype=float))
+
+    def vectorized(xs):
+        f.evaluations += xs.size
+        with np.errstate(all='ignore'):
+            return func(xs)
+
+    f.vectorized = vectorized
+    f.cache_key = key
+    f.evaluations = 0
+    return f
+
+
+def final_polylines(func, view, tiled):
+    return list(function_passes([func], view, AREA, frame_time=None, tiled=tiled))[-1].polylines
+
+
+def polyline_y(polylines, screen_xs):
+    """
+    Экранный y ломаных (линейная интерполяция) в точках screen_xs; nan вне ломаных.
+    """
+    result = np.full(screen_xs.shape, np.nan)
+    for polyline in polylines:
+        points = np.asarray(polyline.points).reshape(-1, 2)
+        inside = (screen_xs >= points[0, 0]) & (screen_xs <= points[-1, 0])
+        result[inside] = np.interp(screen_xs[inside], points[:, 0], points[:, 1])
+    return result
+
+
+@pytest.mark.parametrize('expr', [lambda x: np.sin(3 * x) * x, lambda x: x ** 3 / 10, np.exp])
+def test_tiled_and_untiled_agree(expr):
+    view = (-5, 5, -5, 5)
+    tiled = final_polylines(curve(expr, ('agree', id(expr))), view, tiled=True)
+    untiled = final_polylines(curve(expr, None), view, tiled=False)
+
+    # Обе ломаные отклоняются от кривой не больше чем на допуск (0.5 px),
+    # поэтому друг от друга - не больше чем на пиксель
+    screen_xs = np.linspace(5, 795, 2000)
+    tiled_ys, untiled_ys = polyline_y(tiled, screen_xs), polyline_y(untiled, screen_xs)
+    both = np.isfinite(tiled_ys) & np.isfinite(untiled_ys)
+    assert both.sum() > 0.5 * np.isfinite(untiled_ys).sum()
+    assert np.max(np.abs(tiled_ys[both] - untiled_ys[both])) <= 1.0
+
+
+@pytest.mark.parametrize('expr', [np.tan, lambda x: 1 / x, lambda x: np.sin(100 * x)])
+def test_budget_shared_by_all_tiles(expr):
+    func = curve(expr, ('budget', id(expr)))
+    for _ in tiled_refinement(func, -5, 5, -5, 5, 800):
+        pass
+    assert func.evaluations <= MAX_EVALUATIONS
+
+
+def test_pan_reuses_cached_tiles():
+    func = curve(np.sin, 'pan')
+    function_polylines([func], (-5, 5, -5, 5), AREA)  # без плиток: кэш не трогается
+    assert tile_cache.tile_cache_info()['size'] == 0
+
+    final_polylines(func, (-5, 5, -5, 5), tiled=True)
+    first = func.evaluations
+    final_polylines(func, (-4, 6, -4, 6), tiled=True)
+    assert first > 0 and func.evaluations == first
+    assert tile_cache.tile_cache_info()['hits'] > 0
+
+
+def test_eviction_by_float_count():
+    cache = CurveTileCache(max_floats=1000)
+    for i in range(10):
+        cache.put(i, np.zeros(100), np.zeros(100), (-1, 1))
+    info = cache.info()
+    assert info['floats'] <= 1000
+    assert info['size'] == 5 and info['evictions'] == 5
+    assert cache.get(0) is None and cache.get(9) is not None
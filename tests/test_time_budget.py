@@ -0,0 +1,61 @@
+"""
+Ограничение времени: незавершённые вызовы в потоках не запускаются повторно.
+"""
+import threading
+import time
+
+import pytest
+
+from utils.time_budget import BudgetExceeded, run_with_budget
+
+
+def in_thread(func, *args, **kwargs):
+    """
+    Вызов из второго потока: с другими потоками fork не используется.
+    """
+    outcome = {}
+
+    def target():
+        try:
+            outcome['value'] = func(*args, **kwargs)
+        except BaseException as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join()
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['value']
+
+
+def test_timed_out_call_is_not_restarted():
+    release = threading.Event()
+    starts = []
+
+    def slow(x):
+        starts.append(x)
+        release.wait()
+        return x * 2
+
+    calls = {}
+    with pytest.raises(BudgetExceeded):
+        in_thread(run_with_budget, slow, 21, timeout=0.05, calls=calls)
+
+    # Тот же вызов ещё идёт: ответ сразу, без нового потока и без ожидания
+    started = time.monotonic()
+    with pytest.raises(BudgetExceeded):
+        in_thread(run_with_budget, slow, 21, timeout=5, calls=calls)
+    assert time.monotonic() - started < 1
+
+    release.set()
+    for call in calls.values():
+        call.finished.wait(5)
+    assert in_thread(run_with_budget, slow, 21, timeout=5, calls=calls) == 42
+    assert starts == [21]
+    assert calls == {}
+
+
+def test_errors_are_raised():
+    with pytest.raises(ZeroDivisionError):
+        in_thread(run_with_budget, lambda: 1 / 0, calls={})
@@ -63,5 +63,5 @@ def _on_slider_change(app_instance, param_name, label, value):
     """
     rounded_value = round(value * 2) / 2
     label.text = f"{param_name} = {rounded_value:.1f}"
-    # Перестраиваем график с новыми значениями параметров
-    app_instance._rebuild_graph_with_current_params()
\ No newline at end of file
+    # Перерисовываем график с новыми значениями параметров
+    app_instance._apply_param_values()
\ No newline at end of file
@@ -2,15 +2,20 @@
 Модуль для отрисовки осей и сетки графика
 """
 from kivy.graphics import Color, Line, Rectangle
-from kivy.core.text import Label as CoreLabel
 from kivy.metrics import dp
 import math
 
+from .label_textures import label_texture, rasterization_count
+
 
 def draw_axes_and_grid(canvas, x_min, x_max, y_min, y_max, graph_area):
     """
     Рисует оси координат, сетку и подписи на холсте.
+
+    Returns:
+        число подписей, растеризованных за этот вызов (остальные - из кэша текстур)
     """
+    rasterized = rasterization_count()
     graph_x, graph_y, graph_width, graph_height = graph_area
     side = min(graph_width, graph_height)
     square_x = graph_x + (graph_width - side) / 2
@@ -28,6 +33,7 @@ def draw_axes_and_grid(canvas, x_min, x_max, y_min, y_max, graph_area):
     # Рисуем оси
     Color(0.3, 0.3, 0.3, 1)
     _draw_axes(canvas, x_min, x_max, y_min, y_max, square_x, square_y, square_size, square_size)
+    return rasterization_count() - rasterized
 
 
 def _draw_grid(canvas, x_min, x_max, y_min, y_max, area_x, area_y, area_size, area_height):
@@ -106,13 +112,7 @@ def _draw_axis_labels(canvas, x_min, x_max, y_min, y_max, area_x, area_y, area_s
             screen_y_axis_x = _y_to_screen(0, area_y, area_size, y_min, y_max)
 
             if area_x <= screen_x <= area_x + area_size and area_y <= screen_y_axis_x <= area_y + area_size:
-                label = CoreLabel(
-                    text=str(round(x, 2)),
-                    font_size=font_size,
-                    color=label_color
-                )
-                label.refresh()
-                texture = label.texture
+                texture = label_texture(str(round(x, 2)), font_size, label_color)
                 label_x = screen_x - texture.width / 2
                 label_y = screen_y_axis_x - texture.height - dp(3)
                 if label_y >= area_y - texture.height - dp(10):
@@ -131,13 +131,7 @@ def _draw_axis_labels(canvas, x_min, x_max, y_min, y_max, area_x, area_y, area_s
             screen_x_axis_y = _x_to_screen(0, area_x, area_size, x_min, x_max)
 
             if area_y <= screen_y <= area_y + area_size and area_x <= screen_x_axis_y <= area_x + area_size:
-                label = CoreLabel(
-                    text=str(round(y, 2)),
-                    font_size=font_size,
-                    color=label_color
-                )
-                label.refresh()
-                texture = label.texture
+                texture = label_texture(str(round(y, 2)), font_size, label_color)
                 label_x = screen_x_axis_y - texture.width - dp(5)
                 label_y = screen_y - texture.height / 2
                 if label_x >= area_x - texture.width - dp(10):
@@ -1,17 +1,56 @@
 """
 Виджет для рисования графика
 """
+from kivy.clock import Clock
 from kivy.uix.widget import Widget
-from kivy.graphics import Color, Line, Rectangle, Ellipse
+from kivy.graphics import Canvas, Color, Line, Rectangle, Ellipse, PushMatrix, PopMatrix, Translate, Scale
 from kivy.metrics import dp
-from kivy.core.text import Label as CoreLabel
+from functools import partial
+from utils.curve_buffers import function_passes, parametric_passes
+from .label_textures import label_texture, rasterization_count
 import math
+import threading
+
+
+# Слои холста снизу вверх; каждый перестраивается независимо (см. GraphWidget.draw)
+LAYERS = ('background', 'grid', 'axes', 'labels', 'curves', 'markers', 'border')
 
 
 class GraphWidget(Widget):
-    """Виджет для рисования графика"""
+    """
+    Виджет для рисования графика
+
+    Холст разделён на слои (LAYERS). Слои строятся в координатах квадрата
+    графика (начало в левом нижнем углу, сторона layout_size), а положение и
+    масштаб на экране задаёт общее преобразование Translate/Scale. Поэтому
+    изменение размера виджета меняет только преобразование, а draw()
+    перестраивает лишь слои, чьё содержимое изменилось: при движении
+    слайдера - кривые, при смене видимой области - ещё сетку, оси и подписи.
+
+    Изменения (set_functions, set_parametric, set_ranges, intersection_points,
+    draw) только помечают виджет как требующий перерисовки; сама перерисовка
+    выполняется не чаще одного раза за кадр (Clock.create_trigger).
+    redraw_requests и redraws - счётчики запросов и фактических перерисовок.
+
+    Кривые вычисляются в фоновом потоке (utils.curve_buffers): главный
+    поток только строит Line из готовых списков вершин. Пока вычисление
+    идёт, на экране остаются прежние кривые. Каждое задание получает номер
+    (_curve_job); результат задания, которое уже заменено более новым,
+    отбрасывается (stale_curve_results), так что устаревший кадр не рисуется.
+
+    Дорогая кривая показывается постепенно: сначала грубая (начальная сетка
+    выборки), затем уточнённая, но не чаще раза за кадр; curve_passes -
+    сколько проходов последнего задания было показано.
+    Выборки функций хранятся в кэше плиток (utils.tile_cache), поэтому при
+    сдвиге видимой области вычисляется только открывшаяся полоса.
+    """
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        self._dirty = False
+        self.redraw_requests = 0
+        self.redraws = 0
+        # timeout -1: перед отрисовкой следующего кадра
+        self._redraw_trigger = Clock.create_trigger(self._redraw, -1)
         self.function = None
         self.x_min = -5
         self.x_max = 5
@@ -22,11 +61,35 @@ class GraphWidget(Widget):
         self.t_max = 6.28
         self.points = []
         self.functions = []
-        self.intersection_points = []
+        self._intersection_points = []
         self.is_parametric = False
         self.x_func = None
         self.y_func = None
         self.graph_padding = dp(20)
+        # Допуск упрощения параметрической кривой в пикселях (None - без упрощения)
+        self.simplify_tolerance = 0.5
+
+        # Слои и ключи их содержимого: слой перестраивается, когда ключ изменился
+        self.layers = {name: Canvas() for name in LAYERS}
+        self.layer_builds = dict.fromkeys(LAYERS, 0)
+        self.label_rasterizations = 0
+        self._layer_keys = {}
+        # Фоновое вычисление кривых: номер последнего задания и его ключ
+        self._curve_job = 0
+        self._pending_curves_key = None
+        self._latest_curve_pass = 0
+        self.stale_curve_results = 0
+        self.curve_passes = 0
+        self.layout_size = None
+        self._translate = Translate(0, 0)
+        self._scale = Scale(1, 1, 1)
+        self.canvas.add(PushMatrix())
+        self.canvas.add(self._translate)
+        self.canvas.add(self._scale)
+        for name in LAYERS:
+            self.canvas.add(self.layers[name])
+        self.canvas.add(PopMatrix())
+
         self.bind(size=self.on_size, pos=self.on_size)
 
     def set_parametric(self, x_func, y_func, t_min=0, t_max=6.28):
@@ -41,10 +104,15 @@ class GraphWidget(Widget):
         self.t_min = t_min
         self.t_max = t_max
         self.functions = []
-        self.intersection_points = []
+        self._intersection_points = []
+        self.request_redraw()
 
     def on_size(self, *args):
-        self.draw()
+        # Слои уже построены: достаточно сдвинуть и масштабировать их
+        if self.layout_size is None:
+            self.request_redraw()
+        else:
+            self._update_transform()
 
     def set_functions(self, funcs):
         """
@@ -54,7 +122,8 @@ class GraphWidget(Widget):
         self.x_func = None
         self.y_func = None
         self.functions = funcs if funcs else []
-        self.intersection_points = []
+        self._intersection_points = []
+        self.request_redraw()
 
     def set_ranges(self, x_min, x_max, y_min, y_max):
         """
@@ -64,16 +133,44 @@ class GraphWidget(Widget):
         self.x_max = float(x_max)
         self.y_min = float(y_min)
         self.y_max = float(y_max)
-        if self.function or self.functions or self.is_parametric:
-            self.draw()
+        self.request_redraw()
+
+    @property
+    def intersection_points(self):
+        return self._intersection_points
+
+    @intersection_points.setter
+    def intersection_points(self, points):
+        self._intersection_points = points
+        self.request_redraw()
+
+    def request_redraw(self):
+        """
+        Помечает график как изменившийся; перерисовка - в следующем кадре,
+        сколько бы запросов ни пришло до него.
+        """
+        self._dirty = True
+        self.redraw_requests += 1
+        self._redraw_trigger()
 
     def draw(self):
-        self.canvas.clear()
-        self.points = []
+        """
+        Запрашивает перерисовку (см. request_redraw).
+        """
+        self.request_redraw()
 
-        if not self.functions and not (self.is_parametric and self.x_func and self.y_func):
+    def _redraw(self, *args):
+        if not self._dirty:
             return
+        self._dirty = False
+        self.redraws += 1
+        # print(f"🖌️ Перерисовка #{self.redraws} (запросов: {self.redraw_requests})") # DEBUG
+        self.rebuild_layers()
 
+    def _square(self):
+        """
+        Квадрат графика на экране: (x, y, сторона).
+        """
         self.graph_area = (
             self.x + self.graph_padding,
             self.y + self.graph_padding,
@@ -82,85 +179,181 @@ class GraphWidget(Widget):
         )
         graph_x, graph_y, graph_width, graph_height = self.graph_area
         side = min(graph_width, graph_height)
-        square_x = graph_x + (graph_width - side) / 2
-        square_y = graph_y + (graph_height - side) / 2
-        square_size = side
-
-        with self.canvas:
-            Color(1, 1, 1, 1)
-            Rectangle(pos=(square_x, square_y), size=(square_size, square_size))
-            Color(0.6, 0.6, 0.6, 0.8)
-            self._draw_grid(square_x, square_y, square_size, square_size)
-            Color(0.3, 0.3, 0.3, 1)
-            self._draw_axes(square_x, square_y, square_size, square_size)
-
-            # Рисуем в зависимости от режима
-            if self.is_parametric:
-                self._draw_parametric(square_x, square_y, square_size, square_size)
-            else:
-                self._draw_function(square_x, square_y, square_size, square_size)
+        return graph_x + (graph_width - side) / 2, graph_y + (graph_height - side) / 2, side
 
-            Color(0.8, 0.8, 0.8, 0.3)
-            Line(rectangle=(square_x, square_y, square_size, square_size), width=1)
+    def _update_transform(self):
+        """
+        Переносит слои, построенные со стороной layout_size, в текущий квадрат графика.
+        """
+        square_x, square_y, side = self._square()
+        self._translate.xy = (square_x, square_y)
+        factor = side / self.layout_size if self.layout_size else 1
+        self._scale.xyz = (factor, factor, 1)
+
+    def _layer_key(self, name):
+        """
+        Всё, от чего зависит содержимое слоя; одинаковый ключ - слой не перестраивается.
+        """
+        view = (self.x_min, self.x_max, self.y_min, self.y_max)
+        if name in ('background', 'border'):
+            return ()
+        if name in ('grid', 'axes', 'labels'):
+            return view
+        if name == 'curves':
+            # Кривые приходят из потока позже: сторона квадрата - часть ключа,
+            # чтобы не показать вершины, посчитанные для прежнего размера
+            if self.is_parametric:
+                return view + (self.layout_size, self.x_func, self.y_func,
+                               self.t_min, self.t_max, self.simplify_tolerance)
+            return view + (self.layout_size,) + tuple(self.functions)
+        return view + tuple(tuple(p) for p in self.intersection_points)
 
-    def _draw_parametric(self, area_x, area_y, area_size, area_height):
+    def rebuild_layers(self):
         """
-        Рисует параметрическую кривую x(t), y(t)
+        Перестраивает слои, содержимое которых изменилось с прошлого вызова.
         """
-        if not self.x_func or not self.y_func:
-            print("⚠️ x_func или y_func не установлены!")
+        self.points = []
+
+        if not self.functions and not (self.is_parametric and self.x_func and self.y_func):
+            for layer in self.layers.values():
+                layer.clear()
+            self._layer_keys.clear()
+            self._cancel_curves()
             return
 
-        print(f"\n🎨 === РИСУЕМ ПАРАМЕТРИЧЕСКУЮ КРИВУЮ ===")
-        print(f"   Диапазон параметра t: [{self.t_min:.2f}, {self.t_max:.2f}]")
-        print(f"   Видимая область X: [{self.x_min:.2f}, {self.x_max:.2f}]")
-        print(f"   Видимая область Y: [{self.y_min:.2f}, {self.y_max:.2f}]")
-
-        with self.canvas:
-            Color(0, 0.5, 1, 1)  # голубой
-            points = []
-
-            num_points = 2000
-            valid_points = 0
-
-            for i in range(num_points + 1):
-                t = self.t_min + (i / num_points) * (self.t_max - self.t_min)
-                try:
-                    x = self.x_func(t)
-                    y = self.y_func(t)
-
-                    if i == 0:
-                        print(f"   Первая точка: t={t:.2f} → x={x:.2f}, y={y:.2f}")
-
-                    if isinstance(x, (int, float)) and isinstance(y, (int, float)):
-                        if not (math.isnan(x) or math.isnan(y) or math.isinf(x) or math.isinf(y)):
-                            # Стандартное масштабирование
-                            screen_x = self._x_to_screen(x, area_x, area_size)
-                            screen_y = self._y_to_screen(y, area_y, area_size)
-
-                            if i == 0:
-                                print(f"   На экране: screen_x={screen_x:.1f}, screen_y={screen_y:.1f}")
-
-                            # Проверяем что точка в видимой области
-                            if (area_x <= screen_x <= area_x + area_size and
-                                area_y <= screen_y <= area_y + area_size):
-                                points.extend([screen_x, screen_y])
-                                valid_points += 1
-                except Exception as e:
-                    if i == 0:
-                        print(f"   ❌ Ошибка в первой точке: {e}")
-                    continue
-
-            print(f"   ✅ Найдено {valid_points} валидных точек из {num_points}")
-
-            if len(points) >= 4:
-                Line(points=points, width=2.5, cap='round', joint='round')
-                print(f"   ✅ Кривая нарисована ({len(points)//2} точек)")
+        _, _, side = self._square()
+        if side != self.layout_size:
+            # Новый размер квадрата: все слои строятся заново в новом разрешении
+            self.layout_size = side
+            self._layer_keys.clear()
+        self._update_transform()
+
+        builders = {
+            'background': self._draw_background,
+            'grid': self._draw_grid,
+            'axes': self._draw_axes,
+            'labels': self._draw_axis_labels,
+            'markers': self._draw_intersections,
+            'border': self._draw_border,
+        }
+        rasterized = rasterization_count()
+        for name in LAYERS:
+            key = self._layer_key(name)
+            if name in self._layer_keys and self._layer_keys[name] == key:
+                continue
+            if name == 'curves':
+                self._start_curves(key, side)
+                continue
+            layer = self.layers[name]
+            layer.clear()
+            with layer:
+                builders[name](0, 0, side, side)
+            self._layer_keys[name] = key
+            self.layer_builds[name] += 1
+
+        # Подписи берутся из кэша текстур; растеризуются только новые
+        self.label_rasterizations = rasterization_count() - rasterized
+        # print(f"🏷️ Растеризовано подписей за кадр: {self.label_rasterizations}") # DEBUG
+
+    def _start_curves(self, key, side):
+        """
+        Запускает вычисление кривых в фоновом потоке; слой 'curves'
+        перестроит _show_curves, когда вершины будут готовы.
+        """
+        if key == self._pending_curves_key:
+            return  # то же задание уже выполняется
+
+        self._curve_job += 1
+        job = self._curve_job
+        self._pending_curves_key = key
+        self.curve_passes = 0
+
+        # Поток получает копию состояния: виджет может измениться, пока он работает
+        view = (self.x_min, self.x_max, self.y_min, self.y_max)
+        area = (0, 0, side)
+        if self.is_parametric:
+            args = (job, key, None, (self.x_func, self.y_func, self.t_min, self.t_max,
+                                     self.simplify_tolerance), view, area)
+        else:
+            args = (job, key, list(self.functions), None, view, area)
+        threading.Thread(target=self._curves_worker, args=args, daemon=True).start()
+
+    def _cancel_curves(self):
+        """
+        Делает выполняющееся задание устаревшим: его результат не будет нарисован.
+        """
+        self._curve_job += 1
+        self._pending_curves_key = None
+
+    def _curves_worker(self, job, key, functions, parametric, view, area):
+        """
+        Фоновый поток: выборка, отсечение и прореживание кривых без Kivy.
+        Каждый проход (от грубого к точному) передаётся главному потоку.
+        """
+        try:
+            if parametric is not None:
+                x_func, y_func, t_min, t_max, tolerance = parametric
+                print(f"\n🎨 === РИСУЕМ ПАРАМЕТРИЧЕСКУЮ КРИВУЮ ===")
+                print(f"   Диапазон параметра t: [{t_min:.2f}, {t_max:.2f}]")
+                print(f"   Видимая область X: [{view[0]:.2f}, {view[1]:.2f}]")
+                print(f"   Видимая область Y: [{view[2]:.2f}, {view[3]:.2f}]")
+                passes = parametric_passes(x_func, y_func, t_min, t_max, view, area, tolerance)
             else:
+                passes = function_passes(functions, view, area, tiled=True)
+
+            for number, curve_pass in enumerate(passes, 1):
+                if job != self._curve_job:
+                    return  # задание заменено более новым
+                self._latest_curve_pass = number
+                Clock.schedule_once(partial(self._show_curves, job, key, number, curve_pass))
+        except Exception as e:
+            print(f"❌ Ошибка вычисления кривых: {e}")
+            return
+
+        if parametric is not None:
+            print(f"   ✅ Найдено {curve_pass.visible} валидных точек из {curve_pass.sampled}")
+            if tolerance:
+                print(f"   ✅ Вершин после упрощения: {curve_pass.visible} → {curve_pass.vertices}")
+            if not curve_pass.polylines:
                 print(f"   ⚠️ Недостаточно точек для отрисовки!")
-                print(f"   Возможно, кривая вне видимой области [{self.x_min}, {self.x_max}] × [{self.y_min}, {self.y_max}]")
+                print(f"   Возможно, кривая вне видимой области "
+                      f"[{view[0]}, {view[1]}] × [{view[2]}, {view[3]}]")
+
+    def _show_curves(self, job, key, number, curve_pass, *args):
+        """
+        Главный поток: строит инструкции слоя 'curves' из готовых вершин.
+        """
+        if job != self._curve_job:
+            self.stale_curve_results += 1
+            return
+        if not curve_pass.done and number != self._latest_curve_pass:
+            return  # за этот кадр пришёл более точный проход
+
+        layer = self.layers['curves']
+        layer.clear()
+        with layer:
+            for polyline in curve_pass.polylines:
+                Color(*polyline.color)
+                Line(points=polyline.points, width=2.5, cap='round', joint='round')
+        self.curve_passes += 1
+
+        if curve_pass.done:
+            self._pending_curves_key = None
+            self._layer_keys['curves'] = key
+            self.layer_builds['curves'] += 1
+            # print(f"📈 Кривые уточнены за {self.curve_passes} прох. "
+            #       f"({curve_pass.sampled} точек, {curve_pass.vertices} вершин)") # DEBUG
+
+    def _draw_background(self, area_x, area_y, area_size, area_height):
+        Color(1, 1, 1, 1)
+        Rectangle(pos=(area_x, area_y), size=(area_size, area_size))
+
+    def _draw_border(self, area_x, area_y, area_size, area_height):
+        Color(0.8, 0.8, 0.8, 0.3)
+        Line(rectangle=(area_x, area_y, area_size, area_size), width=1)
 
     def _draw_grid(self, area_x, area_y, area_size, area_height):
+        Color(0.6, 0.6, 0.6, 0.8)
         x_pixels_per_unit = area_size / (self.x_max - self.x_min)
         y_pixels_per_unit = area_size / (self.y_max - self.y_min)
         pixels_per_unit = min(x_pixels_per_unit, y_pixels_per_unit)
@@ -199,8 +392,10 @@ class GraphWidget(Widget):
 
     def _draw_axes(self, area_x, area_y, area_size, area_height):
         """
-        Рисует оси координат с подписями
+        Рисует оси координат (подписи - отдельный слой, см. _draw_axis_labels)
         """
+        Color(0.3, 0.3, 0.3, 1)
+
         # Ось X (где y=0)
         screen_y = self._y_to_screen(0, area_y, area_size)
         if area_y <= screen_y <= area_y + area_size:
@@ -223,8 +418,6 @@ class GraphWidget(Widget):
                 screen_x + arrow_size/2, area_y + area_size - arrow_size
             ], width=1.5)
 
-        self._draw_axis_labels(area_x, area_y, area_size, area_height)
-
     def _draw_axis_labels(self, area_x, area_y, area_size, area_height):
         """
         Рисует текстовые подписи рядом с осями координат
@@ -243,13 +436,7 @@ class GraphWidget(Widget):
                 screen_y_axis_x = self._y_to_screen(0, area_y, area_size)
 
                 if area_x <= screen_x <= area_x + area_size and area_y <= screen_y_axis_x <= area_y + area_size:
-                    label = CoreLabel(
-                        text=str(round(x, 2)),
-                        font_size=font_size,
-                        color=label_color
-                    )
-                    label.refresh()
-                    texture = label.texture
+                    texture = label_texture(str(round(x, 2)), font_size, label_color)
                     label_x = screen_x - texture.width / 2
                     label_y = screen_y_axis_x - texture.height - dp(3)
                     if label_y >= area_y - texture.height - dp(10):
@@ -268,13 +455,7 @@ class GraphWidget(Widget):
                 screen_x_axis_y = self._x_to_screen(0, area_x, area_size)
 
                 if area_y <= screen_y <= area_y + area_size and area_x <= screen_x_axis_y <= area_x + area_size:
-                    label = CoreLabel(
-                        text=str(round(y, 2)),
-                        font_size=font_size,
-                        color=label_color
-                    )
-                    label.refresh()
-                    texture = label.texture
+                    texture = label_texture(str(round(y, 2)), font_size, label_color)
                     label_x = screen_x_axis_y - texture.width - dp(5)
                     label_y = screen_y - texture.height / 2
                     if label_x >= area_x - texture.width - dp(10):
@@ -282,58 +463,11 @@ class GraphWidget(Widget):
                         Rectangle(texture=texture, pos=(label_x, label_y), size=texture.size)
             y += y_unit_step
 
-    def _draw_function(self, area_x, area_y, area_size, area_height):
-        if not self.functions:
-            return
-
-        colors = [(0, 0, 1), (1, 0, 0)]
-
-        for idx, func in enumerate(self.functions):
-            points = []
-            num_points = max(1000, int(area_size * 3))
-            for i in range(num_points + 1):
-                x = self.x_min + (i / num_points) * (self.x_max - self.x_min)
-                try:
-                    y = func(x)
-                    if math.isnan(y) or math.isinf(y):
-                        if len(points) > 2:
-                            Color(*colors[idx])
-                            Line(points=points, width=2.5, cap='round', joint='round')
-                        points = []
-                        continue
-
-                    if y < self.y_min or y > self.y_max:
-                        if len(points) > 2:
-                            Color(*colors[idx])
-                            Line(points=points, width=2.5, cap='round', joint='round')
-                        points = []
-                        continue
-
-                    screen_x = self._x_to_screen(x, area_x, area_size)
-                    screen_y = self._y_to_screen(y, area_y, area_size)
-
-                    if area_x <= screen_x <= area_x + area_size:
-                        points.append(screen_x)
-                        points.append(screen_y)
-                    else:
-                        if len(points) > 2:
-                            Color(*colors[idx])
-                            Line(points=points, width=2.5, cap='round', joint='round')
-                        points = []
-
-                except Exception:
-                    if len(points) > 2:
-                        Color(*colors[idx])
-                        Line(points=points, width=2.5, cap='round', joint='round')
-                    points = []
-                    continue
-
-            if len(points) >= 2:
-                Color(*colors[idx])
-                Line(points=points, width=2.5, cap='round', joint='round')
-
-        # Рисуем точки пересечения
-        if self.intersection_points:
+    def _draw_intersections(self, area_x, area_y, area_size, area_height):
+        """
+        Рисует точки пересечения
+        """
+        if self.intersection_points and not self.is_parametric:
             Color(0, 0, 0)
             for x, y in self.intersection_points:
                 screen_x = self._x_to_screen(x, area_x, area_size)
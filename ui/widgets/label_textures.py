@@ -0,0 +1,91 @@
+"""
+Кэш текстур подписей осей.
+
+Растеризация текста (CoreLabel.refresh) и загрузка текстуры - одна из
+самых дорогих операций Kivy на Android, а подписи делений ("1", "-2.5")
+при перерисовке почти всегда те же. Кэш сопоставляет (текст, размер шрифта,
+цвет) готовую текстуру и ограничен по размеру (LRU), как кэш выражений.
+"""
+import threading
+from collections import OrderedDict
+
+from kivy.core.text import Label as CoreLabel
+
+
+class LabelTextureCache:
+    """
+    LRU-кэш текстур с ключом (text, font_size, color).
+    rasterizations - сколько раз текст действительно растеризовался.
+    """
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.rasterizations = 0
+        self.evictions = 0
+
+    def get(self, text, font_size, color):
+        key = (text, font_size, tuple(color))
+
+        with self._lock:
+            texture = self._entries.get(key)
+            if texture is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return texture
+
+        label = CoreLabel(text=text, font_size=font_size, color=color)
+        label.refresh()
+        texture = label.texture
+
+        with self._lock:
+            self.rasterizations += 1
+            self._entries[key] = texture
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return texture
+
+    def info(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'rasterizations': self.rasterizations,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.rasterizations = self.evictions = 0
+
+
+_cache = LabelTextureCache()
+
+
+def label_texture(text, font_size, color):
+    """
+    Текстура подписи; текст растеризуется только при промахе кэша.
+    """
+    return _cache.get(text, font_size, color)
+
+
+def rasterization_count():
+    """
+    Сколько подписей растеризовано с начала работы (для подсчёта за кадр).
+    """
+    return _cache.info()['rasterizations']
+
+
+def texture_cache_info():
+    """
+    Счётчики кэша: hits, rasterizations, evictions, size, maxsize.
+    """
+    return _cache.info()
+
+
+def clear_texture_cache():
+    _cache.clear()
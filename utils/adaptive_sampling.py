@@ -0,0 +1,158 @@
+"""
+Адаптивная выборка точек кривой для отрисовки.
+
+Кривая сначала вычисляется на грубой равномерной сетке, затем каждый
+отрезок делится пополам, только если его середина на экране отклоняется
+от середины хорды больше чем на tolerance пикселей. Прямые участки остаются
+грубыми, а изгибы, быстрые колебания и окрестности полюсов получают
+столько точек, сколько нужно для гладкой линии. Все середины одного уровня
+вычисляются одним вызовом векторизованного ядра.
+
+Число вычислений функции ограничено бюджетом: если на очередном уровне
+кандидатов больше, чем осталось вычислений, делятся отрезки с наибольшим
+отклонением.
+
+adaptive_refinement выдаёт выборку после начальной сетки и после каждого
+уровня деления, чтобы кривую можно было показывать грубой и уточнять
+по мере вычисления; adaptive_sample возвращает только итог.
+
+Несколько выборок одной кривой (плитки, см. utils.tile_cache) могут делить
+один бюджет - EvaluationBudget.
+"""
+import numpy as np
+
+
+# Отрезков в начальной равномерной сетке
+INITIAL_SEGMENTS = 128
+
+# Допустимое отклонение середины отрезка от середины хорды, пиксели
+PIXEL_TOLERANCE = 0.5
+
+# Предел вычислений на одну кривую
+MAX_EVALUATIONS = 6000
+
+# Наибольшее число делений начального отрезка (ширина не меньше 1/2^20 от него)
+MAX_DEPTH = 20
+
+
+class EvaluationBudget:
+    """
+    Общий предел вычислений для нескольких выборок одной кривой.
+    remaining - сколько вычислений осталось (после начальных сеток
+    может стать отрицательным: сетки вычисляются всегда).
+    """
+    def __init__(self, limit=MAX_EVALUATIONS):
+        self.limit = limit
+        self.remaining = limit
+
+    @property
+    def used(self):
+        return self.limit - self.remaining
+
+    @property
+    def exhausted(self):
+        return self.remaining <= 0
+
+
+def _chord_error(ax, ay, bx, by, mx, my):
+    """
+    Расстояние (в пикселях) от точки кривой M в середине отрезка параметра
+    до середины хорды AB. Расстояние до самой прямой AB не годится: у почти
+    вертикальной хорды (sin(1/x) у нуля) оно мало, даже если M далеко от неё.
+    Если определена только часть из трёх точек (разрыв, край области
+    определения), отклонение бесконечно: такой отрезок делится дальше.
+    """
+    with np.errstate(all='ignore'):
+        error = np.hypot(mx - (ax + bx) / 2, my - (ay + by) / 2)
+
+    finite = [np.isfinite(x) & np.isfinite(y) for x, y in ((ax, ay), (bx, by), (mx, my))]
+    defined = finite[0].astype(int) + finite[1] + finite[2]
+    error = np.where(defined == 3, error, np.inf)
+    return np.where(defined == 0, 0.0, error)
+
+
+def _outside(xs, ys, bounds):
+    """
+    Все точки (по строкам) лежат по одну сторону от прямоугольника bounds.
+    """
+    left, bottom, right, top = bounds
+    with np.errstate(invalid='ignore'):
+        return ((xs < left).all(axis=0) | (xs > right).all(axis=0) |
+                (ys < bottom).all(axis=0) | (ys > top).all(axis=0))
+
+
+def adaptive_sample(points, t_min, t_max, tolerance=PIXEL_TOLERANCE,
+                    budget=MAX_EVALUATIONS, bounds=None):
+    """
+    Точки кривой на [t_min, t_max], достаточные для отрисовки с точностью tolerance.
+
+    Args и результат - как у adaptive_refinement (его последний шаг).
+    """
+    for ts, xs, ys in adaptive_refinement(points, t_min, t_max, tolerance, budget, bounds):
+        pass
+    return ts, xs, ys
+
+
+def adaptive_refinement(points, t_min, t_max, tolerance=PIXEL_TOLERANCE,
+                        budget=MAX_EVALUATIONS, bounds=None, segments=INITIAL_SEGMENTS):
+    """
+    Генератор последовательно уточняемых выборок кривой на [t_min, t_max].
+
+    Первая выборка - равномерная сетка из segments отрезков, каждая
+    следующая - после очередного уровня деления; последняя совпадает с
+    результатом adaptive_sample. Выданные массивы потом не изменяются.
+
+    Args:
+        points: функция массива значений параметра -> (screen_xs, screen_ys);
+                неопределённые точки - nan
+        tolerance: допустимое отклонение от середины хорды в пикселях
+        budget: наибольшее число вычислений points (в точках) или
+                EvaluationBudget, общий для нескольких выборок
+        bounds: (left, bottom, right, top) видимой области на экране;
+                отрезки целиком по одну сторону от неё не уточняются
+        segments: число отрезков начальной сетки
+
+    Yields:
+        (ts, screen_xs, screen_ys) - массивы по возрастанию t
+    """
+    if not isinstance(budget, EvaluationBudget):
+        budget = EvaluationBudget(budget)
+
+    ts = np.linspace(t_min, t_max, segments + 1)
+    xs, ys = (np.asarray(v, dtype=float) for v in points(ts))
+    budget.remaining -= ts.size
+    yield ts, xs, ys
+
+    candidates = np.arange(segments)
+    priority = np.zeros(segments)
+    min_width = (t_max - t_min) / segments / 2 ** MAX_DEPTH
+
+    while candidates.size and budget.remaining > 0:
+        if candidates.size > budget.remaining:
+            # Бюджет кончается: уточняются отрезки с наибольшим отклонением
+            candidates = np.sort(candidates[np.argsort(-priority)[:budget.remaining]])
+        budget.remaining -= candidates.size
+
+        mids = (ts[candidates] + ts[candidates + 1]) / 2
+        mid_xs, mid_ys = (np.asarray(v, dtype=float) for v in points(mids))
+        error = _chord_error(xs[candidates], ys[candidates],
+                             xs[candidates + 1], ys[candidates + 1], mid_xs, mid_ys)
+
+        refine = (error > tolerance) & ((ts[candidates + 1] - ts[candidates]) / 2 > min_width)
+        if bounds is not None:
+            seg_xs = np.vstack((xs[candidates], mid_xs, xs[candidates + 1]))
+            seg_ys = np.vstack((ys[candidates], mid_ys, ys[candidates + 1]))
+            refine &= ~_outside(seg_xs, seg_ys, bounds)
+
+        # Середина вставляется после левого конца; индексы правее сдвигаются
+        # на число вставок перед ними
+        ts = np.insert(ts, candidates + 1, mids)
+        xs = np.insert(xs, candidates + 1, mid_xs)
+        ys = np.insert(ys, candidates + 1, mid_ys)
+
+        left = candidates + np.arange(candidates.size)
+        candidates = np.concatenate((left[refine], left[refine] + 1))
+        priority = np.concatenate((error[refine], error[refine]))
+        order = np.argsort(candidates)
+        candidates, priority = candidates[order], priority[order]
+        yield ts, xs, ys
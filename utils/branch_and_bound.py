@@ -0,0 +1,234 @@
+"""
+Метод ветвей и границ поверх интервальной оценки функции.
+
+Отрезок делится на части; для каждой части интервальная оценка
+(func.interval, см. parsers.interval_arithmetic) гарантированно
+ограничивает значения функции. Части, которые заведомо не содержат
+корня или не могут улучшить найденный минимум (максимум), отбрасываются,
+остальные делятся пополам. Работа сосредотачивается около корней,
+экстремумов и полюсов, а не распределяется по сетке равномерно.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from utils.math_utils import evaluate_array
+from utils.root_finding import refine_roots
+
+
+# Гарантированные границы значений на отрезке (lower <= f <= upper, возможно ±∞)
+# и достигнутые значения low, high, найденные в процессе поиска
+RangeEnclosure = namedtuple('RangeEnclosure', 'lower upper low high')
+
+# На сколько частей делится отрезок перед первой итерацией
+_INITIAL_BOXES = 64
+
+# Предел числа частей на одной итерации; при превышении поиск останавливается
+MAX_BOXES = 4096
+
+# Наибольшая глубина деления (часть не уже (x_max - x_min) / 64 / 2^40)
+MAX_DEPTH = 40
+
+
+def _initial_boxes(x_min, x_max):
+    edges = np.linspace(x_min, x_max, _INITIAL_BOXES + 1)
+    return edges[:-1], edges[1:]
+
+
+def _split(lo, hi):
+    mid = (lo + hi) / 2
+    return np.concatenate((lo, mid)), np.concatenate((mid, hi))
+
+
+def _lower_bound(func, interval, x_min, x_max, sign, rtol):
+    """
+    Гарантированная нижняя граница и наименьшее найденное значение sign·f.
+    """
+    lo, hi = _initial_boxes(x_min, x_max)
+    # Концы отрезка и частей: экстремум на краю отрезка не будет серединой части
+    with np.errstate(invalid='ignore'):
+        edges = sign * evaluate_array(func, np.append(lo, x_max))
+    edges = edges[np.isfinite(edges)]
+    best = float(edges.min()) if edges.size else np.inf
+    settled = np.inf
+    singular = np.array([])
+
+    for depth in range(MAX_DEPTH + 1):
+        with np.errstate(invalid='ignore'):
+            values = sign * evaluate_array(func, (lo + hi) / 2)
+            finite = values[np.isfinite(values)]
+            if finite.size:
+                best = min(best, float(finite.min()))
+
+            f_lo, f_hi = interval(lo, hi)
+            bound = f_lo if sign > 0 else -f_hi
+            defined = ~np.isnan(bound)
+            lo, hi, bound = lo[defined], hi[defined], bound[defined]
+
+            # Части, где sign·f не может быть заметно меньше best, больше не делим
+            tol = rtol * max(1.0, abs(best)) if np.isfinite(best) else 0.0
+            useful = bound < best - tol
+        if (~useful).any():
+            settled = min(settled, float(bound[~useful].min()))
+        lo, hi, bound = lo[useful], hi[useful], bound[useful]
+
+        if lo.size == 0 or depth == MAX_DEPTH or lo.size * 2 > MAX_BOXES:
+            break
+        lo, hi = _split(lo, hi)
+
+    if lo.size:
+        infinite = np.isinf(bound)
+        if (~infinite).any():
+            settled = min(settled, float(bound[~infinite].min()))
+        singular = ((lo + hi) / 2)[infinite]
+
+    # Бесконечная оценка в узкой части - полюс или устранимая особенность (sin(x)/x):
+    # проверяем, растёт ли функция при приближении к точке
+    span = x_max - x_min
+    for center in singular[:16].tolist():
+        if _diverges(func, center, span, sign):
+            return -np.inf, best
+        probe = _probe(func, center, span, sign)
+        best = min([best] + probe[np.isfinite(probe)].tolist())
+
+    if singular.size > 16:
+        return -np.inf, best
+    return min(settled, best), best
+
+
+def _probe(func, center, span, sign):
+    """
+    min(sign·f) слева и справа от center на расстояниях span·10^-3, 10^-6, 10^-9, 10^-12.
+    """
+    steps = span * 10.0 ** -np.arange(3, 15, 3)
+    with np.errstate(invalid='ignore'):
+        values = sign * np.vstack((evaluate_array(func, center - steps),
+                                   evaluate_array(func, center + steps)))
+        return np.nanmin(np.where(np.isfinite(values), values, np.nan), axis=0)
+
+
+def _diverges(func, center, span, sign):
+    """
+    sign·f уходит в -∞ у center: значения убывают при приближении,
+    и шаги убывания не затухают (1/x, log(x)), в отличие от сходящихся (sin(x)/x).
+    """
+    with np.errstate(all='ignore'):
+        values = _probe(func, center, span, sign)
+    if not np.isfinite(values).all():
+        return False
+    drops = values[:-1] - values[1:]
+    return bool((drops > 0).all() and drops[-1] >= 0.5 * drops[0])
+
+
+def enclose_range(func, x_min, x_max, rtol=1e-4):
+    """
+    Гарантированные границы значений func на [x_min, x_max].
+
+    Args:
+        func: функция с атрибутом interval (и vectorized)
+        rtol: относительная точность, с которой граница приближает
+              достигнутый минимум (максимум)
+
+    Returns:
+        RangeEnclosure или None, если у func нет интервальной оценки
+    """
+    interval = getattr(func, 'interval', None)
+    if interval is None:
+        return None
+
+    lower, low = _lower_bound(func, interval, x_min, x_max, 1, rtol)
+    upper, high = _lower_bound(func, interval, x_min, x_max, -1, rtol)
+    return RangeEnclosure(lower, -upper, low, -high)
+
+
+def isolate_roots(interval, x_min, x_max, width):
+    """
+    Части [x_min, x_max] шириной не больше width, которые могут содержать корень.
+    Все остальные части доказанно корней не содержат.
+
+    Returns:
+        (lo, hi) - массивы концов частей по возрастанию или None, если частей
+        оказалось больше MAX_BOXES (функция слишком часто близка к нулю)
+    """
+    lo, hi = _initial_boxes(x_min, x_max)
+
+    while lo.size:
+        f_lo, f_hi = interval(lo, hi)
+        with np.errstate(invalid='ignore'):
+            maybe_root = (f_lo <= 0) & (f_hi >= 0)
+        lo, hi = lo[maybe_root], hi[maybe_root]
+
+        if (hi - lo <= width).all():
+            break
+        if lo.size * 2 > MAX_BOXES:
+            return None
+        narrow = hi - lo <= width
+        split_lo, split_hi = _split(lo[~narrow], hi[~narrow])
+        lo = np.concatenate((lo[narrow], split_lo))
+        hi = np.concatenate((hi[narrow], split_hi))
+
+    order = np.argsort(lo)
+    return lo[order], hi[order]
+
+
+def _domain_edge(func, lo, hi, defined_at_lo, iterations=60):
+    """
+    Край области определения внутри [lo, hi]: ближайшая к нему точка, где
+    функция определена. defined_at_lo - маска частей, определённых слева.
+    """
+    inside = np.where(defined_at_lo, lo, hi)
+    outside = np.where(defined_at_lo, hi, lo)
+    for _ in range(iterations):
+        mid = (inside + outside) / 2
+        defined = np.isfinite(func(mid))
+        inside = np.where(defined, mid, inside)
+        outside = np.where(defined, outside, mid)
+    return inside
+
+
+def find_roots(func, interval, x_min, x_max, width, touch_tol=1e-6):
+    """
+    Корни func на [x_min, x_max]: части без корней отбрасываются интервальной
+    оценкой, в остальных корень уточняется (utils.root_finding).
+
+    Смена знака через полюс отбрасывается: в уточнённой точке |f| не меньше,
+    чем на концах части. Касание нуля без смены знака (x^2) принимается,
+    если |f| < touch_tol в середине части или на краю области определения.
+
+    Args:
+        func: функция массива точек (как для refine_roots)
+        interval: интервальная оценка той же функции
+        width: ширина частей, в которых ищется корень
+
+    Returns:
+        список корней по возрастанию или None (см. isolate_roots)
+    """
+    boxes = isolate_roots(interval, x_min, x_max, width)
+    if boxes is None:
+        return None
+    lo, hi = boxes
+    if lo.size == 0:
+        return []
+
+    with np.errstate(invalid='ignore'):
+        f_lo, f_hi = func(lo), func(hi)
+        roots = refine_roots(func, lo, hi, f_lo, f_hi)
+        bound = np.maximum(np.abs(f_lo), np.abs(f_hi))
+        roots = np.where(np.abs(func(roots)) <= bound, roots, np.nan)
+
+        mid = (lo + hi) / 2
+        touches = np.isnan(roots) & (np.sign(f_lo) * np.sign(f_hi) > 0) & (np.abs(func(mid)) < touch_tol)
+        roots = np.where(touches, mid, roots)
+
+        # Нуль на краю области определения (sqrt(x - 1.5)): край ищется бисекцией
+        one_sided = np.isnan(roots) & (np.isfinite(f_lo) != np.isfinite(f_hi))
+        if one_sided.any():
+            edge = _domain_edge(func, lo[one_sided], hi[one_sided], np.isfinite(f_lo[one_sided]))
+            roots[one_sided] = np.where(np.abs(func(edge)) < touch_tol, edge, np.nan)
+
+    result = []
+    for root in np.sort(roots[np.isfinite(roots)]).tolist():
+        # Корень на общей границе соседних частей находится дважды
+        if not result or root - result[-1] > width:
+            result.append(root)
+    return result
@@ -0,0 +1,194 @@
+"""
+Вершины линий графика без обращения к Kivy.
+
+Выборка точек (utils.adaptive_sampling), отсечение по видимой области,
+разбиение на участки и прореживание (utils.decimation) дают плоские
+списки экранных координат [x0, y0, x1, y1, ...]. Эти функции не создают
+инструкций холста, поэтому их можно вызывать в фоновом потоке; главному
+потоку остаётся только построить Line из готовых списков.
+
+function_passes и parametric_passes выдают кривую по мере уточнения:
+сначала грубую (начальная сетка выборки), затем всё точнее, но не чаще
+раза в frame_time секунд, чтобы главный поток успевал показывать каждый
+промежуточный результат за один кадр.
+
+С tiled=True выборки функций с cache_key берутся из кэша плиток
+(utils.tile_cache): при сдвиге окна вычисляется только открывшаяся полоса.
+"""
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from utils.adaptive_sampling import adaptive_refinement
+from utils.coordinate_transform import x_to_screen, y_to_screen
+from utils.decimation import m4_decimate, simplify_polyline
+from utils.math_utils import evaluate_array, finite_runs
+from utils.tile_cache import tiled_refinement
+
+
+# Одна ломаная: цвет (r, g, b[, a]) и плоский список вершин
+Polyline = namedtuple('Polyline', 'color points')
+
+# Один проход: ломаные, последний ли он, число выбранных точек,
+# видимых точек и вершин всех ломаных
+CurvePass = namedtuple('CurvePass', 'polylines done sampled visible vertices')
+
+FUNCTION_COLORS = [(0, 0, 1), (1, 0, 0)]
+PARAMETRIC_COLOR = (0, 0.5, 1, 1)  # голубой
+
+# Не чаще одного промежуточного прохода за кадр (60 кадров в секунду)
+FRAME_TIME = 1 / 60
+
+
+def _refine(samplers, frame_time):
+    """
+    Продвигает выборки всех кривых на уровень за шаг и выдаёт их текущее
+    состояние: начальную сетку (если frame_time задан), затем не чаще раза
+    в frame_time секунд и в конце - итог. Выдаёт (выборки, done).
+    """
+    states = [next(sampler) for sampler in samplers]
+    if frame_time is not None:
+        yield states, False
+    last = time.perf_counter()
+
+    active = list(range(len(samplers)))
+    while active:
+        for idx in list(active):
+            try:
+                states[idx] = next(samplers[idx])
+            except StopIteration:
+                active.remove(idx)
+        if active and frame_time is not None and time.perf_counter() - last >= frame_time:
+            yield states, False
+            last = time.perf_counter()
+
+    yield states, True
+
+
+def _tiled_screen_samples(func, view, area):
+    """
+    Выборки из кэша плиток (tiled_refinement) в экранных координатах,
+    в том же виде, что у adaptive_refinement.
+    """
+    x_min, x_max, y_min, y_max = view
+    area_x, area_y, area_size = area
+    for xs, ys in tiled_refinement(func, x_min, x_max, y_min, y_max, area_size):
+        yield (xs, x_to_screen(xs, area_x, area_size, x_min, x_max),
+               y_to_screen(ys, area_y, area_size, y_min, y_max))
+
+
+def function_passes(functions, view, area, colors=FUNCTION_COLORS, frame_time=FRAME_TIME,
+                    tiled=False):
+    """
+    Генератор проходов (CurvePass) для графиков y = f(x): по одной ломаной
+    на каждый непрерывный видимый участок.
+
+    Args:
+        functions: функции, по цвету из colors на каждую
+        view: (x_min, x_max, y_min, y_max) - видимая область
+        area: (area_x, area_y, area_size) - квадрат графика на экране
+        frame_time: наименьший промежуток между проходами в секундах;
+                    None - только итоговый проход
+        tiled: брать выборки из кэша плиток (для функций с cache_key)
+    """
+    x_min, x_max, y_min, y_max = view
+    area_x, area_y, area_size = area
+    bounds = (area_x, area_y, area_x + area_size, area_y + area_size)
+
+    # Точки выбираются адаптивно: гуще на изгибах и у полюсов
+    def screen_points(func):
+        return lambda xs: (x_to_screen(xs, area_x, area_size, x_min, x_max),
+                           y_to_screen(evaluate_array(func, xs), area_y, area_size, y_min, y_max))
+
+    use_tiles = tiled and x_max > x_min and y_max > y_min
+    samplers = [_tiled_screen_samples(func, view, area)
+                if use_tiles and getattr(func, 'cache_key', None) is not None
+                else adaptive_refinement(screen_points(func), x_min, x_max, bounds=bounds)
+                for func in functions]
+
+    for states, done in _refine(samplers, frame_time):
+        polylines = []
+        sampled = visible_count = 0
+        for idx, (_, screen_xs, screen_ys) in enumerate(states):
+            # Разрывы и выход за видимую область делят кривую на отрезки
+            # (плитки выходят за край окна и по x)
+            visible = (np.isfinite(screen_ys) &
+                       (screen_xs >= area_x) & (screen_xs <= area_x + area_size) &
+                       (screen_ys >= area_y) & (screen_ys <= area_y + area_size))
+            sampled += screen_xs.size
+            visible_count += int(visible.sum())
+
+            for start, stop in finite_runs(visible):
+                if stop - start < 2:
+                    continue
+                # В каждом столбце пикселей остаются не больше 4 вершин
+                run_xs, run_ys = m4_decimate(screen_xs[start:stop], screen_ys[start:stop])
+                points = np.column_stack((run_xs, run_ys)).ravel().tolist()
+                polylines.append(Polyline(colors[idx], points))
+
+        vertices = sum(len(polyline.points) // 2 for polyline in polylines)
+        yield CurvePass(polylines, done, sampled, visible_count, vertices)
+
+
+def parametric_passes(x_func, y_func, t_min, t_max, view, area, simplify_tolerance=0.5,
+                      frame_time=FRAME_TIME):
+    """
+    Генератор проходов (CurvePass) для параметрической кривой x(t), y(t).
+
+    Вершины, не меняющие кривую больше чем на simplify_tolerance пикселей,
+    удаляются (None - без упрощения). Остальные аргументы - как у function_passes.
+    """
+    x_min, x_max, y_min, y_max = view
+    area_x, area_y, area_size = area
+
+    # Точки выбираются адаптивно: гуще там, где кривая изгибается
+    def screen_points(ts):
+        return (x_to_screen(evaluate_array(x_func, ts), area_x, area_size, x_min, x_max),
+                y_to_screen(evaluate_array(y_func, ts), area_y, area_size, y_min, y_max))
+
+    sampler = adaptive_refinement(
+        screen_points, t_min, t_max,
+        bounds=(area_x, area_y, area_x + area_size, area_y + area_size))
+
+    for states, done in _refine([sampler], frame_time):
+        ts, screen_xs, screen_ys = states[0]
+
+        # Оставляем конечные точки в видимой области
+        visible = (np.isfinite(screen_xs) & np.isfinite(screen_ys) &
+                   (screen_xs >= area_x) & (screen_xs <= area_x + area_size) &
+                   (screen_ys >= area_y) & (screen_ys <= area_y + area_size))
+
+        # Каждая вершина широкой линии со скруглёнными стыками триангулируется:
+        # убираем вершины, не меняющие кривую больше чем на simplify_tolerance
+        line_xs, line_ys = screen_xs[visible], screen_ys[visible]
+        if simplify_tolerance:
+            line_xs, line_ys = simplify_polyline(line_xs, line_ys, simplify_tolerance)
+
+        polylines = []
+        if line_xs.size >= 2:
+            points = np.column_stack((line_xs, line_ys)).ravel().tolist()
+            polylines.append(Polyline(PARAMETRIC_COLOR, points))
+        yield CurvePass(polylines, done, ts.size, int(visible.sum()), line_xs.size)
+
+
+def function_polylines(functions, view, area, colors=FUNCTION_COLORS):
+    """
+    Итоговые ломаные графиков y = f(x) (см. function_passes): список Polyline.
+    """
+    for curve_pass in function_passes(functions, view, area, colors, frame_time=None):
+        pass
+    return curve_pass.polylines
+
+
+def parametric_polylines(x_func, y_func, t_min, t_max, view, area, simplify_tolerance=0.5):
+    """
+    Итоговая ломаная параметрической кривой (см. parametric_passes).
+
+    Returns:
+        (список Polyline, число выбранных точек, видимых точек, вершин ломаной)
+    """
+    for curve_pass in parametric_passes(x_func, y_func, t_min, t_max, view, area,
+                                        simplify_tolerance, frame_time=None):
+        pass
+    return curve_pass.polylines, curve_pass.sampled, curve_pass.visible, curve_pass.vertices
@@ -0,0 +1,123 @@
+"""
+Прореживание ломаных перед передачей в kivy.graphics.Line.
+
+M4 (графики функций): когда точек больше, чем столбцов пикселей
+(sin(100x) на широком окне), большая часть вершин ломаной попадает в одни
+и те же столбцы и не видна. В каждом столбце достаточно оставить четыре
+точки: первую, последнюю, с наименьшим и с наибольшим y. Ломаная через них
+закрашивает в каждом столбце тот же вертикальный отрезок и так же соединяет
+соседние столбцы, поэтому изображение не меняется, а вершин не больше
+4 × ширина в пикселях.
+
+Рамер-Дуглас-Пекер (параметрические кривые): из ломаной удаляются
+вершины, без которых она отклоняется от исходной не больше чем на
+tolerance пикселей. Широкая линия со скруглёнными стыками
+триангулируется на каждой вершине, поэтому длинные гладкие кривые
+(окружности, спирали) рисуются заметно дешевле.
+"""
+import numpy as np
+
+
+def m4_indices(screen_xs, screen_ys):
+    """
+    Индексы точек, оставляемых прореживанием M4, по возрастанию.
+
+    Args:
+        screen_xs: экранные x точек ломаной, неубывающие
+        screen_ys: экранные y тех же точек (конечные)
+
+    Returns:
+        ndarray индексов: первая, последняя, min y и max y в каждом столбце
+    """
+    screen_xs = np.asarray(screen_xs, dtype=float)
+    screen_ys = np.asarray(screen_ys, dtype=float)
+    if screen_xs.size <= 4:
+        return np.arange(screen_xs.size)
+
+    columns = np.floor(screen_xs).astype(np.int64)
+    # Начало и конец каждого столбца (точки идут по возрастанию x)
+    starts = np.flatnonzero(np.concatenate(([True], columns[1:] != columns[:-1])))
+    ends = np.append(starts[1:], columns.size) - 1
+
+    # Внутри столбца точки упорядочены по y: первая - минимум, последняя - максимум
+    by_y = np.lexsort((screen_ys, columns))
+    lowest = by_y[starts]
+    highest = by_y[ends]
+
+    return np.unique(np.concatenate((starts, ends, lowest, highest)))
+
+
+def m4_decimate(screen_xs, screen_ys):
+    """
+    Прореженные массивы (screen_xs, screen_ys), см. m4_indices.
+    """
+    keep = m4_indices(screen_xs, screen_ys)
+    return np.asarray(screen_xs)[keep], np.asarray(screen_ys)[keep]
+
+
+def rdp_indices(screen_xs, screen_ys, tolerance=0.5):
+    """
+    Индексы вершин, оставляемых упрощением Рамера-Дугласа-Пекера, по возрастанию.
+
+    Все отрезки одного уровня рекурсии обрабатываются вместе: расстояния
+    от внутренних точек до хорд считаются одним векторным выражением.
+
+    Args:
+        screen_xs, screen_ys: экранные координаты вершин (конечные)
+        tolerance: допустимое отклонение упрощённой ломаной, пиксели
+
+    Returns:
+        ndarray индексов; первая и последняя вершины остаются всегда
+    """
+    screen_xs = np.asarray(screen_xs, dtype=float)
+    screen_ys = np.asarray(screen_ys, dtype=float)
+    n = screen_xs.size
+    if n <= 2:
+        return np.arange(n)
+
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    starts, ends = np.array([0]), np.array([n - 1])
+
+    while starts.size:
+        # Отрезки без внутренних точек делить нечего
+        inner = ends - starts > 1
+        starts, ends = starts[inner], ends[inner]
+        if starts.size == 0:
+            break
+
+        # Внутренние точки всех отрезков подряд: segment - номер отрезка каждой точки
+        counts = ends - starts - 1
+        segment = np.repeat(np.arange(starts.size), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        points = starts[segment] + 1 + offsets
+
+        ax, ay = screen_xs[starts][segment], screen_ys[starts][segment]
+        dx = screen_xs[ends][segment] - ax
+        dy = screen_ys[ends][segment] - ay
+        px, py = screen_xs[points] - ax, screen_ys[points] - ay
+        length = np.hypot(dx, dy)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # Замкнутый участок (начало совпадает с концом): расстояние до точки
+            distance = np.where(length > 0, np.abs(dx * py - dy * px) / length, np.hypot(px, py))
+
+        # Самая далёкая от хорды точка каждого отрезка: последняя после сортировки
+        by_distance = np.lexsort((distance, segment))
+        last = np.cumsum(counts) - 1
+        farthest = by_distance[last]
+
+        split = distance[farthest] > tolerance
+        pivots = points[farthest[split]]
+        keep[pivots] = True
+        starts = np.concatenate((starts[split], pivots))
+        ends = np.concatenate((pivots, ends[split]))
+
+    return np.flatnonzero(keep)
+
+
+def simplify_polyline(screen_xs, screen_ys, tolerance=0.5):
+    """
+    Упрощённые массивы (screen_xs, screen_ys), см. rdp_indices.
+    """
+    keep = rdp_indices(screen_xs, screen_ys, tolerance)
+    return np.asarray(screen_xs)[keep], np.asarray(screen_ys)[keep]
@@ -2,6 +2,9 @@
 Модуль для поиска точек пересечения двух функций
 """
 import numpy as np
+from utils.branch_and_bound import find_roots
+from utils.math_utils import evaluate_array
+from utils.root_finding import refine_roots
 
 
 def find_intersections(f1, f2, x_min, x_max, tolerance=1e-6):
@@ -22,54 +25,69 @@ def find_intersections(f1, f2, x_min, x_max, tolerance=1e-6):
     num_steps = 2000
     step = (x_max - x_min) / num_steps
 
-    for i in range(num_steps):
-        x1 = x_min + i * step
-        x2 = x1 + step
-        try:
-            y1_1 = f1(x1)
-            y1_2 = f2(x1)
-            y2_1 = f1(x2)
-            y2_2 = f2(x2)
-
-            diff1 = y1_1 - y1_2
-            diff2 = y2_1 - y2_2
-
-            if diff1 * diff2 < 0:
-                root = bisection_intersection(f1, f2, x1, x2, tolerance)
-                if root is not None:
-                    y_val = f1(root)
-                    intersections.append((root, y_val))
-            elif abs(diff1) < tolerance:
-                intersections.append((x1, y1_1))
-        except:
-            continue
+    interval1 = getattr(f1, 'interval', None)
+    interval2 = getattr(f2, 'interval', None)
+    if interval1 is not None and interval2 is not None:
+        roots = _interval_intersections(f1, f2, interval1, interval2, x_min, x_max, step, tolerance)
+        if roots is not None:
+            return _unique([(root, f1(root)) for root in roots])
 
+    xs = x_min + np.arange(num_steps + 1) * step
+    ys1 = evaluate_array(f1, xs)
+    ys2 = evaluate_array(f2, xs)
+
+    with np.errstate(invalid='ignore'):
+        diffs = ys1 - ys2
+        diff1, diff2 = diffs[:-1], diffs[1:]
+        sign_change = diff1 * diff2 < 0
+        touches = ~sign_change & (np.abs(diff1) < tolerance)
+
+    def difference(values):
+        return evaluate_array(f1, values) - evaluate_array(f2, values)
+
+    # Все смены знака разности уточняются одновременно
+    brackets = np.flatnonzero(sign_change)
+    roots = refine_roots(difference, xs[brackets], xs[brackets + 1], diff1[brackets], diff2[brackets])
+    with np.errstate(invalid='ignore'):
+        # Смена знака через полюс - не пересечение: разность там не уменьшается
+        bound = np.maximum(np.abs(diff1[brackets]), np.abs(diff2[brackets]))
+        roots = np.where(np.abs(difference(roots)) <= bound, roots, np.nan)
+    found = np.full(num_steps, np.nan)
+    found[brackets] = roots
+    found[touches] = xs[:-1][touches]
+
+    for i in np.flatnonzero(np.isfinite(found)):
+        if sign_change[i]:
+            intersections.append((float(found[i]), f1(float(found[i]))))
+        else:
+            intersections.append((float(xs[i]), float(ys1[i])))
+
+    return _unique(intersections)
+
+
+def _interval_intersections(f1, f2, interval1, interval2, x_min, x_max, step, tolerance):
+    """
+    Корни f1 - f2 методом ветвей и границ: части отрезка, где интервальные
+    оценки функций не пересекаются, отбрасываются без вычислений в точках.
+    """
+    def difference(values):
+        return evaluate_array(f1, values) - evaluate_array(f2, values)
+
+    def difference_interval(lo, hi):
+        lo1, hi1 = interval1(lo, hi)
+        lo2, hi2 = interval2(lo, hi)
+        with np.errstate(invalid='ignore'):
+            return np.nextafter(lo1 - hi2, -np.inf), np.nextafter(hi1 - lo2, np.inf)
+
+    return find_roots(difference, difference_interval, x_min, x_max, step, tolerance)
+
+
+def _unique(intersections):
+    """
+    Оставляет по одной точке из близких (ближе 0.1 по x).
+    """
     unique = []
     for x, y in intersections:
         if not any(abs(x - ux) < 0.1 for ux, uy in unique):
             unique.append((x, y))
     return unique
-
-
-def bisection_intersection(f1, f2, a, b, tol=1e-6, max_iter=50):
-    """
-    Бисекция для f1(x) - f2(x) = 0
-    """
-    try:
-        fa = f1(a) - f2(a)
-        fb = f1(b) - f2(b)
-        if fa * fb > 0:
-            return None
-
-        for _ in range(max_iter):
-            c = (a + b) / 2
-            fc = f1(c) - f2(c)
-            if abs(fc) < tol:
-                return c
-            if fa * fc < 0:
-                b, fb = c, fc
-            else:
-                a, fa = c, fc
-        return (a + b) / 2
-    except:
-        return None
@@ -3,6 +3,8 @@
 """
 import math
 
+import numpy as np
+
 
 def nice_number(value):
     """
@@ -14,4 +16,41 @@ def nice_number(value):
     fraction = value / (10 ** exponent)
     nice_fractions = [1, 2, 5, 10]
     nice_fraction = min(nice_fractions, key=lambda x: abs(x - fraction))
-    return nice_fraction * (10 ** exponent)
\ No newline at end of file
+    return nice_fraction * (10 ** exponent)
+
+def evaluate_array(func, values):
+    """
+    Вычисляет функцию сразу на массиве точек.
+
+    Если функция построена парсером, используется её векторизованное ядро
+    (func.vectorized); иначе функция вызывается поточечно.
+    Возвращает ndarray той же формы; неопределённые значения - nan/±inf.
+    """
+    values = np.asarray(values, dtype=float)
+    vectorized = getattr(func, 'vectorized', None)
+    if vectorized is not None:
+        return vectorized(values)
+
+    result = np.empty(values.shape)
+    for i, v in enumerate(values.flat):
+        try:
+            result.flat[i] = func(v)
+        except Exception:
+            result.flat[i] = np.nan
+    return result
+
+
+def finite_runs(mask):
+    """
+    Разбивает булеву маску на непрерывные участки из True.
+
+    Returns:
+        список пар (start, stop) - срезы [start:stop] подряд идущих True
+    """
+    mask = np.asarray(mask, dtype=bool)
+    if mask.size == 0:
+        return []
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    stops = np.flatnonzero(edges == -1)
+    return list(zip(starts.tolist(), stops.tolist()))
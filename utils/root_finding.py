@@ -0,0 +1,99 @@
+"""
+Пакетное уточнение корней на отрезках со сменой знака.
+
+Все отрезки, найденные на сетке (нули функции, пересечения графиков,
+нули производных), уточняются одновременно методом ITP
+(Interpolate-Truncate-Project, Oliveira & Takahashi, 2020): на каждой
+итерации функция вычисляется один раз сразу для всех ещё не сошедшихся
+отрезков. ITP сходится сверхлинейно на гладких функциях и не хуже
+бисекции в худшем случае.
+"""
+import numpy as np
+
+
+# Точность по x по умолчанию
+DEFAULT_XTOL = 1e-10
+
+# Запас итераций сверх бисекции (параметр n0 метода ITP)
+_EXTRA_ITERATIONS = 1
+
+
+def refine_roots(func, a, b, fa=None, fb=None, xtol=DEFAULT_XTOL, max_iter=100):
+    """
+    Уточняет корни func на отрезках [a[i], b[i]] со сменой знака.
+
+    Args:
+        func: функция массива точек, возвращающая массив значений
+              (например, lambda xs: evaluate_array(f, xs))
+        a, b: массивы концов отрезков
+        fa, fb: значения func на концах (если уже известны по сетке)
+        xtol: допустимая погрешность корня по x
+
+    Returns:
+        ndarray корней той же длины, что a; nan там, где на концах нет
+        смены знака или функция внутри отрезка не определена
+    """
+    a = np.array(a, dtype=float)
+    b = np.array(b, dtype=float)
+    roots = np.full(a.shape, np.nan)
+
+    with np.errstate(all='ignore'):
+        fa = func(a) if fa is None else np.array(fa, dtype=float)
+        fb = func(b) if fb is None else np.array(fb, dtype=float)
+        exact_a = fa == 0
+        exact_b = ~exact_a & (fb == 0)
+        roots[exact_a] = a[exact_a]
+        roots[exact_b] = b[exact_b]
+
+        active = np.flatnonzero(np.isfinite(fa) & np.isfinite(fb) & (np.sign(fa) * np.sign(fb) < 0))
+        if active.size == 0:
+            return roots
+        a, b, fa, fb = a[active], b[active], fa[active], fb[active]
+
+        # Параметры ITP для каждого отрезка: κ1 = 0.2 / (b - a), κ2 = 2
+        width = b - a
+        k1 = 0.2 / width
+        n_max = np.ceil(np.log2(np.maximum(width / (2 * xtol), 1))) + _EXTRA_ITERATIONS
+        done = width <= 2 * xtol
+        failed = np.zeros(active.size, dtype=bool)
+
+        for j in range(max_iter):
+            todo = np.flatnonzero(~done)
+            if todo.size == 0:
+                break
+
+            lo, hi, f_lo, f_hi = a[todo], b[todo], fa[todo], fb[todo]
+            half_width = (hi - lo) / 2
+            x_half = lo + half_width
+            radius = xtol * 2.0 ** (n_max[todo] - j) - half_width
+            delta = k1[todo] * (hi - lo) ** 2
+
+            # Interpolate: регула фальси
+            x_f = (f_hi * lo - f_lo * hi) / (f_hi - f_lo)
+            x_f = np.where(np.isfinite(x_f), x_f, x_half)
+            # Truncate: сдвиг к середине на delta
+            sigma = np.sign(x_half - x_f)
+            x_t = np.where(delta <= np.abs(x_half - x_f), x_f + sigma * delta, x_half)
+            # Project: не дальше radius от середины
+            x_itp = np.where(np.abs(x_t - x_half) <= radius, x_t, x_half - sigma * radius)
+
+            f_itp = func(x_itp)
+
+            undefined = ~np.isfinite(f_itp)
+            same_lo = np.sign(f_itp) == np.sign(f_lo)
+            same_hi = np.sign(f_itp) == np.sign(f_hi)
+            exact = ~undefined & ~same_lo & ~same_hi
+
+            move_lo = ~undefined & same_lo
+            move_hi = ~undefined & same_hi
+            a[todo] = np.where(move_lo | exact, x_itp, lo)
+            fa[todo] = np.where(move_lo, f_itp, f_lo)
+            b[todo] = np.where(move_hi | exact, x_itp, hi)
+            fb[todo] = np.where(move_hi, f_itp, f_hi)
+
+            failed[todo[undefined]] = True
+            done[todo] = undefined | (b[todo] - a[todo] <= 2 * xtol)
+
+        roots[active] = np.where(failed, np.nan, (a + b) / 2)
+
+    return roots
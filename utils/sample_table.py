@@ -0,0 +1,219 @@
+"""
+Общая таблица значений функции для численного анализа.
+
+Все численные методы (область значений, поиск нулей, экстремумы,
+знакопостоянство, монотонность) работают с одной плотной выборкой
+функции на отрезке вместо того, чтобы каждый раз считать свою сетку.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.math_utils import evaluate_array
+from utils.root_finding import refine_roots
+
+
+# Число точек таблицы по умолчанию (нечётное: середина отрезка попадает в узел)
+DEFAULT_POINTS = 2001
+
+# Сколько таблиц хранить (разные функции, параметры и отрезки)
+_CACHE_SIZE = 16
+
+
+class SampleTable:
+    """
+    Значения функции на равномерной сетке отрезка [x_min, x_max].
+
+    Атрибуты:
+        xs     - узлы сетки
+        ys     - значения функции (nan/±inf вне области определения)
+        finite - маска конечных значений
+        sign   - знак значения (0 там, где значение не конечно)
+        diffs  - первые разности ys[i + 1] - ys[i]
+        step   - шаг сетки
+    """
+    def __init__(self, func, x_min, x_max, points=DEFAULT_POINTS):
+        self.x_min = x_min
+        self.x_max = x_max
+        self.xs = np.linspace(x_min, x_max, points)
+        self.ys = evaluate_array(func, self.xs)
+        self.finite = np.isfinite(self.ys)
+        self.sign = np.where(self.finite, np.sign(np.where(self.finite, self.ys, 0)), 0)
+        with np.errstate(invalid='ignore'):
+            self.diffs = np.diff(self.ys)
+        self.step = (x_max - x_min) / (points - 1)
+
+    def value_range(self):
+        """
+        (min, max) конечных значений или None, если таких нет.
+        """
+        ys = self.ys[self.finite]
+        if ys.size == 0:
+            return None
+        return float(ys.min()), float(ys.max())
+
+    def zero_brackets(self, touch_tol=1e-6):
+        """
+        Индексы i, для которых на [xs[i], xs[i + 1]] есть нуль.
+
+        Returns:
+            (sign_change, touches) - булевы маски длины len(xs) - 1:
+            смена знака и касание нуля (|f| < touch_tol без смены знака)
+        """
+        y1, y2 = self.ys[:-1], self.ys[1:]
+        finite = self.finite[:-1] & self.finite[1:]
+        with np.errstate(invalid='ignore', over='ignore'):
+            sign_change = finite & (y1 * y2 < 0)
+            touches = finite & ~sign_change & (np.abs(y1) < touch_tol)
+        return sign_change, touches
+
+    def zeros(self, func):
+        """
+        Нули функции на отрезке по возрастанию x.
+
+        Все смены знака уточняются одновременно (utils.root_finding); смена
+        знака через полюс (1/x) отбрасывается: в уточнённой точке |f| не меньше,
+        чем в узлах. Касания нуля берутся в узлах сетки.
+        """
+        sign_change, touches = self.zero_brackets()
+        brackets = np.flatnonzero(sign_change)
+
+        zeros = np.full(self.xs.size - 1, np.nan)
+        if brackets.size:
+            y1, y2 = self.ys[brackets], self.ys[brackets + 1]
+            roots = refine_roots(lambda xs: evaluate_array(func, xs),
+                                 self.xs[brackets], self.xs[brackets + 1], y1, y2)
+            with np.errstate(invalid='ignore'):
+                is_zero = np.abs(evaluate_array(func, roots)) <= np.maximum(np.abs(y1), np.abs(y2))
+            zeros[brackets] = np.where(is_zero, roots, np.nan)
+
+        zeros[touches] = self.xs[:-1][touches]
+        return zeros[np.isfinite(zeros)].tolist()
+
+    def local_extrema(self, tol=1e-9):
+        """
+        Локальные экстремумы в узлах сетки: список (тип, x, y), тип - 'max' или 'min'.
+        Соседние экстремумы ближе двух шагов сетки объединяются.
+        """
+        y0, y1, y2 = self.ys[:-2], self.ys[1:-1], self.ys[2:]
+        finite = self.finite[:-2] & self.finite[1:-1] & self.finite[2:]
+        with np.errstate(invalid='ignore'):
+            is_max = finite & (y1 > y0 + tol) & (y1 > y2 + tol)
+            is_min = finite & (y1 < y0 - tol) & (y1 < y2 - tol)
+
+        extrema = []
+        for i in np.flatnonzero(is_max | is_min):
+            x = float(self.xs[i + 1])
+            if extrema and abs(x - extrema[-1][1]) < self.step * 2:
+                continue
+            extrema.append(('max' if is_max[i] else 'min', x, float(y1[i])))
+        return extrema
+
+    def monotonic_runs(self, tol=1e-6):
+        """
+        Участки возрастания и убывания по первым разностям.
+
+        Returns:
+            (increasing, decreasing) - списки отрезков (a, b); участок
+            прерывается там, где функция не определена
+        """
+        finite = self.finite[:-1] & self.finite[1:]
+        with np.errstate(invalid='ignore'):
+            trend = np.where(self.diffs > tol, 1, np.where(self.diffs < -tol, -1, 0))
+        trend = np.where(finite, trend, 0)
+
+        increasing = []
+        decreasing = []
+        current = None  # (тип, a, b)
+
+        # Постоянные участки (trend == 0) между конечными точками не прерывают текущий
+        for i in np.flatnonzero((trend != 0) | ~finite):
+            if not finite[i]:
+                if current:
+                    (increasing if current[0] > 0 else decreasing).append(current[1:])
+                    current = None
+                continue
+
+            x1, x2 = float(self.xs[i]), float(self.xs[i + 1])
+            if current is None:
+                current = (trend[i], x1, x2)
+            elif current[0] == trend[i]:
+                current = (current[0], current[1], x2)
+            else:
+                (increasing if current[0] > 0 else decreasing).append(current[1:])
+                current = (trend[i], x1, x2)
+
+        if current:
+            (increasing if current[0] > 0 else decreasing).append(current[1:])
+
+        return increasing, decreasing
+
+    def sign_runs(self, a, b):
+        """
+        Участки постоянного знака внутри (a, b): список (start, stop, знак).
+
+        Участок, который доходит до края интервала, начинается (заканчивается)
+        в a (b). Если рядом узел, где функция не определена (полюс, край
+        области), граница проходит через этот узел, иначе - посередине
+        между узлами, где меняется знак.
+        """
+        inside = np.flatnonzero((self.xs > a) & (self.xs < b))
+        if inside.size == 0:
+            return []
+
+        signs = self.sign[inside]
+        xs = self.xs[inside]
+        breaks = np.flatnonzero(np.diff(signs)) + 1
+        starts = np.concatenate(([0], breaks))
+        stops = np.concatenate((breaks, [signs.size]))
+
+        runs = []
+        for start, stop in zip(starts.tolist(), stops.tolist()):
+            sign = int(signs[start])
+            if sign == 0:
+                continue
+            if start == 0:
+                lo = a
+            elif signs[start - 1] == 0:
+                lo = float(xs[start - 1])
+            else:
+                lo = float((xs[start - 1] + xs[start]) / 2)
+
+            if stop == signs.size:
+                hi = b
+            elif signs[stop] == 0:
+                hi = float(xs[stop])
+            else:
+                hi = float((xs[stop - 1] + xs[stop]) / 2)
+            runs.append((lo, hi, sign))
+        return runs
+
+
+_tables = OrderedDict()
+_tables_lock = threading.Lock()
+
+
+def get_sample_table(func, x_min, x_max, points=DEFAULT_POINTS, key=None):
+    """
+    Таблица для (функции, отрезка, числа точек); строится один раз.
+
+    Args:
+        key: идентификатор функции для кэша (например, выражение и значения
+             параметров); по умолчанию - сам объект функции
+    """
+    cache_key = (func if key is None else key, float(x_min), float(x_max), points)
+
+    with _tables_lock:
+        table = _tables.get(cache_key)
+        if table is not None:
+            _tables.move_to_end(cache_key)
+            return table
+
+    table = SampleTable(func, x_min, x_max, points)
+
+    with _tables_lock:
+        _tables[cache_key] = table
+        if len(_tables) > _CACHE_SIZE:
+            _tables.popitem(last=False)
+    return table
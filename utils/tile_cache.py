@@ -0,0 +1,221 @@
+"""
+Кэш выборок графиков y = f(x) по плиткам в мировых координатах.
+
+Ось x делится на плитки: на уровне масштаба level пиксель имеет ширину
+2**level, а плитка - TILE_PIXELS таких пикселей. Уровень видимой области -
+наибольшая степень двойки, не превышающая ширину её пикселя, поэтому
+выборка плитки не грубее, чем нужно для экрана. Выборка адаптивная
+(utils.adaptive_sampling) в пикселях уровня и не зависит от сдвига окна:
+при сдвиге вычисляются только открывшиеся плитки, остальные берутся
+из кэша. После смены масштаба, пока плитки нового уровня вычисляются,
+показываются плитки ближайшего уровня, уже лежащие в кэше.
+
+Как и в adaptive_sample, отрезки, целиком лежащие выше или ниже
+видимой области, не уточняются; чтобы плитка годилась и после сдвига
+по y, полоса уточнения шире окна на его высоту с каждой стороны.
+Плитка из кэша используется, только если её полоса покрывает окно.
+Все плитки одной кривой делят общий бюджет вычислений MAX_EVALUATIONS.
+
+Ключ плитки - (cache_key функции, уровень по x, уровень по y, номер),
+где cache_key - выражение и значения параметров (parsers.expression_cache).
+Кэш ограничен общим числом хранимых чисел (LRU).
+"""
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.adaptive_sampling import (MAX_EVALUATIONS, PIXEL_TOLERANCE, EvaluationBudget,
+                                     adaptive_refinement)
+from utils.math_utils import evaluate_array
+
+
+# Ширина плитки в пикселях её уровня
+TILE_PIXELS = 256
+
+# Отрезков в начальной сетке плитки (по 8 пикселей уровня)
+TILE_SEGMENTS = 32
+
+# Предел кэша: всего чисел (x и y) во всех плитках
+MAX_FLOATS = 1_000_000
+
+# Насколько далёкие уровни годятся для предварительного показа
+MAX_LEVEL_DISTANCE = 3
+
+
+class CurveTileCache:
+    """
+    LRU-кэш плиток: ключ -> (xs, ys, y_band) - выборка в мировых координатах
+    и полоса (y_low, y_high), в которой она уточнена.
+    Вытесняются давно не использованные плитки, пока общее число
+    чисел больше max_floats.
+    """
+    def __init__(self, max_floats=MAX_FLOATS):
+        self.max_floats = max_floats
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.floats = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, xs, ys, y_band):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.floats -= old[0].size + old[1].size
+            self._entries[key] = (xs, ys, y_band)
+            self.floats += xs.size + ys.size
+            while self.floats > self.max_floats and len(self._entries) > 1:
+                _, (old_xs, old_ys, _) = self._entries.popitem(last=False)
+                self.floats -= old_xs.size + old_ys.size
+                self.evictions += 1
+
+    def nearest(self, func_key, x_level, y_level, lo, hi):
+        """
+        Выборка на [lo, hi] из плиток другого уровня, целиком покрывающих
+        отрезок: ближайший к x_level уровень (не дальше MAX_LEVEL_DISTANCE).
+
+        Returns:
+            (xs, ys) или None
+        """
+        levels = {}
+        with self._lock:
+            for key, entry in self._entries.items():
+                if key[0] != func_key or (key[1], key[2]) == (x_level, y_level):
+                    continue
+                if abs(key[1] - x_level) > MAX_LEVEL_DISTANCE:
+                    continue
+                levels.setdefault((key[1], key[2]), {})[key[3]] = entry
+
+        by_distance = sorted(levels, key=lambda level: (abs(level[0] - x_level), abs(level[1] - y_level)))
+        for level in by_distance:
+            width = TILE_PIXELS * 2.0 ** level[0]
+            indices = range(math.floor(lo / width), math.ceil(hi / width))
+            tiles = levels[level]
+            if not all(i in tiles for i in indices):
+                continue
+            xs = np.concatenate([tiles[i][0] for i in indices])
+            ys = np.concatenate([tiles[i][1] for i in indices])
+            inside = (xs >= lo) & (xs <= hi)
+            return xs[inside], ys[inside]
+        return None
+
+    def info(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'floats': self.floats,
+                'max_floats': self.max_floats,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.floats = self.hits = self.misses = self.evictions = 0
+
+
+_cache = CurveTileCache()
+
+
+def tile_levels(x_span, y_span, area_size):
+    """
+    Уровни масштаба (по x, по y): ширина и высота пикселя уровня -
+    наибольшие степени двойки, не превышающие пиксель экрана.
+    """
+    return (math.floor(math.log2(x_span / area_size)),
+            math.floor(math.log2(y_span / area_size)))
+
+
+def tiled_refinement(func, x_min, x_max, y_min, y_max, area_size, tolerance=PIXEL_TOLERANCE,
+                     budget=MAX_EVALUATIONS):
+    """
+    Генератор последовательно уточняемых выборок y = f(x), покрывающих
+    [x_min, x_max], по плиткам (как utils.adaptive_sampling.adaptive_refinement).
+
+    Плитки из кэша используются сразу, недостающие вычисляются; пока
+    плитка не готова, вместо неё показывается плитка ближайшего уровня
+    из кэша или текущая (грубая) выборка. Готовые плитки кладутся в кэш,
+    кроме оборванных исчерпанием бюджета.
+
+    Args:
+        func: функция с атрибутом cache_key
+        y_min, y_max: видимая область по y (от высоты зависит допуск по y)
+        area_size: сторона квадрата графика в пикселях
+        budget: предел вычислений на все плитки кривой
+
+    Yields:
+        (xs, ys) - мировые координаты по возрастанию x
+    """
+    func_key = func.cache_key
+    x_level, y_level = tile_levels(x_max - x_min, y_max - y_min, area_size)
+    pixel_width, pixel_height = 2.0 ** x_level, 2.0 ** y_level
+    width = TILE_PIXELS * pixel_width
+    y_band = (2 * y_min - y_max, 2 * y_max - y_min)
+    # Отсечение только по y: по x плитка не зависит от окна
+    bounds = (-np.inf, y_band[0] / pixel_height, np.inf, y_band[1] / pixel_height)
+    shared = EvaluationBudget(budget)
+
+    # Выборка в пикселях уровня: от сдвига окна не зависит
+    def level_points(xs):
+        return xs / pixel_width, evaluate_array(func, xs) / pixel_height
+
+    tiles = []
+    for index in range(math.floor(x_min / width), math.ceil(x_max / width)):
+        key = (func_key, x_level, y_level, index)
+        cached = _cache.get(key)
+        if cached is not None and cached[2][0] <= y_min and y_max <= cached[2][1]:
+            tiles.append({'samples': cached[:2], 'sampler': None})
+            continue
+        lo, hi = index * width, (index + 1) * width
+        tiles.append({
+            'key': key,
+            'sampler': adaptive_refinement(level_points, lo, hi, tolerance, shared, bounds,
+                                           segments=TILE_SEGMENTS),
+            'preview': _cache.nearest(func_key, x_level, y_level, lo, hi),
+        })
+
+    while True:
+        for tile in tiles:
+            if tile['sampler'] is None:
+                continue
+            try:
+                ts, _, level_ys = next(tile['sampler'])
+                tile['samples'] = (ts, level_ys * pixel_height)
+            except StopIteration:
+                tile['sampler'] = None
+                if not shared.exhausted:
+                    _cache.put(tile['key'], *tile['samples'], y_band)
+
+        pending = [tile for tile in tiles if tile['sampler'] is not None]
+        shown = [tile['preview'] if tile['sampler'] is not None and tile['preview'] is not None
+                 else tile['samples'] for tile in tiles]
+        yield (np.concatenate([xs for xs, _ in shown]),
+               np.concatenate([ys for _, ys in shown]))
+        if not pending:
+            return
+
+
+def tile_cache_info():
+    """
+    Счётчики кэша плиток: hits, misses, evictions, size, floats, max_floats.
+    """
+    return _cache.info()
+
+
+def clear_tile_cache():
+    _cache.clear()
@@ -0,0 +1,168 @@
+"""
+Вычисления с ограничением по времени.
+
+Символьные вычисления sympy (solve, continuous_domain, simplify) на
+трансцендентных выражениях могут идти минутами. run_with_budget выполняет
+такое вычисление в отдельном процессе (os.fork), который убивается по
+истечении бюджета.
+
+fork безопасен, только пока в процессе один поток: дочерний процесс
+наследует блокировки, захваченные другими потоками (logging, кэши sympy),
+и может навсегда остановиться на них. Поэтому если запущены другие потоки
+(фоновый анализ, вычисление кривых, потоки Kivy) или fork недоступен,
+вычисление идёт в фоновом потоке.
+
+Поток прервать нельзя, поэтому с calls (словарь вызывающего) одинаковые
+вызовы func(*args) не запускают новых потоков: повторный вызов ждёт уже
+идущий, а если тот уже не уложился в бюджет и всё ещё считает, сразу
+получает BudgetExceeded. Когда такой поток всё же закончит, его результат
+получит следующий вызов.
+"""
+import os
+import pickle
+import select
+import signal
+import threading
+import time
+
+
+# Бюджет одного символьного вычисления по умолчанию, секунды.
+# Можно изменить для всего приложения: time_budget.DEFAULT_TIMEOUT = 10
+DEFAULT_TIMEOUT = 3.0
+
+
+class BudgetExceeded(Exception):
+    """
+    Вычисление не уложилось в отведённое время.
+    """
+
+
+def run_with_budget(func, *args, timeout=None, calls=None):
+    """
+    Вызывает func(*args) не дольше timeout секунд.
+
+    Результат и исключения func должны сериализоваться pickle
+    (выражения и множества sympy сериализуются).
+
+    Args:
+        calls: словарь незавершённых вызовов в потоках; ключ - (func, args),
+               поэтому args должны хешироваться
+
+    Raises:
+        BudgetExceeded: если время истекло
+        исключение func, если оно было выброшено
+    """
+    timeout = DEFAULT_TIMEOUT if timeout is None else timeout
+    if hasattr(os, 'fork') and threading.active_count() == 1:
+        return _run_in_process(func, args, timeout)
+    return _run_in_thread(func, args, timeout, calls)
+
+
+def _run_in_process(func, args, timeout):
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+
+    if pid == 0:
+        # Дочерний процесс: считаем, отдаём результат через pipe и выходим,
+        # не возвращаясь в код родителя ни при каких условиях
+        try:
+            os.close(read_fd)
+            try:
+                payload = (True, func(*args))
+            except BaseException as e:
+                payload = (False, e)
+            try:
+                data = pickle.dumps(payload)
+            except Exception as e:
+                data = pickle.dumps((False, RuntimeError(f"Результат не сериализуется: {e}")))
+            with os.fdopen(write_fd, 'wb') as pipe:
+                pipe.write(data)
+        finally:
+            os._exit(0)
+
+    os.close(write_fd)
+    chunks = []
+    deadline = time.monotonic() + timeout
+    finished = False
+
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            ready, _, _ = select.select([read_fd], [], [], remaining)
+            if not ready:
+                break
+            chunk = os.read(read_fd, 65536)
+            if not chunk:
+                finished = True
+                break
+            chunks.append(chunk)
+    finally:
+        os.close(read_fd)
+        if not finished:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        os.waitpid(pid, 0)
+
+    if not finished:
+        raise BudgetExceeded(f"Превышено время вычисления ({timeout:g} с)")
+    if not chunks:
+        raise RuntimeError("Процесс вычисления завершился без результата")
+
+    ok, value = pickle.loads(b''.join(chunks))
+    if not ok:
+        raise value
+    return value
+
+
+class _BackgroundCall:
+    """
+    func(*args) в фоновом потоке; результат могут ждать несколько вызовов.
+    """
+    def __init__(self, func, args):
+        self.outcome = {}
+        self.finished = threading.Event()
+        self.timed_out = False
+        threading.Thread(target=self._run, args=(func, args), daemon=True).start()
+
+    def _run(self, func, args):
+        try:
+            self.outcome['value'] = func(*args)
+        except BaseException as e:
+            self.outcome['error'] = e
+        finally:
+            self.finished.set()
+
+    def result(self):
+        if 'error' in self.outcome:
+            raise self.outcome['error']
+        return self.outcome['value']
+
+
+_calls_lock = threading.Lock()
+
+
+def _run_in_thread(func, args, timeout, calls=None):
+    key = (func, args)
+    with _calls_lock:
+        call = calls.get(key) if calls is not None else None
+        if call is None:
+            call = _BackgroundCall(func, args)
+            if calls is not None:
+                calls[key] = call
+        elif call.timed_out and not call.finished.is_set():
+            # Этот вызов уже не уложился в бюджет: ждать его снова незачем
+            raise BudgetExceeded(f"Превышено время вычисления ({timeout:g} с)")
+
+    if not call.finished.wait(timeout):
+        call.timed_out = True
+        raise BudgetExceeded(f"Превышено время вычисления ({timeout:g} с)")
+
+    if calls is not None:
+        with _calls_lock:
+            if calls.get(key) is call:
+                del calls[key]
+    return call.result()